@@ -0,0 +1,246 @@
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+from pydantic import BaseModel
+from ControlTool import ControlParams, BaseController, DualLoopPIDBank, get_controller_info
+from SimulationTool import SimulationParams, SimulationResult, BaseSimulater
+
+# PSOOptimizer.objective_function 中粒子各维对应的控制参数
+DEFAULT_PARAM_NAMES = get_controller_info('duallooppid').tuned_params
+
+class BoostPlantParams(BaseModel):
+    # 默认值与 boost_converternopid.fmu 一致：step1 在 0.5s 把负载从 20Ω 切到 25Ω
+    resistance: float = 20
+    inductance: float = 0.001
+    capacitance: float = 0.0006
+    input_voltage: float = 80
+    load_step_time: Optional[float] = 0.5
+    load_step_resistance: float = 25
+    initial_duty_cycle: float = 0.5
+
+    @classmethod
+    def from_model_parameters(cls, parameters: Dict[str, float], **kwargs) -> 'BoostPlantParams':
+        """由 ModelConfigTool 的 parameters 字典构造平均模型参数"""
+        return cls(resistance=parameters['resistance'],
+                   inductance=parameters['inductance'],
+                   capacitance=parameters['capacitance'],
+                   input_voltage=parameters['input_voltage'],
+                   **kwargs)
+
+    @classmethod
+    def from_fmu_model(cls, model) -> 'BoostPlantParams':
+        """从已实例化的 boost_converternopid FMU 读取 Vin、L、C 和负载阶跃参数，得到同一电路的平均模型"""
+        names = ['constantVoltage.V', 'inductor.L', 'capacitor.C', 'step1.offset', 'step1.height',
+                 'step1.startTime', 'const3.k']
+        v_in, inductance, capacitance, offset, height, start_time, duty_cycle = (float(x) for x in model.get(names))
+        return cls(resistance=offset,
+                   inductance=inductance,
+                   capacitance=capacitance,
+                   input_voltage=v_in,
+                   load_step_time=start_time,
+                   load_step_resistance=offset + height,
+                   initial_duty_cycle=duty_cycle)
+
+    @classmethod
+    def from_fmu(cls, fmu_path: str, fmu_pool=None) -> 'BoostPlantParams':
+        from FMUPool import get_fmu_pool
+        fmu_pool = fmu_pool or get_fmu_pool()
+        key, model = fmu_pool.acquire(fmu_path)
+        try:
+            return cls.from_fmu_model(model)
+        finally:
+            fmu_pool.release(key, model)
+
+    def resistance_at(self, t: float) -> float:
+        if self.load_step_time is not None and t >= self.load_step_time:
+            return self.load_step_resistance
+        return self.resistance
+
+class BatchBoostConverter:
+    """N 个平均模型 Boost 变换器，状态以数组保存，离散化方式与 ModelDesignAgent/boostconverter.py 相同"""
+
+    def __init__(self, plant_params: BoostPlantParams, n: int, initial_voltage: float = 0.0):
+        self.L = plant_params.inductance
+        self.C = plant_params.capacitance
+        self.V_in = plant_params.input_voltage
+        self.current = np.zeros(n)
+        self.voltage = np.full(n, float(initial_voltage))
+
+    def update(self, duty_cycle: np.ndarray, resistance: float, dt: float) -> np.ndarray:
+        off = 1 - duty_cycle
+        delta_I = (self.V_in - off * self.voltage) * dt / self.L  # 电流增量
+        delta_V = (off * self.current - self.voltage / resistance) * dt / self.C  # 电压增量
+        self.current += delta_I
+        self.voltage += delta_V
+        return self.voltage
+
+class BatchSimulationResult(BaseModel):
+    # data 形状为 (N, 4, T)，data[i] 正好是第 i 个粒子的 SimulationResult 数据块
+    data: np.ndarray
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    @property
+    def times(self) -> np.ndarray:
+        return self.data[0, 0]
+
+    @property
+    def voltages(self) -> np.ndarray:
+        return self.data[:, 1]
+
+    @property
+    def currents(self) -> np.ndarray:
+        return self.data[:, 2]
+
+    @property
+    def duty_cycles(self) -> np.ndarray:
+        return self.data[:, 3]
+
+    def __len__(self) -> int:
+        return self.data.shape[0]
+
+    def result(self, index: int) -> SimulationResult:
+        return SimulationResult(data=self.data[index])
+
+class AveragedBoostSimulationTool(BaseSimulater):
+    """平均模型 Boost 仿真，不依赖 FMU；simulate_batch 一次推进整个粒子群"""
+    supports_batch = True
+
+    def __init__(self, plant_params: Optional[BoostPlantParams] = None):
+        self.plant_params = plant_params or BoostPlantParams()
+
+    def _resistances(self, time: np.ndarray) -> np.ndarray:
+        p = self.plant_params
+        if p.load_step_time is None:
+            return np.full_like(time, p.resistance)
+        return np.where(time >= p.load_step_time, p.load_step_resistance, p.resistance)
+
+    def _control_grid(self, simulation_params: SimulationParams) -> Tuple[np.ndarray, float, float, np.ndarray]:
+        """与 BoostSimulationTool 相同的时间划分：控制器每 control_period 采样一次，期间占空比保持、
+        对象按 communication_step 推进若干步。返回控制时刻、控制周期、对象步长和 (T, 每周期对象步数) 的负载电阻；
+        默认三者都由 step_size 决定，与单一步长时完全相同"""
+        control_period = simulation_params.get_control_period()
+        substeps = simulation_params.communication_steps_per_control()
+        plant_step = control_period / substeps
+        time = simulation_params.control_times()
+        resistance = self._resistances(time[:, None] + plant_step * np.arange(substeps))
+        return time, control_period, plant_step, resistance
+
+    def simulate(self, fmu_path: str, simulation_params: SimulationParams,
+                 controller: BaseController, score_bound=None) -> SimulationResult:
+        # fmu_path 仅为兼容 BaseSimulater 接口，平均模型不使用
+        control_times, control_period, dt, resistance = self._control_grid(simulation_params)
+        record_every = simulation_params.record_every
+        time = self.record_times(simulation_params)
+        result = SimulationResult.empty(len(time))
+        result.times[:] = time
+        voltage = result.voltages
+        current = result.currents
+        duty_cycle = result.duty_cycles
+
+        L = self.plant_params.inductance
+        C = self.plant_params.capacitance
+        V_in = self.plant_params.input_voltage
+        i_L = 0.0
+        v_C = float(simulation_params.initial_voltage)
+        d = self.plant_params.initial_duty_cycle
+        checked = 0
+
+        for k in range(len(control_times)):
+            for R in resistance[k]:
+                delta_I = (V_in - (1 - d) * v_C) * dt / L
+                delta_V = ((1 - d) * i_L - v_C / R) * dt / C
+                i_L += delta_I
+                v_C += delta_V
+
+            d = controller.update(simulation_params.target_voltage, v_C, i_L, control_period)
+
+            if k % record_every:
+                continue
+            r = k // record_every
+            voltage[r] = v_C
+            current[r] = i_L
+            duty_cycle[r] = d
+
+            if score_bound is not None and (r + 1) % self.abort_check_interval == 0:
+                if score_bound.update(time[checked:r + 1], voltage[checked:r + 1]):
+                    return result.truncated(r + 1)
+                checked = r + 1
+
+        return result
+
+    def simulate_batch(self, param_matrix: np.ndarray, control_params: ControlParams,
+                       simulation_params: SimulationParams,
+                       param_names: Sequence[str] = DEFAULT_PARAM_NAMES) -> BatchSimulationResult:
+        """param_matrix 为 (N, n_params)，每行是一个粒子；多余的列按 objective_function 的约定忽略"""
+        controller = DualLoopPIDBank.from_matrix(param_matrix, control_params, param_names)
+        n = len(controller)
+        control_times, control_period, dt, resistance = self._control_grid(simulation_params)
+        record_every = simulation_params.record_every
+        time = self.record_times(simulation_params)
+
+        plant = BatchBoostConverter(self.plant_params, n, simulation_params.initial_voltage)
+        # 按时间行存储，每步写入连续内存，结束后一次性转置为 (N, 4, T)
+        trajectory = np.empty((len(time), 3, n))
+        d = np.full(n, self.plant_params.initial_duty_cycle)
+
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            for k in range(len(control_times)):
+                for R in resistance[k]:
+                    plant.update(d, R, dt)
+                d = controller.update(simulation_params.target_voltage, plant.voltage, plant.current, control_period)
+                if k % record_every:
+                    continue
+                r = k // record_every
+                trajectory[r, 0] = plant.voltage
+                trajectory[r, 1] = plant.current
+                trajectory[r, 2] = d
+
+        data = np.empty((n, 4, len(time)))
+        data[:, 0] = time
+        data[:, 1:] = trajectory.transpose(2, 1, 0)
+        return BatchSimulationResult(data=data)
+
+    def evaluate_batch(self, param_matrix: np.ndarray, control_params: ControlParams,
+                       simulation_params: SimulationParams, evaluater_tool,
+                       param_names: Sequence[str] = DEFAULT_PARAM_NAMES) -> Tuple[np.ndarray, List[Dict[str, float]]]:
+        batch_result = self.simulate_batch(param_matrix, control_params, simulation_params, param_names)
+        scores = np.empty(len(batch_result))
+        details = []
+        for i in range(len(batch_result)):
+            scores[i], d = evaluater_tool.evaluate(batch_result.result(i))
+            details.append(d)
+        return scores, details
+
+if __name__ == "__main__":
+    from EvaluateTool import EvaluateParams, EvaluateFactory
+
+    simulation_params = SimulationParams(
+        simulation_time=1.0,
+        target_voltage=160,
+        initial_voltage=80,
+        step_size=0.0001
+    )
+
+    control_params = ControlParams(control_params={
+        'voltage_k': 1.0, 'voltage_Ti': 0.1, 'voltage_Td': 0, 'voltage_y_max': 800, 'voltage_y_min': 0.0,
+        'current_k': 1.0, 'current_Ti': 0.1, 'current_Td': 0, 'current_y_max': 1, 'current_y_min': 0.0
+    })
+
+    evaluate_params = EvaluateParams(
+        target_voltage=160,
+        settling_time_coefficient=1.0,
+        overshoot_coefficient=1.0,
+        integrated_error_coefficient=1.0,
+        post_settling_time_coefficient=1.0,
+        post_overshoot_coefficient=1.0,
+        post_integrated_error_coefficient=1.0
+    )
+    evaluater_tool = EvaluateFactory.create_evaluater("duallooppid", evaluate_params)
+
+    # 10 个粒子一次仿真
+    param_matrix = np.random.rand(10, 4) * 10
+    simulation_tool = AveragedBoostSimulationTool()
+    scores, details = simulation_tool.evaluate_batch(param_matrix, control_params, simulation_params, evaluater_tool)
+    for params, score in zip(param_matrix, scores):
+        print(f"params={params}, Score={score:.4f}")
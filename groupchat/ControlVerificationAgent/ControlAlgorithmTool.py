@@ -1,97 +1,12 @@
 # ControlAlgorithmTool.py
 
-from abc import ABC, abstractmethod
 from typing import Dict
-from pydantic import BaseModel, Field, validator
-import sys
-import inspect
-
-class ControlParams(BaseModel):
-    control_params: Dict[str, float] = Field(..., description="Control parameters")
-
-    class Config:
-        extra = "forbid"
-
-    @validator('control_params')
-    def check_params(cls, v):
-        required_prefixes = {'voltage_', 'current_'}
-        required_suffixes = {'k', 'Ti', 'Td', 'y_max', 'y_min'}
-        
-        for prefix in required_prefixes:
-            for suffix in required_suffixes:
-                param = f"{prefix}{suffix}"
-                if param not in v:
-                    raise ValueError(f"Missing required parameter: {param}")
-        return v
-
-class ControllerFactory:
-    @staticmethod
-    def create_controller(controller_name: str, params: ControlParams) -> 'BaseController':
-        if controller_name.lower() == "pid":
-            return PIDController(params)
-        if controller_name.lower() == "duallooppid":
-            return DualLoopPIDController(params)
-        else:
-            raise ValueError(f"Unknown controller type: {controller_name}")
-
-class BaseController(ABC):
-    @abstractmethod
-    def update(self, error: float, dt: float) -> float:
-        pass
-
-    @abstractmethod
-    def reset(self):
-        pass
-
-class PIDController(BaseController):
-    def __init__(self, params: Dict[str, float]):
-        self.k = params['k']
-        self.Ti = params['Ti']
-        self.Td = params['Td']
-        self.y_max = params['y_max']
-        self.y_min = params['y_min']
-        self.xi = 0
-        self.last_error = 0
-        self.y = 0
-
-    def update(self, error: float, dt: float) -> float:
-        self.xi += error * dt
-        derivative = (error - self.last_error) / dt if dt > 0 else 0
-        self.y = self.k * (error + self.xi / self.Ti + self.Td * derivative)
-        self.y = max(min(self.y, self.y_max), self.y_min)
-        self.last_error = error
-        return self.y
-
-    def reset(self):
-        self.xi = 0
-        self.last_error = 0
-        self.y = 0
-
-class DualLoopPIDController(BaseController):
-    def __init__(self, params: ControlParams):
-        voltage_params = {k[8:]: v for k, v in params.control_params.items() if k.startswith('voltage_')}
-        current_params = {k[8:]: v for k, v in params.control_params.items() if k.startswith('current_')}
-        self.voltage_controller = PIDController(voltage_params)  # 外环：电压控制
-        self.current_controller = PIDController(current_params)  # 内环：电流控制
-
-    def update(self, target_voltage: float, actual_voltage: float, actual_current: float, dt: float) -> float:
-        # 外环：电压控制
-        voltage_error = target_voltage - actual_voltage
-        current_reference = self.voltage_controller.update(voltage_error, dt)
-        
-        # 内环：电流控制
-        current_error = current_reference - actual_current
-        duty_cycle = self.current_controller.update(current_error, dt)
-        
-        return duty_cycle
-
-    def reset(self):
-        self.voltage_controller.reset()
-        self.current_controller.reset()
+from ControlTool import ControlParams, ControllerFactory, DualLoopPIDController, available_controllers, \
+    get_controller_info
 
 class ControllerAlgorithmTool:
     def find_algorithm(self, requirements):
-        # 动态搜索当前模块中的所有类
+        # 从控制器注册表查询可用的控制器
         available_controllers = self._get_available_controllers()
         
         model = requirements.get('model', '')
@@ -102,16 +17,22 @@ class ControllerAlgorithmTool:
             return f"Based on the selected model ({model}), control objectives ({objectives}), and constraints ({constraints}), the Dual Loop PID controller has been chosen and configured successfully."
         return "No suitable control algorithm found based on the given requirements."
 
+    def build_controller(self, structure: Dict):
+        """把提出的控制结构（格式见 StateSpaceController.DualLoopStateSpaceParams.from_spec）编译为
+        通用状态空间控制器，新结构不需要新增控制器类"""
+        params = get_controller_info('statespace').params_model.from_spec(structure)
+        return ControllerFactory.create_controller('statespace', params)
+
     def _get_available_controllers(self):
-        # 获取当前模块中定义的所有类
-        current_module = sys.modules[__name__]
-        classes = inspect.getmembers(current_module, inspect.isclass)
-        
-        # 筛选出控制器类（假设所有控制器类都继承自BaseController）
-        controller_classes = {name: cls for name, cls in classes 
-                              if inspect.isclass(cls) and issubclass(cls, BaseController) and cls != BaseController}
-        
-        return controller_classes
+        # 控制器类名 -> 类，来自 ControlTool 的控制器注册表（含插件）
+        return {info.cls.__name__: info.cls for info in available_controllers().values()}
+
+    def controller_catalog(self) -> Dict[str, Dict]:
+        """注册表中各控制器的元数据：参数模式、默认搜索范围、是否支持批量仿真、编译内核"""
+        return {name: {'class': info.cls.__name__, 'description': info.description,
+                       'param_names': list(info.param_names), 'bounds': dict(info.bounds),
+                       'batch_capable': info.batch_capable, 'kernel': info.kernel}
+                for name, info in available_controllers().items()}
 
 # 创建工具实例
 controller_algorithm_tool = ControllerAlgorithmTool()
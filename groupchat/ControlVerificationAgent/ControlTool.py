@@ -1,7 +1,14 @@
+import importlib
+import warnings
 from abc import ABC, abstractmethod
-from typing import Dict
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+import numpy as np
 from pydantic import BaseModel, Field, validator
 
+# 双环控制器的参数名（ControlParams.control_params 的键），DualLoopPIDController.from_vector 和 DualLoopPIDBank.gains 按此顺序
+PID_PARAM_NAMES = ('k', 'Ti', 'Td', 'y_max', 'y_min')
+DUAL_LOOP_PARAM_NAMES = tuple(f'{loop}_{name}' for loop in ('voltage', 'current') for name in PID_PARAM_NAMES)
+
 class ControlParams(BaseModel):
     control_params: Dict[str, float] = Field(..., description="Control parameters")
 
@@ -20,17 +27,105 @@ class ControlParams(BaseModel):
                     raise ValueError(f"Missing required parameter: {param}")
         return v
 
+class ControllerInfo(NamedTuple):
+    """控制器注册表中的一项，供 ControllerFactory、控制算法智能体和优化器查询"""
+    name: str
+    cls: type
+    params_model: Optional[type] = None  # 构造参数的 pydantic 模型
+    param_names: Tuple[str, ...] = ()  # 参数名（参数模式）
+    bounds: Tuple[Tuple[str, Tuple[float, float]], ...] = ()  # (可整定参数, 默认搜索范围)，顺序即优化器粒子的维度顺序
+    batch: Optional[type] = None  # 同时推进 N 个控制器的批量实现
+    kernel: Optional[str] = None  # boost-averaged-jit 中对应的编译内核，None 表示只有 Python 实现
+    description: str = ''
+
+    @property
+    def tuned_params(self) -> Tuple[str, ...]:
+        return tuple(name for name, _ in self.bounds)
+
+    @property
+    def batch_capable(self) -> bool:
+        return self.batch is not None
+
+# 第三方控制器通过该组的入口点注册，入口点可以指向模块（导入时由 register_controller 注册）或控制器类
+ENTRY_POINT_GROUP = 'pecontrolagent.controllers'
+# 仓库内按需导入的控制器模块，避免在 ControlTool 中循环导入
+_BUILTIN_PLUGINS = ('StateSpaceController',)
+
+_CONTROLLERS: Dict[str, ControllerInfo] = {}
+_plugins_loaded = False
+
+def register_controller(name: str, params_model: Optional[type] = None, param_names: Sequence[str] = (),
+                        bounds: Sequence[Tuple[str, Tuple[float, float]]] = (), kernel: Optional[str] = None,
+                        description: str = '') -> Callable[[type], type]:
+    """类装饰器：以 name（不区分大小写）注册控制器"""
+    def decorator(cls: type) -> type:
+        key = name.lower()
+        if key in _CONTROLLERS and _CONTROLLERS[key].cls is not cls:
+            raise ValueError(f"Controller {name} is already registered by {_CONTROLLERS[key].cls.__name__}")
+        frozen_bounds = tuple((param, (float(low), float(high))) for param, (low, high) in bounds)
+        _CONTROLLERS[key] = ControllerInfo(key, cls, params_model, tuple(param_names), frozen_bounds,
+                                           None, kernel, description or (cls.__doc__ or '').strip())
+        return cls
+    return decorator
+
+def register_batch(name: str) -> Callable[[type], type]:
+    """类装饰器：把批量实现登记到已注册的控制器 name"""
+    def decorator(cls: type) -> type:
+        key = name.lower()
+        _CONTROLLERS[key] = _CONTROLLERS[key]._replace(batch=cls)
+        return cls
+    return decorator
+
+def _entry_points():
+    from importlib.metadata import entry_points
+    eps = entry_points()
+    # Python 3.10+ 为 EntryPoints.select，3.9 为按组名索引的字典
+    return eps.select(group=ENTRY_POINT_GROUP) if hasattr(eps, 'select') else eps.get(ENTRY_POINT_GROUP, ())
+
+def _load_plugins():
+    """第一次查不到控制器时导入内置模块和入口点插件，之后不再扫描"""
+    global _plugins_loaded
+    if _plugins_loaded:
+        return
+    _plugins_loaded = True
+    for module in _BUILTIN_PLUGINS:
+        importlib.import_module(module)
+    for entry_point in _entry_points():
+        try:
+            loaded = entry_point.load()
+        except Exception as e:
+            warnings.warn(f"Failed to load controller plugin {entry_point.name}: {e}")
+            continue
+        # 入口点直接指向未注册的控制器类时以入口点名称注册
+        if isinstance(loaded, type) and issubclass(loaded, BaseController) and \
+                not any(info.cls is loaded for info in _CONTROLLERS.values()):
+            register_controller(entry_point.name)(loaded)
+
+def get_controller_info(controller_name: str) -> ControllerInfo:
+    key = controller_name.lower()
+    info = _CONTROLLERS.get(key)
+    if info is None:
+        _load_plugins()
+        info = _CONTROLLERS.get(key)
+    if info is None:
+        raise ValueError(f"Unknown controller type: {controller_name}")
+    return info
+
+def available_controllers() -> Dict[str, ControllerInfo]:
+    """名称 -> ControllerInfo，包括插件"""
+    _load_plugins()
+    return dict(_CONTROLLERS)
+
 class ControllerFactory:
     @staticmethod
     def create_controller(controller_name: str, params: ControlParams) -> 'BaseController':
-        if controller_name.lower() == "pid":
-            return PIDController(params)
-        if controller_name.lower() == "duallooppid":
-            return DualLoopPIDController(params)
-        else:
-            raise ValueError(f"Unknown controller type: {controller_name}")
+        # params 的类型见 get_controller_info(controller_name).params_model
+        return get_controller_info(controller_name).cls(params)
 
 class BaseController(ABC):
+    # 子类可以声明 __slots__ 省去实例字典；没有声明的子类照常使用 __dict__
+    __slots__ = ()
+
     @abstractmethod
     def update(self, error: float, dt: float) -> float:
         pass
@@ -39,13 +134,34 @@ class BaseController(ABC):
     def reset(self):
         pass
 
+    def get_state(self) -> Dict:
+        """内部状态（积分、上次误差、输出），不含增益；用于从 FMU 快照分支时把控制器状态交给候选控制器"""
+        raise NotImplementedError(f"{type(self).__name__} does not support state transfer")
+
+    def set_state(self, state: Dict):
+        raise NotImplementedError(f"{type(self).__name__} does not support state transfer")
+
+@register_controller('pid', params_model=dict, param_names=PID_PARAM_NAMES,
+                     bounds=(('k', (0.001, 10)), ('Ti', (0.001, 10))), description="Single-loop PID controller")
 class PIDController(BaseController):
+    __slots__ = PID_PARAM_NAMES + ('xi', 'last_error', 'y')
+
     def __init__(self, params: Dict[str, float]):
-        self.k = params['k']
-        self.Ti = params['Ti']
-        self.Td = params['Td']
-        self.y_max = params['y_max']
-        self.y_min = params['y_min']
+        self._initialize(params['k'], params['Ti'], params['Td'], params['y_max'], params['y_min'])
+
+    @classmethod
+    def from_values(cls, k: float, Ti: float, Td: float, y_max: float, y_min: float) -> 'PIDController':
+        """不经过参数字典直接构造"""
+        controller = cls.__new__(cls)
+        controller._initialize(k, Ti, Td, y_max, y_min)
+        return controller
+
+    def _initialize(self, k: float, Ti: float, Td: float, y_max: float, y_min: float):
+        self.k = k
+        self.Ti = Ti
+        self.Td = Td
+        self.y_max = y_max
+        self.y_min = y_min
         self.xi = 0
         self.last_error = 0
         self.y = 0
@@ -63,13 +179,36 @@ class PIDController(BaseController):
         self.last_error = 0
         self.y = 0
 
+    def get_state(self) -> Dict[str, float]:
+        return {'xi': self.xi, 'last_error': self.last_error, 'y': self.y}
+
+    def set_state(self, state: Dict[str, float]):
+        self.xi = state['xi']
+        self.last_error = state['last_error']
+        self.y = state['y']
+
+@register_controller('duallooppid', params_model=ControlParams, param_names=DUAL_LOOP_PARAM_NAMES,
+                     bounds=(('voltage_k', (0.001, 10)), ('voltage_Ti', (0.001, 10)),
+                             ('current_k', (0.001, 10)), ('current_Ti', (0.001, 10))),
+                     kernel='JITSimulationTool._closed_loop_kernel',
+                     description="Dual-loop PID: outer voltage loop, inner current loop")
 class DualLoopPIDController(BaseController):
+    __slots__ = ('voltage_controller', 'current_controller')
+
     def __init__(self, params: ControlParams):
         voltage_params = {k[8:]: v for k, v in params.control_params.items() if k.startswith('voltage_')}
         current_params = {k[8:]: v for k, v in params.control_params.items() if k.startswith('current_')}
         self.voltage_controller = PIDController(voltage_params)  # 外环：电压控制
         self.current_controller = PIDController(current_params)  # 内环：电流控制
 
+    @classmethod
+    def from_vector(cls, values: Sequence[float]) -> 'DualLoopPIDController':
+        """values 按 DUAL_LOOP_PARAM_NAMES 排列，通常来自 ControlParamLayout"""
+        controller = cls.__new__(cls)
+        controller.voltage_controller = PIDController.from_values(*values[:5])
+        controller.current_controller = PIDController.from_values(*values[5:10])
+        return controller
+
     def update(self, target_voltage: float, actual_voltage: float, actual_current: float, dt: float) -> float:
         # 外环：电压控制
         voltage_error = target_voltage - actual_voltage
@@ -85,6 +224,148 @@ class DualLoopPIDController(BaseController):
         self.voltage_controller.reset()
         self.current_controller.reset()
 
+    def get_state(self) -> Dict[str, Dict[str, float]]:
+        return {'voltage': self.voltage_controller.get_state(), 'current': self.current_controller.get_state()}
+
+    def set_state(self, state: Dict[str, Dict[str, float]]):
+        self.voltage_controller.set_state(state['voltage'])
+        self.current_controller.set_state(state['current'])
+
+class ControlParamLayout:
+    """ControlParams 只在 API 边界校验一次，编译为按 DUAL_LOOP_PARAM_NAMES 排列的参数向量；
+    param_names 中的参数（如 PSO 粒子的各维）由浮点数组按固定下标覆盖，之后构造控制器不再经过 pydantic"""
+    __slots__ = ('param_names', 'base', 'indices')
+
+    def __init__(self, control_params: ControlParams, param_names: Sequence[str] = ()):
+        unknown = [name for name in param_names if name not in DUAL_LOOP_PARAM_NAMES]
+        if unknown:
+            raise ValueError(f"Unknown control parameters: {', '.join(unknown)}")
+        self.param_names = tuple(param_names)
+        self.base = [control_params.control_params[name] for name in DUAL_LOOP_PARAM_NAMES]
+        self.indices = [DUAL_LOOP_PARAM_NAMES.index(name) for name in self.param_names]
+
+    def values(self, params: Sequence[float]) -> List[float]:
+        """params 多于 param_names 的部分忽略"""
+        values = list(self.base)
+        for index, value in zip(self.indices, params):
+            values[index] = float(value)
+        return values
+
+    def controller(self, params: Sequence[float]) -> DualLoopPIDController:
+        return DualLoopPIDController.from_vector(self.values(params))
+
+    def control_params(self, params: Sequence[float]) -> ControlParams:
+        """需要返回给调用方时再构造经过校验的 ControlParams"""
+        return ControlParams(control_params=dict(zip(DUAL_LOOP_PARAM_NAMES, self.values(params))))
+
+@register_batch('pid')
+class PIDBank:
+    """N 个 PIDController，增益、限幅和状态都是长度 N 的数组，update 一次推进所有通道；
+    运算顺序与 PIDController.update 相同，逐通道结果完全一致"""
+
+    def __init__(self, k, Ti, Td, y_max, y_min):
+        arrays = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (k, Ti, Td, y_max, y_min)))
+        self.k, self.Ti, self.Td, self.y_max, self.y_min = (np.atleast_1d(x).copy() for x in arrays)
+        n = len(self.k)
+        self.xi = np.zeros(n)
+        self.last_error = np.zeros(n)
+        self.y = np.zeros(n)
+
+    @classmethod
+    def from_params(cls, params: Sequence[Dict[str, float]]) -> 'PIDBank':
+        """params 中每个字典与 PIDController 的参数相同"""
+        return cls(*([p[name] for p in params] for name in PID_PARAM_NAMES))
+
+    def __len__(self) -> int:
+        return len(self.k)
+
+    def update(self, error: np.ndarray, dt: float) -> np.ndarray:
+        self.xi += error * dt
+        derivative = (error - self.last_error) / dt if dt > 0 else 0
+        y = self.k * (error + self.xi / self.Ti + self.Td * derivative)
+        np.minimum(y, self.y_max, out=y)
+        np.maximum(y, self.y_min, out=y)
+        self.last_error[:] = error
+        self.y = y
+        return y
+
+    def reset(self):
+        # y 重新分配，不改写上一次 update 返回给调用方的数组
+        self.xi[:] = 0
+        self.last_error[:] = 0
+        self.y = np.zeros(len(self))
+
+    def get_state(self) -> Dict[str, np.ndarray]:
+        return {'xi': self.xi.copy(), 'last_error': self.last_error.copy(), 'y': self.y.copy()}
+
+    def set_state(self, state: Dict[str, Union[float, np.ndarray]]):
+        """state 可以是 get_state() 的结果，也可以是 PIDController.get_state() 的标量（广播到所有通道）"""
+        self.xi[:] = state['xi']
+        self.last_error[:] = state['last_error']
+        self.y = np.zeros(len(self))
+        self.y[:] = state['y']
+
+@register_batch('duallooppid')
+class DualLoopPIDBank:
+    """N 个 DualLoopPIDController：外环电压、内环电流各一个 PIDBank"""
+
+    def __init__(self, voltage_controller: PIDBank, current_controller: PIDBank):
+        if len(voltage_controller) != len(current_controller):
+            raise ValueError("Voltage and current banks must have the same size")
+        self.voltage_controller = voltage_controller  # 外环：电压控制
+        self.current_controller = current_controller  # 内环：电流控制
+
+    @classmethod
+    def from_gains(cls, gains: Dict[str, np.ndarray]) -> 'DualLoopPIDBank':
+        """gains 的键与 ControlParams.control_params 相同，值为标量或长度 N 的数组"""
+        return cls(PIDBank(*(gains['voltage_' + name] for name in PID_PARAM_NAMES)),
+                   PIDBank(*(gains['current_' + name] for name in PID_PARAM_NAMES)))
+
+    @classmethod
+    def from_control_params(cls, params: Sequence[ControlParams]) -> 'DualLoopPIDBank':
+        return cls.from_gains({name: [p.control_params[name] for p in params] for name in DUAL_LOOP_PARAM_NAMES})
+
+    @classmethod
+    def from_matrix(cls, param_matrix: np.ndarray, control_params: ControlParams,
+                    param_names: Sequence[str]) -> 'DualLoopPIDBank':
+        """param_matrix 为 (N, len(param_names))，每行覆盖 control_params 中的对应参数（如 PSO 粒子）"""
+        param_matrix = np.atleast_2d(np.asarray(param_matrix, dtype=float))
+        gains = {name: np.full(param_matrix.shape[0], float(control_params.control_params[name]))
+                 for name in DUAL_LOOP_PARAM_NAMES}
+        for column, name in enumerate(param_names):
+            gains[name] = param_matrix[:, column]
+        return cls.from_gains(gains)
+
+    @property
+    def gains(self) -> Dict[str, np.ndarray]:
+        return {f'{loop}_{name}': getattr(bank, name)
+                for loop, bank in (('voltage', self.voltage_controller), ('current', self.current_controller))
+                for name in PID_PARAM_NAMES}
+
+    def __len__(self) -> int:
+        return len(self.voltage_controller)
+
+    def update(self, target_voltage: Union[float, np.ndarray], actual_voltage: np.ndarray,
+               actual_current: np.ndarray, dt: float) -> np.ndarray:
+        # 外环：电压控制
+        voltage_error = target_voltage - actual_voltage
+        current_reference = self.voltage_controller.update(voltage_error, dt)
+
+        # 内环：电流控制
+        current_error = current_reference - actual_current
+        return self.current_controller.update(current_error, dt)
+
+    def reset(self):
+        self.voltage_controller.reset()
+        self.current_controller.reset()
+
+    def get_state(self) -> Dict[str, Dict[str, np.ndarray]]:
+        return {'voltage': self.voltage_controller.get_state(), 'current': self.current_controller.get_state()}
+
+    def set_state(self, state: Dict[str, Dict[str, Union[float, np.ndarray]]]):
+        self.voltage_controller.set_state(state['voltage'])
+        self.current_controller.set_state(state['current'])
+
 # 测试代码
 if __name__ == "__main__":
     # 创建控制器参数
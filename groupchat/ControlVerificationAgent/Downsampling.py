@@ -0,0 +1,108 @@
+"""绘图用的包络抽稀：每个时间桶内保留各信号最小值和最大值所在的采样点。
+
+与等间隔抽样不同，开关纹波的峰谷不会被漏掉；输入输出都是 SimulationResult.data 形状的 (4, n) 数组，
+第 0 行为时间，其余各行为信号。
+"""
+from typing import List, Optional
+import numpy as np
+
+# 画在一张几百到一千多像素宽的图上，几千个点已经足够
+DEFAULT_PLOT_POINTS = 4000
+
+def _points_per_bucket(n_signals: int) -> int:
+    return 2 * n_signals
+
+def bucket_size(n_samples: int, max_points: int, n_signals: int = 3) -> int:
+    """使输出点数（含首尾两点）不超过 max_points 的桶宽；不需要抽稀时返回 1"""
+    if n_samples <= max_points:
+        return 1
+    buckets = (max_points - 2) // _points_per_bucket(n_signals)
+    if buckets < 1:
+        raise ValueError(f"max_points must be at least {_points_per_bucket(n_signals) + 2}, got {max_points}")
+    return -(-n_samples // buckets)
+
+def _bucket_extrema(data: np.ndarray, size: int) -> np.ndarray:
+    """data 的列数是 size 的整数倍，返回各桶内所有信号极值点的列下标，按时间排序且不重复"""
+    m = data.shape[1] // size
+    signals = data[1:].reshape(data.shape[0] - 1, m, size)
+    # NaN 所在的点会被 argmin/argmax 选中，发散的轨迹在图上依然可见
+    index = np.sort(np.concatenate([signals.argmin(axis=2), signals.argmax(axis=2)]).T, axis=1)
+    keep = np.ones(index.shape, dtype=bool)
+    keep[:, 1:] = index[:, 1:] != index[:, :-1]
+    return (index + np.arange(m)[:, None] * size)[keep]
+
+def envelope_indices(data: np.ndarray, max_points: int = DEFAULT_PLOT_POINTS) -> np.ndarray:
+    n = data.shape[1]
+    size = bucket_size(n, max_points, data.shape[0] - 1)
+    if size == 1:
+        return np.arange(n)
+    full = n // size * size
+    index = [np.zeros(1, dtype=np.intp), _bucket_extrema(data[:, :full], size)]
+    if full < n:
+        index.append(full + _bucket_extrema(data[:, full:], n - full))
+    index.append(np.full(1, n - 1, dtype=np.intp))
+    return np.unique(np.concatenate(index))
+
+def envelope(data: np.ndarray, max_points: int = DEFAULT_PLOT_POINTS) -> np.ndarray:
+    return data[:, envelope_indices(data, max_points)]
+
+class EnvelopeRecorder:
+    """在仿真过程中逐块接收采样并即时抽稀，只保留已完成桶的极值点和当前未满的一个桶，
+    结果与对完整轨迹调用 envelope() 相同。keep_full=True 时另外保存完整分辨率的数据"""
+
+    def __init__(self, n_samples: int, max_points: int = DEFAULT_PLOT_POINTS, n_rows: int = 4,
+                 keep_full: bool = False):
+        self.n_samples = n_samples
+        self.bucket_size = bucket_size(n_samples, max_points, n_rows - 1)
+        self._pieces: List[np.ndarray] = []
+        self._pending = np.empty((n_rows, 0))
+        self._first = None
+        self._last = None
+        self.received = 0
+        self._full = np.empty((n_rows, n_samples)) if keep_full else None
+
+    def update(self, data: np.ndarray):
+        n = data.shape[1]
+        if not n:
+            return
+        if self._full is not None:
+            self._full[:, self.received:self.received + n] = data
+        if self._first is None:
+            self._first = data[:, :1].copy()
+        self._last = data[:, -1:].copy()
+        self.received += n
+
+        size = self.bucket_size
+        if size == 1:
+            self._pieces.append(data.copy())
+            return
+        block = np.concatenate([self._pending, data], axis=1) if self._pending.shape[1] else data
+        full = block.shape[1] // size * size
+        if full:
+            self._pieces.append(block[:, _bucket_extrema(block[:, :full], size)])
+        # 数据块可能是仿真工具复用的缓冲区，未满的桶需要复制
+        self._pending = block[:, full:].copy()
+
+    def result(self) -> np.ndarray:
+        """到目前为止接收的采样的包络"""
+        if self._first is None:
+            return self._pending[:, :0]
+        pieces = list(self._pieces)
+        if self._pending.shape[1]:
+            pending = self._pending
+            pieces.append(pending[:, _bucket_extrema(pending, pending.shape[1])])
+        data = np.concatenate(pieces, axis=1)
+        if self.bucket_size == 1:
+            return data
+        # 首尾两点保证横轴范围完整；与桶内极值重合时不重复
+        if data[0, 0] != self._first[0, 0]:
+            data = np.concatenate([self._first, data], axis=1)
+        if data[0, -1] != self._last[0, 0]:
+            data = np.concatenate([data, self._last], axis=1)
+        return data
+
+    def full(self) -> Optional[np.ndarray]:
+        """keep_full=True 时返回已接收的完整数据"""
+        if self._full is None:
+            return None
+        return self._full[:, :self.received]
@@ -1,6 +1,8 @@
-from typing import Type, Dict
+import numpy as np
+from typing import Dict
 from pydantic import BaseModel
 from SimulationTool import SimulationResult
+from Profiler import timed_phase
 
 class EvaluateParams(BaseModel):
     target_voltage: float
@@ -24,71 +26,249 @@ class EvaluateFactory(BaseEvaluater):
     def create_evaluater(name: str, params: EvaluateParams):
         if name.lower() == "duallooppid":
             return DualLoopPIDEvaluater(params)
+        elif name.lower() == "duallooppid-post":
+            return DualLoopPIDEvaluater(params, post_switch_only=True)
         else:
             raise ValueError(f"Unknown Evaluate method: {name}")
 
+def _weighted_score(params: EvaluateParams, details: Dict[str, float]) -> float:
+    # 各项相加的顺序与 DualLoopPIDEvaluater.evaluate 历来的写法相同，保证结果逐位一致
+    return details['settling_time'] * params.settling_time_coefficient \
+           + details['post_settling_time'] * params.post_settling_time_coefficient \
+           + details['overshoot'] * params.overshoot_coefficient \
+           + details['post_overshoot'] * params.post_overshoot_coefficient \
+           + details['integrated_error'] * params.integrated_error_coefficient \
+           + details['post_integrated_error'] * params.post_integrated_error_coefficient
+
+class _RunningSegment:
+    """按数据块累计单个区段的指标，内存占用与采样数无关；dt 取区段前两个采样点之差，与 DualLoopPIDEvaluater 一致"""
+
+    def __init__(self, target_voltage: float, offset: float):
+        self.target_voltage = target_voltage
+        self.offset = offset
+        self.settling_time = 0
+        self.settled = False
+        self.overshoot = 0.0
+        self.integrated_error = 0.0
+        # 最后一个处于 2% 误差带外的采样时刻（此后一直在带内），从未出带为 None
+        self.last_exit_time = None
+        self.undershoot = 0.0
+        self.max_voltage = None
+        self.min_voltage = None
+        self.final_voltage = None
+        self.samples = 0
+        self.dt = None
+        self._head = []
+        self._pending = np.empty(0)
+
+    def update(self, times: np.ndarray, voltages: np.ndarray):
+        if not len(times):
+            return
+        times = times - self.offset
+        target_voltage = self.target_voltage
+        relative_error = (voltages - target_voltage) / target_voltage
+        abs_error = np.abs(voltages - target_voltage) / target_voltage
+
+        in_band = abs_error <= 0.02
+        if not self.settled and in_band.any():
+            self.settling_time = float(times[np.argmax(in_band)])
+            self.settled = True
+        if not in_band.all():
+            self.last_exit_time = float(times[len(in_band) - 1 - np.argmin(in_band[::-1])])
+
+        self.overshoot = max(self.overshoot, float(np.fmax.reduce(relative_error, initial=0)))
+        self.undershoot = max(self.undershoot, float(np.fmax.reduce(-relative_error, initial=0)))
+        chunk_max = float(np.fmax.reduce(voltages))
+        chunk_min = float(np.fmin.reduce(voltages))
+        self.max_voltage = chunk_max if self.max_voltage is None else max(self.max_voltage, chunk_max)
+        self.min_voltage = chunk_min if self.min_voltage is None else min(self.min_voltage, chunk_min)
+        self.final_voltage = float(voltages[-1])
+        self.samples += len(times)
+
+        if self.dt is None:
+            self._head.extend(times[:2 - len(self._head)].tolist())
+            if len(self._head) < 2:
+                self._pending = np.concatenate([self._pending, abs_error])
+                return
+            self.dt = self._head[1] - self._head[0]
+            abs_error = np.concatenate([self._pending, abs_error])
+        # 把上一块的累计值放在最前面一起 cumsum，保持逐点顺序累加
+        self.integrated_error = float(np.cumsum(np.concatenate(([self.integrated_error], abs_error * self.dt)))[-1])
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            'samples': self.samples,
+            'settling_time': self.settling_time,
+            'last_exit_time': self.last_exit_time,
+            'overshoot': self.overshoot,
+            'undershoot': self.undershoot,
+            'integrated_error': self.integrated_error,
+            'max_voltage': self.max_voltage,
+            'min_voltage': self.min_voltage,
+            'final_voltage': self.final_voltage
+        }
+
+class OnlineEvaluation:
+    """DualLoopPIDEvaluater 的增量版本：逐点或逐块输入采样，O(1) 内存，finalize() 得到与 evaluate() 相同的结果。
+
+    与 simulate_iter 配合使用时整个优化过程都不需要保存轨迹。
+    """
+
+    def __init__(self, params: EvaluateParams, load_switch_time: float, post_switch_only: bool = False):
+        self.params = params
+        self.load_switch_time = load_switch_time
+        self.post_switch_only = post_switch_only
+        self.pre = _RunningSegment(params.target_voltage, 0.0)
+        self.post = _RunningSegment(params.target_voltage, load_switch_time)
+        # calculate_performance_metrics 所需的全程统计
+        self._peak_voltage = None
+        self._first_entry_time = None
+
+    def update(self, times: np.ndarray, voltages: np.ndarray):
+        """输入新的一块采样（times 递增），单个采样可传入长度为 1 的数组"""
+        times = np.asarray(times, dtype=float)
+        voltages = np.asarray(voltages, dtype=float)
+        if not len(times):
+            return
+        split = int(np.searchsorted(times, self.load_switch_time))
+        if not self.post_switch_only:
+            self.pre.update(times[:split], voltages[:split])
+        self.post.update(times[split:], voltages[split:])
+
+        # 与 voltage.max() 一样传播 NaN
+        chunk_max = voltages.max()
+        self._peak_voltage = chunk_max if self._peak_voltage is None else np.maximum(self._peak_voltage, chunk_max)
+        if self._first_entry_time is None:
+            target_voltage = self.params.target_voltage
+            entered = np.abs(voltages - target_voltage) / target_voltage < 0.02
+            if entered.any():
+                self._first_entry_time = times[np.argmax(entered)]
+
+    def details(self) -> Dict[str, float]:
+        return {
+            'settling_time': self.pre.settling_time,
+            'overshoot': self.pre.overshoot,
+            'integrated_error': self.pre.integrated_error,
+            'post_settling_time': self.post.settling_time,
+            'post_overshoot': self.post.overshoot,
+            'post_integrated_error': self.post.integrated_error
+        }
+
+    def finalize(self) -> Tuple[float, Dict[str, float]]:
+        if not self.post.samples:
+            raise ValueError(f"Simulation ends before the load switch at {self.load_switch_time}s")
+        details = self.details()
+        return _weighted_score(self.params, details), details
+
+    def segment_stats(self) -> Dict[str, Dict[str, float]]:
+        """负载切换前后两个区段的统计量"""
+        return {'pre': self.pre.stats(), 'post': self.post.stats()}
+
+    def performance_metrics(self) -> Dict[str, float]:
+        """与 SimulationTool.calculate_performance_metrics 对完整轨迹的计算结果相同"""
+        target_voltage = self.params.target_voltage
+        final_voltage = self.post.final_voltage if self.post.samples else self.pre.final_voltage
+        return {
+            "Overshoot (%)": max(0, (self._peak_voltage - target_voltage) / target_voltage * 100),
+            "Settling Time (s)": self._first_entry_time,
+            "Steady State Error (%)": abs(final_voltage - target_voltage) / target_voltage * 100
+        }
+
+class ScoreLowerBound(OnlineEvaluation):
+    """仿真过程中得分的下界：已累计的积分误差、已出现的超调和已确定的调节时间只会让最终得分更大"""
+
+    def __init__(self, params: EvaluateParams, load_switch_time: float, threshold: float = np.inf,
+                 post_switch_only: bool = False):
+        super().__init__(params, load_switch_time, post_switch_only)
+        self.threshold = threshold
+
+    def update(self, times: np.ndarray, voltages: np.ndarray) -> bool:
+        """输入新的一块采样，返回是否已可以提前终止"""
+        super().update(times, voltages)
+        return self.exceeded
+
+    @property
+    def lower_bound(self) -> float:
+        p = self.params
+        coefficients = (p.settling_time_coefficient, p.post_settling_time_coefficient, p.overshoot_coefficient,
+                        p.post_overshoot_coefficient, p.integrated_error_coefficient,
+                        p.post_integrated_error_coefficient)
+        # 有负系数时得分没有单调下界
+        if min(coefficients) < 0:
+            return -np.inf
+        bound = _weighted_score(p, self.details())
+        # 发散成 NaN 的候选最终得分也是 NaN，不可能成为最优
+        return np.inf if np.isnan(bound) else bound
+
+    @property
+    def exceeded(self) -> bool:
+        return self.lower_bound > self.threshold
+
 class DualLoopPIDEvaluater:
-    def __init__(self, params: EvaluateParams):
+    def __init__(self, params: EvaluateParams, post_switch_only: bool = False):
         self.params = params
+        # 只评价负载切换之后的区段，切换前的三项记为 0；用于从快照分支、只仿真切换之后的情形
+        self.post_switch_only = post_switch_only
+
+    # 负载切换时刻
+    load_switch_time = 0.5
+
+    def _segment_metrics(self, voltages: np.ndarray, times: np.ndarray, dt: float) -> Tuple[float, float, float]:
+        """单个区段的调节时间、超调量和积分误差，times 已减去区段起点"""
+        target_voltage = self.params.target_voltage
+        relative_error = (voltages - target_voltage) / target_voltage
+        abs_error = np.abs(voltages - target_voltage) / target_voltage
+
+        # 第一次进入 2% 误差带的采样点
+        in_band = abs_error <= 0.02
+        settling_time = float(times[np.argmax(in_band)]) if in_band.any() else 0
+
+        # fmax 忽略 NaN，与逐点 max() 的结果一致
+        overshoot = float(np.fmax.reduce(relative_error, initial=0))
+
+        # cumsum 按顺序累加，结果与逐点 += 完全相同（sum 的成对求和会有末位差异）
+        terms = abs_error * dt
+        integrated_error = float(np.cumsum(terms)[-1]) if len(terms) else 0
+        return settling_time, overshoot, integrated_error
+
+    def online(self) -> OnlineEvaluation:
+        return OnlineEvaluation(self.params, self.load_switch_time, self.post_switch_only)
+
+    def score_bound(self, threshold: float = np.inf) -> ScoreLowerBound:
+        return ScoreLowerBound(self.params, self.load_switch_time, threshold, self.post_switch_only)
 
     def evaluate(self, simulation_result: SimulationResult):
-        voltages = simulation_result.voltages
-        times = simulation_result.times
+        with timed_phase('evaluate.total'):
+            voltages = np.asarray(simulation_result.voltages, dtype=float)
+            times = np.asarray(simulation_result.times, dtype=float)
 
-        settling_time = 0
-        overshoot = 0
-        integrated_error = 0
-        post_settling_time = 0
-        post_overshoot = 0
-        post_integrated_error = 0
+            # 找到0.5秒对应的索引
+            load_switch_index = int(np.searchsorted(times, self.load_switch_time))
+            if load_switch_index == len(times):
+                raise ValueError(f"Simulation ends before the load switch at {self.load_switch_time}s")
 
-        target_voltage = self.params.target_voltage
+            if self.post_switch_only:
+                settling_time, overshoot, integrated_error = 0, 0.0, 0.0
+            else:
+                settling_time, overshoot, integrated_error = self._segment_metrics(
+                    voltages[:load_switch_index], times, times[1] - times[0])
 
-        # 找到0.5秒对应的索引
-        load_switch_index = next(i for i, t in enumerate(times) if t >= 0.5)
-
-        settled = False
-        for i, v in enumerate(voltages[:load_switch_index]):
-            if not settled and abs(v - target_voltage) / target_voltage <= 0.02:
-                settling_time = times[i]
-                settled = True
-
-            overshoot = max(overshoot, (v - target_voltage) / target_voltage)
-            integrated_error += abs(v - target_voltage) / target_voltage * (times[1] - times[0])
-
-        post_switch_voltages = voltages[load_switch_index:]
-        post_switch_times = [t - 0.5 for t in times[load_switch_index:]]
-
-        settled = False
-        for i, v in enumerate(post_switch_voltages):
-            if not settled and abs(v - target_voltage) / target_voltage <= 0.02:
-                post_settling_time = post_switch_times[i]
-                settled = True
-
-            post_overshoot = max(post_overshoot, (v - target_voltage) / target_voltage)
-            post_integrated_error += abs(v - target_voltage) / target_voltage * (
-                    post_switch_times[1] - post_switch_times[0])
-
-        score = settling_time * self.params.settling_time_coefficient \
-                + post_settling_time * self.params.post_settling_time_coefficient \
-                + overshoot * self.params.overshoot_coefficient \
-                + post_overshoot * self.params.post_overshoot_coefficient \
-                + integrated_error * self.params.integrated_error_coefficient \
-                + post_integrated_error * self.params.post_integrated_error_coefficient
-
-        return score, {
-            'settling_time': settling_time,
-            'overshoot': overshoot,
-            'integrated_error': integrated_error,
-            'post_settling_time': post_settling_time,
-            'post_overshoot': post_overshoot,
-            'post_integrated_error': post_integrated_error
-        }
+            post_switch_times = times[load_switch_index:] - self.load_switch_time
+            post_settling_time, post_overshoot, post_integrated_error = self._segment_metrics(
+                voltages[load_switch_index:], post_switch_times, post_switch_times[1] - post_switch_times[0])
+
+            details = {
+                'settling_time': settling_time,
+                'overshoot': overshoot,
+                'integrated_error': integrated_error,
+                'post_settling_time': post_settling_time,
+                'post_overshoot': post_overshoot,
+                'post_integrated_error': post_integrated_error
+            }
+            return _weighted_score(self.params, details), details
 
 if __name__ == "__main__":
     # 创建模拟的SimulationResult对象用于测试
-    import numpy as np
-    
     times = np.linspace(0, 1, 10001)  # 0到1秒，步长0.0001
     voltages = 160 + 10 * np.sin(2 * np.pi * times)  # 模拟波动的电压
     voltages[5000:] += 5  # 在0.5秒后增加5V模拟负载变化
@@ -96,10 +276,10 @@ if __name__ == "__main__":
     duty_cycles = np.ones_like(times) * 0.5  # 假设占空比恒定
 
     simulation_result = SimulationResult(
-        times=times.tolist(),
-        voltages=voltages.tolist(),
-        currents=currents.tolist(),
-        duty_cycles=duty_cycles.tolist()
+        times=times,
+        voltages=voltages,
+        currents=currents,
+        duty_cycles=duty_cycles
     )
 
     # 创建EvaluateParams对象
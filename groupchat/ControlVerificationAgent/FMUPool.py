@@ -0,0 +1,144 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import zipfile
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+def load_fmu(*args, **kwargs):
+    """首次加载 FMU 时才导入 pyfmi：只用平均模型或 FakeBoostFMU 的进程（包括 worker）不需要它"""
+    from pyfmi import load_fmu as pyfmi_load_fmu
+    return pyfmi_load_fmu(*args, **kwargs)
+
+# 与 Dymola 生成的 ~FMUOutput 类似，解压结果按 FMU 内容哈希保存在 FMU 同级目录下
+DEFAULT_CACHE_DIRNAME = '~FMUCache'
+
+class FMUExtractionCache:
+    """FMU 解压缓存：同一份 FMU 内容只解压一次，进程和多次运行之间共享"""
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir
+        self._hashes: Dict[Tuple[str, int, int], str] = {}
+
+    def fmu_hash(self, fmu_path: str) -> str:
+        fmu_path = os.path.abspath(fmu_path)
+        stat = os.stat(fmu_path)
+        key = (fmu_path, stat.st_mtime_ns, stat.st_size)
+        if key not in self._hashes:
+            sha = hashlib.sha256()
+            with open(fmu_path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    sha.update(block)
+            self._hashes[key] = sha.hexdigest()
+        return self._hashes[key]
+
+    def extracted_dir(self, fmu_path: str) -> str:
+        fmu_hash = self.fmu_hash(fmu_path)
+        cache_dir = self.cache_dir or os.path.join(os.path.dirname(os.path.abspath(fmu_path)), DEFAULT_CACHE_DIRNAME)
+        target = os.path.join(cache_dir, fmu_hash[:16])
+        if os.path.isfile(os.path.join(target, 'modelDescription.xml')):
+            return target
+
+        # 先解压到临时目录再改名，避免并行 worker 读到半解压的目录
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix=fmu_hash[:16] + '.', dir=cache_dir)
+        try:
+            with zipfile.ZipFile(fmu_path) as archive:
+                archive.extractall(tmp_dir)
+            os.rename(tmp_dir, target)
+        except OSError:
+            # 其它进程已完成解压
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            if not os.path.isfile(os.path.join(target, 'modelDescription.xml')):
+                raise
+        return target
+
+class FMUPool:
+    """按 FMU 哈希缓存已实例化的模型；复用时调用 reset() 并由调用方重新初始化，而不是重新 load_fmu"""
+
+    def __init__(self, extraction_cache: Optional[FMUExtractionCache] = None, max_idle: int = 4,
+                 loader: Optional[Callable] = None):
+        self.extraction_cache = extraction_cache or FMUExtractionCache()
+        self.max_idle = max_idle
+        # 自定义加载函数，参数为 FMU 路径；用于基准测试中的 FakeBoostFMU 等替身
+        self.loader = loader
+        self._idle: Dict[str, List] = {}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self.loads = 0
+        self.reuses = 0
+
+    def __getstate__(self):
+        # 随仿真工具 pickle 到 worker 进程时不带已加载的实例，worker 自行加载
+        state = self.__dict__.copy()
+        state.update(_idle={}, _lock=None, _pid=None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def _check_pid(self):
+        # fork 出来的子进程不能复用父进程的 DLL 实例
+        if self._pid != os.getpid():
+            self._idle = {}
+            self._lock = threading.Lock()
+            self._pid = os.getpid()
+
+    def acquire(self, fmu_path: str):
+        self._check_pid()
+        key = self.extraction_cache.fmu_hash(fmu_path)
+        with self._lock:
+            idle = self._idle.get(key)
+            model = idle.pop() if idle else None
+        if model is not None:
+            model.reset()
+            self.reuses += 1
+            return key, model
+        if self.loader is not None:
+            model = self.loader(fmu_path)
+        else:
+            model = load_fmu(self.extraction_cache.extracted_dir(fmu_path), allow_unzipped_fmu=True)
+        self.loads += 1
+        return key, model
+
+    def release(self, key: str, model):
+        self._check_pid()
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle:
+                idle.append(model)
+                return
+        model.free_instance()
+
+    @contextmanager
+    def instance(self, fmu_path: str):
+        """取出一个处于未初始化状态的模型；仿真出错时实例直接丢弃，不放回池中"""
+        key, model = self.acquire(fmu_path)
+        try:
+            yield model
+        except BaseException:
+            try:
+                model.free_instance()
+            except Exception:
+                pass
+            raise
+        self.release(key, model)
+
+    def clear(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for models in idle.values():
+            for model in models:
+                model.free_instance()
+
+_default_pool: Optional[FMUPool] = None
+
+def get_fmu_pool() -> FMUPool:
+    global _default_pool
+    if _default_pool is None:
+        _default_pool = FMUPool()
+    return _default_pool
@@ -0,0 +1,131 @@
+from typing import List, Sequence, Union
+import numpy as np
+
+# 与 boost_converternopid.fmu 的 modelDescription.xml 相同的变量名和 valueReference
+VALUE_REFERENCES = {
+    'constantVoltage.V': 16777216,
+    'inductor.L': 16777226,
+    'pwm.f': 16777228,
+    'capacitor.C': 16777232,
+    'const3.k': 16777235,
+    'step1.height': 16777236,
+    'step1.offset': 16777237,
+    'step1.startTime': 16777238,
+    'currentSensor.i': 33554432,
+    'voltageSensor.v': 33554433,
+    'resistor1.R': 637534265,
+}
+
+# 参数初值，与 FMU 中的 start 值一致
+PARAMETER_START = {
+    'constantVoltage.V': 80.0,
+    'inductor.L': 0.001,
+    'pwm.f': 20000.0,
+    'capacitor.C': 0.0006,
+    'const3.k': 0.5,
+    'step1.height': 5.0,
+    'step1.offset': 20.0,
+    'step1.startTime': 0.5,
+}
+
+class FakeBoostFMU:
+    """不依赖 DLL 的 FMU 替身：接口与 pyfmi 的 FMUModelCS2 子集相同（get/set/do_step 等），
+    对象是 ModelDesignAgent/boostconverter.py 中的平均模型 BoostConverter，负载按 step1 切换。
+    仅用于在 Linux 上做基准测试，数值结果与真实开关模型不同"""
+
+    def __init__(self):
+        self._names = {vr: name for name, vr in VALUE_REFERENCES.items()}
+        self.reset()
+
+    def reset(self):
+        self.parameters = dict(PARAMETER_START)
+        self.time = 0.0
+        self.current = 0.0
+        self.voltage = 0.0
+
+    def setup_experiment(self, start_time: float = 0.0, **kwargs):
+        self.time = start_time
+
+    def enter_initialization_mode(self):
+        pass
+
+    def exit_initialization_mode(self):
+        pass
+
+    def terminate(self):
+        pass
+
+    def free_instance(self):
+        pass
+
+    def get_variable_valueref(self, name: str) -> int:
+        return VALUE_REFERENCES[name]
+
+    def _resistance(self, t: float) -> float:
+        p = self.parameters
+        return p['step1.offset'] + (p['step1.height'] if t >= p['step1.startTime'] else 0.0)
+
+    def _value(self, name: str) -> float:
+        if name == 'voltageSensor.v':
+            return self.voltage
+        if name == 'currentSensor.i':
+            return self.current
+        if name == 'resistor1.R':
+            return self._resistance(self.time)
+        return self.parameters[name]
+
+    def get(self, names: Union[str, Sequence[str]]) -> List[float]:
+        if isinstance(names, str):
+            names = [names]
+        return [self._value(name) for name in names]
+
+    def set(self, names: Union[str, Sequence[str]], values: Sequence[float]):
+        if isinstance(names, str):
+            names = [names]
+        for name, value in zip(names, values):
+            if name not in self.parameters:
+                raise KeyError(f"Cannot set variable: {name}")
+            self.parameters[name] = float(value)
+
+    def get_real(self, value_references: Sequence[int]) -> List[float]:
+        # 与 pyfmi 一样接受 numpy 数组；tolist() 避免逐个取出 numpy 标量
+        return [self._value(self._names[vr]) for vr in np.asarray(value_references).tolist()]
+
+    def set_real(self, value_references: Sequence[int], values: Sequence[float]):
+        names = [self._names[vr] for vr in np.asarray(value_references).tolist()]
+        self.set(names, np.asarray(values, dtype=float).tolist())
+
+    def get_fmu_state(self) -> dict:
+        return {'parameters': dict(self.parameters), 'time': self.time, 'current': self.current,
+                'voltage': self.voltage}
+
+    def set_fmu_state(self, state: dict):
+        self.parameters = dict(state['parameters'])
+        self.time = state['time']
+        self.current = state['current']
+        self.voltage = state['voltage']
+
+    def free_fmu_state(self, state: dict):
+        pass
+
+    def serialize_fmu_state(self, state: dict) -> dict:
+        return {**state, 'parameters': dict(state['parameters'])}
+
+    def deserialize_fmu_state(self, serialized_state: dict) -> dict:
+        return self.serialize_fmu_state(serialized_state)
+
+    def do_step(self, current_t: float, step_size: float, new_step: bool = True) -> int:
+        p = self.parameters
+        duty_cycle = p['const3.k']
+        resistance = self._resistance(current_t)
+        # BoostConverter.update 的显式欧拉离散
+        delta_I = (p['constantVoltage.V'] - (1 - duty_cycle) * self.voltage) * step_size / p['inductor.L']
+        delta_V = ((1 - duty_cycle) * self.current - self.voltage / resistance) * step_size / p['capacitor.C']
+        self.current += delta_I
+        self.voltage += delta_V
+        self.time = current_t + step_size
+        return 0
+
+def fake_fmu_loader(fmu_path: str) -> FakeBoostFMU:
+    """FMUPool(loader=fake_fmu_loader) 让 BoostSimulationTool 使用 FakeBoostFMU"""
+    return FakeBoostFMU()
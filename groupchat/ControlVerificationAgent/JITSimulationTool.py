@@ -0,0 +1,268 @@
+import warnings
+import numpy as np
+from typing import Sequence
+from ControlTool import ControlParams, BaseController, DualLoopPIDController, DualLoopPIDBank
+from SimulationTool import SimulationParams, SimulationResult
+from AveragedSimulationTool import AveragedBoostSimulationTool, BatchSimulationResult, DEFAULT_PARAM_NAMES
+from StateSpaceController import ANTI_WINDUP_MODES, DualLoopStateSpaceController, StateSpaceController
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    # 没有 numba 时退回纯 Python 执行同一份内核，结果相同但速度慢
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        return lambda func: func
+
+# gains 数组各元素对应的控制参数
+GAIN_NAMES = ('voltage_k', 'voltage_Ti', 'voltage_Td', 'voltage_y_max', 'voltage_y_min',
+              'current_k', 'current_Ti', 'current_Td', 'current_y_max', 'current_y_min')
+
+# state 数组：电感电流、电容电压、占空比、电压环积分/上次误差、电流环积分/上次误差、电压环输出
+STATE_SIZE = 8
+
+@njit(cache=True, error_model='numpy')
+def _closed_loop_kernel(resistance, plant_step, dt, L, C, V_in, target_voltage, gains, state, out, record_every,
+                        start, stop):
+    """平均模型 Boost + 双环 PI，逐步运算顺序与 AveragedBoostSimulationTool.simulate 和 PIDController.update 相同。
+    resistance 为 (控制周期数, 每周期对象步数)，dt 为控制周期；第 k 个控制周期在 k 是 record_every 的倍数时写入
+    out[:, k // record_every]"""
+    i_L = state[0]
+    v_C = state[1]
+    d = state[2]
+    v_xi = state[3]
+    v_last = state[4]
+    c_xi = state[5]
+    c_last = state[6]
+    y = state[7]
+    for k in range(start, stop):
+        for s in range(resistance.shape[1]):
+            delta_I = (V_in - (1 - d) * v_C) * plant_step / L
+            delta_V = ((1 - d) * i_L - v_C / resistance[k, s]) * plant_step / C
+            i_L += delta_I
+            v_C += delta_V
+
+        # 外环：电压控制
+        error = target_voltage - v_C
+        v_xi += error * dt
+        derivative = (error - v_last) / dt if dt > 0 else 0.0
+        y = gains[0] * (error + v_xi / gains[1] + gains[2] * derivative)
+        # 与 max(min(y, y_max), y_min) 对 NaN 的处理一致
+        if gains[3] < y:
+            y = gains[3]
+        if gains[4] > y:
+            y = gains[4]
+        v_last = error
+
+        # 内环：电流控制
+        error = y - i_L
+        c_xi += error * dt
+        derivative = (error - c_last) / dt if dt > 0 else 0.0
+        d = gains[5] * (error + c_xi / gains[6] + gains[7] * derivative)
+        if gains[8] < d:
+            d = gains[8]
+        if gains[9] > d:
+            d = gains[9]
+        c_last = error
+
+        if k % record_every == 0:
+            out[0, k // record_every] = v_C
+            out[1, k // record_every] = i_L
+            out[2, k // record_every] = d
+
+    state[0] = i_L
+    state[1] = v_C
+    state[2] = d
+    state[3] = v_xi
+    state[4] = v_last
+    state[5] = c_xi
+    state[6] = c_last
+    state[7] = y
+
+@njit(cache=True, error_model='numpy', parallel=True)
+def _batch_closed_loop_kernel(resistance, plant_step, dt, L, C, V_in, target_voltage, gains, state, data,
+                              record_every):
+    # data 为 (N, 4, T)，第 0 行是时间，其余三行由内核填写
+    for n in prange(gains.shape[0]):
+        _closed_loop_kernel(resistance, plant_step, dt, L, C, V_in, target_voltage, gains[n], state[n], data[n, 1:],
+                            record_every, 0, resistance.shape[0])
+
+@njit(cache=True, error_model='numpy')
+def _state_space_stage(A, B, C, settings, tracking, integrating, x, x_new, error):
+    """StateSpaceController.update 的编译版本；settings = [D, y_max, y_min, 抗饱和方式在 ANTI_WINDUP_MODES 中的下标]，
+    integrating 为 clamp 时冻结的状态"""
+    y = settings[0] * error
+    for j in range(x.shape[0]):
+        y += C[j] * x[j]
+    y_sat = y
+    if settings[1] < y_sat:
+        y_sat = settings[1]
+    if settings[2] > y_sat:
+        y_sat = settings[2]
+    mode = int(settings[3])
+    clamped = mode == 1 and y_sat != y
+    for i in range(x.shape[0]):
+        acc = 0.0
+        for j in range(x.shape[0]):
+            acc += A[i, j] * x[j]
+        x_new[i] = B[i] * error + acc
+        if mode == 2:
+            x_new[i] += tracking[i] * (y_sat - y)
+        elif clamped and integrating[i]:
+            x_new[i] = x[i]
+    x[:] = x_new
+    return y_sat
+
+@njit(cache=True, error_model='numpy')
+def _state_space_closed_loop_kernel(resistance, plant_step, L, C, V_in, target_voltage, voltage_stage, current_stage,
+                                    plant, out, record_every, start, stop):
+    """平均模型 Boost + 双环状态空间控制器；stage 为 (A, B, C, settings, tracking, integrating, x)，plant 为 [i_L, v_C, d]，
+    resistance 和 record_every 的含义同 _closed_loop_kernel（控制周期已离散在 A、B 中）"""
+    vA, vB, vC, v_settings, v_tracking, v_integrating, v_x = voltage_stage
+    cA, cB, cC, c_settings, c_tracking, c_integrating, c_x = current_stage
+    v_new = np.empty_like(v_x)
+    c_new = np.empty_like(c_x)
+    i_L = plant[0]
+    v_C = plant[1]
+    d = plant[2]
+    current_reference = 0.0
+    for k in range(start, stop):
+        for s in range(resistance.shape[1]):
+            delta_I = (V_in - (1 - d) * v_C) * plant_step / L
+            delta_V = ((1 - d) * i_L - v_C / resistance[k, s]) * plant_step / C
+            i_L += delta_I
+            v_C += delta_V
+
+        current_reference = _state_space_stage(vA, vB, vC, v_settings, v_tracking, v_integrating, v_x, v_new,
+                                               target_voltage - v_C)
+        d = _state_space_stage(cA, cB, cC, c_settings, c_tracking, c_integrating, c_x, c_new, current_reference - i_L)
+
+        if k % record_every == 0:
+            out[0, k // record_every] = v_C
+            out[1, k // record_every] = i_L
+            out[2, k // record_every] = d
+    plant[0] = i_L
+    plant[1] = v_C
+    plant[2] = d
+    return current_reference
+
+def _compile_stage(controller: StateSpaceController) -> tuple:
+    n = len(controller.B)
+    tracking = np.array(controller.tracking_gain if controller.tracking_gain else [0.0] * n, dtype=np.float64)
+    return (np.array(controller.A, dtype=np.float64).reshape(n, n), np.array(controller.B, dtype=np.float64),
+            np.array(controller.C, dtype=np.float64),
+            np.array([controller.D, controller.y_max, controller.y_min,
+                      ANTI_WINDUP_MODES.index(controller.anti_windup)], dtype=np.float64),
+            tracking, np.array(controller.integrating, dtype=np.bool_), np.array(controller.x, dtype=np.float64))
+
+class JITAveragedBoostSimulationTool(AveragedBoostSimulationTool):
+    """编译后的平均模型闭环仿真；控制器必须是 DualLoopPIDController 或 DualLoopStateSpaceController，
+    否则退回逐步 Python 仿真"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if not NUMBA_AVAILABLE:
+            warnings.warn("numba is not installed; boost-averaged-jit runs the kernel as plain Python")
+
+    def _initial_state(self, simulation_params: SimulationParams) -> np.ndarray:
+        state = np.zeros(STATE_SIZE)
+        state[1] = simulation_params.initial_voltage
+        state[2] = self.plant_params.initial_duty_cycle
+        return state
+
+    def _run_kernel(self, kernel, args: tuple, steps: int, result: SimulationResult,
+                    simulation_params: SimulationParams, score_bound=None):
+        """推进 steps 个控制周期，返回 (结果, 内核最后一次的返回值)；有 score_bound 时分块推进，
+        每 abort_check_interval 个记录点之后检查得分下界"""
+        if score_bound is None:
+            return result, kernel(*args, 0, steps)
+        record_every = simulation_params.record_every
+        chunk = self.abort_check_interval * record_every
+        value = None
+        for start in range(0, steps, chunk):
+            stop = min(start + chunk, steps)
+            value = kernel(*args, start, stop)
+            first, last = start // record_every, -(-stop // record_every)
+            if score_bound.update(result.times[first:last], result.voltages[first:last]):
+                return result.truncated(last), value
+        return result, value
+
+    def simulate(self, fmu_path: str, simulation_params: SimulationParams,
+                 controller: BaseController, score_bound=None) -> SimulationResult:
+        if isinstance(controller, DualLoopStateSpaceController):
+            return self._simulate_state_space(simulation_params, controller, score_bound)
+        if not isinstance(controller, DualLoopPIDController):
+            return super().simulate(fmu_path, simulation_params, controller, score_bound)
+
+        vc = controller.voltage_controller
+        cc = controller.current_controller
+        gains = np.array([vc.k, vc.Ti, vc.Td, vc.y_max, vc.y_min, cc.k, cc.Ti, cc.Td, cc.y_max, cc.y_min],
+                         dtype=np.float64)
+        state = self._initial_state(simulation_params)
+        state[3:] = (vc.xi, vc.last_error, cc.xi, cc.last_error, vc.y)
+
+        control_times, dt, plant_step, resistance = self._control_grid(simulation_params)
+        time = self.record_times(simulation_params)
+        result = SimulationResult.empty(len(time))
+        result.times[:] = time
+        p = self.plant_params
+        args = (resistance, plant_step, dt, p.inductance, p.capacitance, p.input_voltage,
+                float(simulation_params.target_voltage), gains, state, result.data[1:], simulation_params.record_every)
+        result, _ = self._run_kernel(_closed_loop_kernel, args, len(control_times), result, simulation_params,
+                                     score_bound)
+
+        # 把积分状态写回控制器，与逐步调用 controller.update 后的状态一致
+        vc.xi, vc.last_error, cc.xi, cc.last_error, vc.y = state[3:].tolist()
+        cc.y = float(state[2])
+        return result
+
+    def _simulate_state_space(self, simulation_params: SimulationParams, controller: DualLoopStateSpaceController,
+                              score_bound=None) -> SimulationResult:
+        vc = controller.voltage_controller
+        cc = controller.current_controller
+        control_times, dt, plant_step, resistance = self._control_grid(simulation_params)
+        vc._check_dt(dt)
+        cc._check_dt(dt)
+        voltage_stage = _compile_stage(vc)
+        current_stage = _compile_stage(cc)
+        plant = self._initial_state(simulation_params)[:3].copy()
+
+        time = self.record_times(simulation_params)
+        result = SimulationResult.empty(len(time))
+        result.times[:] = time
+        p = self.plant_params
+        args = (resistance, plant_step, p.inductance, p.capacitance, p.input_voltage,
+                float(simulation_params.target_voltage), voltage_stage, current_stage, plant, result.data[1:],
+                simulation_params.record_every)
+
+        result, current_reference = self._run_kernel(_state_space_closed_loop_kernel, args, len(control_times),
+                                                     result, simulation_params, score_bound)
+
+        # 把状态写回控制器，与逐步调用 controller.update 后的状态一致
+        vc.x = voltage_stage[-1].tolist()
+        cc.x = current_stage[-1].tolist()
+        if len(control_times):
+            vc.y = float(current_reference)
+            cc.y = float(plant[2])
+        return result
+
+    def simulate_batch(self, param_matrix: np.ndarray, control_params: ControlParams,
+                       simulation_params: SimulationParams,
+                       param_names: Sequence[str] = DEFAULT_PARAM_NAMES) -> BatchSimulationResult:
+        gain_arrays = DualLoopPIDBank.from_matrix(param_matrix, control_params, param_names).gains
+        gains = np.ascontiguousarray(np.stack([gain_arrays[name] for name in GAIN_NAMES], axis=1))
+        n = gains.shape[0]
+        state = np.tile(self._initial_state(simulation_params), (n, 1))
+
+        _, dt, plant_step, resistance = self._control_grid(simulation_params)
+        time = self.record_times(simulation_params)
+        data = np.empty((n, 4, len(time)))
+        data[:, 0] = time
+        p = self.plant_params
+        _batch_closed_loop_kernel(resistance, plant_step, dt, p.inductance, p.capacitance, p.input_voltage,
+                                  float(simulation_params.target_voltage), gains, state, data,
+                                  simulation_params.record_every)
+        return BatchSimulationResult(data=data)
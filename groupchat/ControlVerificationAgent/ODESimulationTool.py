@@ -0,0 +1,151 @@
+import numpy as np
+from typing import Optional, Sequence
+from scipy.integrate import solve_ivp
+from ControlTool import ControlParams, ControllerFactory, BaseController, ControlParamLayout
+from SimulationTool import SimulationParams, SimulationResult
+from AveragedSimulationTool import AveragedBoostSimulationTool, BoostPlantParams, BatchSimulationResult, \
+    DEFAULT_PARAM_NAMES
+
+# 只有隐式/刚性求解器使用雅可比矩阵
+STIFF_METHODS = ('Radau', 'BDF', 'LSODA')
+
+class ODEBoostSimulationTool(AveragedBoostSimulationTool):
+    """平均模型 Boost 的变步长仿真：控制器按 control_period（默认 step_size）采样并零阶保持占空比，
+    两次采样之间用 solve_ivp 积分，精度由 rtol/atol 决定，与控制周期无关；设置 communication_step 时
+    与 FMU 的 do_step 一样在每个通信点重新启动积分，每 record_every 个控制周期记录一次。
+    没有向量化的批量仿真：simulate_batch（以及继承的 evaluate_batch）逐个粒子调用 simulate，
+    PSOOptimizer 按单个粒子评估（可以用进程池并行），不会退回欧拉离散的父类批量实现"""
+    supports_batch = False
+
+    def __init__(self, plant_params: Optional[BoostPlantParams] = None, method: str = 'LSODA',
+                 rtol: float = 1e-6, atol: float = 1e-9, max_step: float = np.inf):
+        super().__init__(plant_params)
+        self.method = method
+        self.rtol = rtol
+        self.atol = atol
+        self.max_step = max_step
+        self._options = {'jac': self._jacobian} if method in STIFF_METHODS else {}
+
+    def _derivatives(self, t: float, x: np.ndarray, duty_cycle: float, resistance: float) -> np.ndarray:
+        p = self.plant_params
+        off = 1 - duty_cycle
+        return np.array([(p.input_voltage - off * x[1]) / p.inductance,
+                         (off * x[0] - x[1] / resistance) / p.capacitance])
+
+    def _jacobian(self, t: float, x: np.ndarray, duty_cycle: float, resistance: float) -> np.ndarray:
+        p = self.plant_params
+        off = 1 - duty_cycle
+        return np.array([[0.0, -off / p.inductance],
+                         [off / p.capacitance, -1 / (resistance * p.capacitance)]])
+
+    def _integrate(self, x: np.ndarray, t0: float, t1: float, duty_cycle: float) -> Optional[np.ndarray]:
+        """占空比保持不变，从 t0 积分到 t1；负载突变点落在区间内时分段积分。求解失败返回 None"""
+        p = self.plant_params
+        breakpoints = [t0, t1]
+        if p.load_step_time is not None and t0 < p.load_step_time < t1:
+            breakpoints.insert(1, p.load_step_time)
+        for start, stop in zip(breakpoints[:-1], breakpoints[1:]):
+            solution = solve_ivp(self._derivatives, (start, stop), x, method=self.method,
+                                 args=(duty_cycle, p.resistance_at(start)), rtol=self.rtol, atol=self.atol,
+                                 max_step=self.max_step, **self._options)
+            if not solution.success:
+                return None
+            x = solution.y[:, -1]
+        return x
+
+    def simulate(self, fmu_path: str, simulation_params: SimulationParams,
+                 controller: BaseController, score_bound=None) -> SimulationResult:
+        # 与其它后端一致：第 k 个控制周期的采样是 [t_k, t_k + control_period] 末端的状态，记录在 t_k
+        control_period = simulation_params.get_control_period()
+        substeps = simulation_params.communication_steps_per_control()
+        communication_step = control_period / substeps
+        record_every = simulation_params.record_every
+        time = self.record_times(simulation_params)
+        result = SimulationResult.empty(len(time))
+        result.times[:] = time
+        voltage = result.voltages
+        current = result.currents
+        duty_cycle = result.duty_cycles
+
+        x = np.array([0.0, float(simulation_params.initial_voltage)])
+        d = self.plant_params.initial_duty_cycle
+        checked = 0
+
+        for k, t in enumerate(simulation_params.control_times()):
+            for s in range(substeps):
+                start = t + s * communication_step
+                x = self._integrate(x, start, start + communication_step, d) if np.isfinite(d) else None
+                if x is None:
+                    break
+            if x is None or not np.all(np.isfinite(x)):
+                # 发散或控制器输出 NaN：后续采样记为 NaN，与欧拉后端的 NaN 传播结果一致
+                result.data[1:, -(-k // record_every):] = np.nan
+                break
+
+            d = controller.update(simulation_params.target_voltage, x[1], x[0], control_period)
+
+            if k % record_every:
+                continue
+            r = k // record_every
+            voltage[r] = x[1]
+            current[r] = x[0]
+            duty_cycle[r] = d
+
+            if score_bound is not None and (r + 1) % self.abort_check_interval == 0:
+                if score_bound.update(time[checked:r + 1], voltage[checked:r + 1]):
+                    return result.truncated(r + 1)
+                checked = r + 1
+
+        return result
+
+    def simulate_batch(self, param_matrix: np.ndarray, control_params: ControlParams,
+                       simulation_params: SimulationParams,
+                       param_names: Sequence[str] = DEFAULT_PARAM_NAMES) -> BatchSimulationResult:
+        layout = ControlParamLayout(control_params, param_names)
+        return BatchSimulationResult(data=np.stack([
+            self.simulate(None, simulation_params, layout.controller(params)).data for params in param_matrix]))
+
+if __name__ == "__main__":
+    import time as timer
+    from SimulationTool import calculate_performance_metrics
+
+    control_params = ControlParams(control_params={
+        'voltage_k': 1.0, 'voltage_Ti': 0.1, 'voltage_Td': 0, 'voltage_y_max': 800, 'voltage_y_min': 0.0,
+        'current_k': 1.0, 'current_Ti': 0.1, 'current_Td': 0, 'current_y_max': 1, 'current_y_min': 0.0
+    })
+
+    # 控制周期放宽到 0.5ms，被控对象的积分精度仍由 rtol/atol 保证
+    for step_size in (0.0001, 0.0005):
+        simulation_params = SimulationParams(
+            simulation_time=1.0,
+            target_voltage=160,
+            initial_voltage=80,
+            step_size=step_size
+        )
+        controller = ControllerFactory.create_controller("duallooppid", control_params)
+        start = timer.perf_counter()
+        simulation_result = ODEBoostSimulationTool().simulate(None, simulation_params, controller)
+        elapsed = timer.perf_counter() - start
+        print(f"step_size={step_size}: {elapsed:.2f}s,",
+              calculate_performance_metrics(simulation_result, simulation_params.target_voltage))
+
+    # evaluate_batch 与逐个 simulate + evaluate 的得分一致（都是 solve_ivp 积分，不是欧拉离散）
+    from EvaluateTool import EvaluateParams, EvaluateFactory
+    evaluater_tool = EvaluateFactory.create_evaluater("duallooppid", EvaluateParams(
+        target_voltage=160,
+        settling_time_coefficient=1.0,
+        overshoot_coefficient=1.0,
+        integrated_error_coefficient=1.0,
+        post_settling_time_coefficient=1.0,
+        post_overshoot_coefficient=1.0,
+        post_integrated_error_coefficient=1.0
+    ))
+    param_matrix = np.array([[1.0, 0.1, 1.0, 0.1], [0.5, 0.2, 0.05, 0.02]])
+    layout = ControlParamLayout(control_params, DEFAULT_PARAM_NAMES)
+    simulation_tool = ODEBoostSimulationTool()
+    batch_scores, _ = simulation_tool.evaluate_batch(param_matrix, control_params, simulation_params, evaluater_tool)
+    scalar_scores = [
+        evaluater_tool.evaluate(simulation_tool.simulate(None, simulation_params, layout.controller(params)))[0]
+        for params in param_matrix]
+    assert np.array_equal(batch_scores, scalar_scores), (batch_scores, scalar_scores)
+    print(f"evaluate_batch matches simulate + evaluate: {batch_scores}")
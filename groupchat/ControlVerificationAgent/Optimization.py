@@ -1,4 +1,6 @@
 from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 from typing import Dict, List, Tuple, Type
 import numpy as np
 from pydantic import BaseModel
@@ -45,6 +47,11 @@ class OptimizationTool(ABC):
         self.simulation_time = simulation_time
         self.time_step = time_step
         self.additional_params = kwargs
+        # num_workers > 1 时整代粒子交给进程池并行评估，并强制同步代更新：同一 seed 下与默认的异步串行结果不同，
+        # 与 synchronous=True 的串行结果相同
+        self.num_workers = int(kwargs.get('num_workers', 1))
+        self.synchronous = bool(kwargs.get('synchronous', False)) or self.num_workers > 1
+        self.seed = kwargs.get('seed')
 
     @abstractmethod
     def optimize(self) -> OptimizationResult:
@@ -59,6 +66,19 @@ class OptimizationTool(ABC):
         score, details = self.evaluate_performance(voltages, times, 160)
         return score, details
 
+    def evaluate_population(self, population: np.ndarray, executor=None) -> Tuple[List[float], List[Dict]]:
+        if executor is not None:
+            results = list(executor.map(_evaluate_individual, population))
+        else:
+            results = [self.objective_function(p) for p in population]
+        return [score for score, _ in results], [details for _, details in results]
+
+    def _create_executor(self):
+        if self.num_workers <= 1:
+            return nullcontext()
+        return ProcessPoolExecutor(max_workers=self.num_workers, initializer=_init_evaluation_worker,
+                                   initargs=(self,))
+
     def simulate(self, fmu_path: str, simulation_time: float, time_step: float,
                  controller_class: Type[BaseController], control_params: ControlParams):
         model = load_fmu(fmu_path)
@@ -141,9 +161,33 @@ class OptimizationTool(ABC):
             'post_integrated_error': post_integrated_error
         }
 
+# worker 进程中的优化工具，由 _init_evaluation_worker 在进程启动时设置一次
+_worker_context = {}
+
+def _init_evaluation_worker(tool: OptimizationTool):
+    _worker_context['tool'] = tool
+
+def _evaluate_individual(params: np.ndarray) -> Tuple[float, Dict]:
+    return _worker_context['tool'].objective_function(params)
+
 class PSOOptimizeTool(OptimizationTool):
+    """粒子群优化。kwargs 中的可选参数：
+
+    - seed：随机种子，相同种子、相同更新方式的结果可复现
+    - synchronous：同步代更新（整代粒子移动后一起评估，再更新个体/全局最优）；默认 False 为逐个粒子的异步更新，
+      每个粒子评估后立即更新全局最优
+    - num_workers：> 1 时整代粒子用进程池并行评估，强制 synchronous=True；因此同一个 seed 下，
+      num_workers > 1 的结果与默认串行（异步）的结果不同，只与 num_workers=1, synchronous=True 的结果相同
+    """
+
     def optimize(self) -> OptimizationResult:
+        with self._create_executor() as executor:
+            return self._optimize(executor)
+
+    def _optimize(self, executor) -> OptimizationResult:
         w, c1, c2 = 0.5, 1.5, 1.5
+        if self.seed is not None:
+            np.random.seed(int(self.seed))
 
         particles = np.random.rand(self.population_size, self.num_variables)
         for i in range(self.num_variables):
@@ -152,12 +196,7 @@ class PSOOptimizeTool(OptimizationTool):
         velocities = np.random.randn(self.population_size, self.num_variables) * 0.01
 
         personal_best_positions = particles.copy()
-        personal_best_scores = []
-        personal_best_details = []
-        for p in particles:
-            score, details = self.objective_function(p)
-            personal_best_scores.append(score)
-            personal_best_details.append(details)
+        personal_best_scores, personal_best_details = self.evaluate_population(particles, executor)
 
         personal_best_scores = np.array(personal_best_scores)
         global_best_index = np.argmin(personal_best_scores)
@@ -167,28 +206,52 @@ class PSOOptimizeTool(OptimizationTool):
 
         iteration_results = []
 
+        lower = np.array([r[0] for r in self.variable_ranges])
+        upper = np.array([r[1] for r in self.variable_ranges])
+
         for iteration in range(self.max_iterations):
-            for i in range(self.population_size):
-                r1, r2 = np.random.rand(2)
-                velocities[i] = (w * velocities[i] +
-                                 c1 * r1 * (personal_best_positions[i] - particles[i]) +
-                                 c2 * r2 * (global_best_position - particles[i]))
-                particles[i] += velocities[i]
-
-                for j in range(self.num_variables):
-                    particles[i, j] = np.clip(particles[i, j], self.variable_ranges[j][0], self.variable_ranges[j][1])
-
-                score, details = self.objective_function(particles[i])
-
-                if score < personal_best_scores[i]:
-                    personal_best_scores[i] = score
-                    personal_best_positions[i] = particles[i]
-                    personal_best_details[i] = details
-
-                if score < global_best_score:
-                    global_best_score = score
-                    global_best_position = particles[i]
-                    global_best_details = details
+            if self.synchronous:
+                # 同步代更新：整代粒子移动后一起评估，再更新个体/全局最优
+                r = np.random.rand(self.population_size, 2)
+                velocities = (w * velocities +
+                              c1 * r[:, :1] * (personal_best_positions - particles) +
+                              c2 * r[:, 1:] * (global_best_position - particles))
+                particles = np.clip(particles + velocities, lower, upper)
+
+                scores, details_list = self.evaluate_population(particles, executor)
+
+                for i in range(self.population_size):
+                    if scores[i] < personal_best_scores[i]:
+                        personal_best_scores[i] = scores[i]
+                        personal_best_positions[i] = particles[i]
+                        personal_best_details[i] = details_list[i]
+
+                    if scores[i] < global_best_score:
+                        global_best_score = scores[i]
+                        global_best_position = particles[i].copy()
+                        global_best_details = details_list[i]
+            else:
+                for i in range(self.population_size):
+                    r1, r2 = np.random.rand(2)
+                    velocities[i] = (w * velocities[i] +
+                                     c1 * r1 * (personal_best_positions[i] - particles[i]) +
+                                     c2 * r2 * (global_best_position - particles[i]))
+                    particles[i] += velocities[i]
+
+                    for j in range(self.num_variables):
+                        particles[i, j] = np.clip(particles[i, j], self.variable_ranges[j][0], self.variable_ranges[j][1])
+
+                    score, details = self.objective_function(particles[i])
+
+                    if score < personal_best_scores[i]:
+                        personal_best_scores[i] = score
+                        personal_best_positions[i] = particles[i]
+                        personal_best_details[i] = details
+
+                    if score < global_best_score:
+                        global_best_score = score
+                        global_best_position = particles[i]
+                        global_best_details = details
 
             iteration_results.append({
                 'iteration': iteration + 1,
@@ -1,9 +1,12 @@
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 from pydantic import BaseModel
-from typing import Dict, List, Callable, Tuple
-from SimulationTool import SimulationParams, BaseSimulater, SimulationResult, SimulationFactory, BoostSimulationTool
-from ControlTool import ControlParams, BaseController, PIDController, ControllerFactory
-from EvaluateTool import EvaluateParams, EvaluateFactory, BaseEvaluater
+from typing import Dict, List, Optional, Tuple
+from SimulationTool import SimulationParams, BaseSimulater, SimulationFactory, BoostSimulationTool
+from ControlTool import ControlParams, BaseController, ControllerFactory, ControlParamLayout, get_controller_info
+from EvaluateTool import EvaluateParams, EvaluateFactory
+from Profiler import get_profiler, profiling, timed_phase
 
 class OptimizationResult(BaseModel):
     best_params: List[float]
@@ -11,6 +14,12 @@ class OptimizationResult(BaseModel):
     best_details: Dict[str, float]
     iteration_results: List[Dict]
     best_params_array: List[List[float]]
+    # 平均模型粗筛的统计，未启用粗筛时为 None
+    screening: Optional[Dict[str, float]] = None
+    # 小信号稳定性预筛的统计（剔除数和与平均模型仿真的一致率），未启用时为 None
+    stability: Optional[Dict[str, float]] = None
+    # profile=True 时各阶段的次数和耗时（Profiler.summary()），否则为 None
+    timing: Optional[Dict[str, Dict[str, float]]] = None
 
 class OptimizationFactory:
     @staticmethod
@@ -26,22 +35,251 @@ class BaseOptimizer:
     def optimize(self, fmu_path: str, control_tool: ControllerFactory, control_params: ControlParams,
                  simulation_tool: SimulationFactory, simulation_params: SimulationParams,
                  evaluater_tool: EvaluateFactory, evaluate_params: EvaluateParams,
-                 bounds: List[Tuple[float, float]], initial_params: List[float]) -> OptimizationResult:
+                 bounds: Optional[List[Tuple[float, float]]], initial_params: List[float]) -> OptimizationResult:
         raise NotImplementedError("Subclasses must implement optimize method")
 
+# worker 进程中的评估上下文，由 _init_evaluation_worker 在进程启动时设置一次
+_worker_context = {}
+
+def _init_evaluation_worker(optimizer, *objective_args):
+    _worker_context['optimizer'] = optimizer
+    _worker_context['objective_args'] = objective_args
+
+def rank_correlation(a: np.ndarray, b: np.ndarray) -> float:
+    """两组得分的 Spearman 秩相关系数，忽略非有限值；有效点不足 3 个或某组全部相同时为 NaN"""
+    a = np.asarray(a, dtype=float)
+    b = np.asarray(b, dtype=float)
+    finite = np.isfinite(a) & np.isfinite(b)
+    a, b = a[finite], b[finite]
+    if len(a) < 3 or np.ptp(a) == 0 or np.ptp(b) == 0:
+        return float('nan')
+    from scipy.stats import spearmanr
+    return float(spearmanr(a, b)[0])
+
+class _Screening:
+    """平均模型粗筛：整代粒子先用平均模型评估，只有得分最好的 top_k 个再用开关 FMU 仿真；
+    记录两种保真度的得分对，用秩相关检验粗筛排序是否可信"""
+
+    def __init__(self, tool: BaseSimulater, top_k: int):
+        self.tool = tool
+        self.top_k = top_k
+        self.screened_evaluations = 0
+        self.fmu_evaluations = 0
+        self.screened_scores = []
+        self.fmu_scores = []
+        self.last_correlation = float('nan')
+
+    def record(self, screened_scores: np.ndarray, fmu_scores: np.ndarray, fmu_details: List[Dict[str, float]]):
+        # 提前终止的 FMU 得分只是下界，不参与相关性统计
+        complete = [not d.get('aborted') for d in fmu_details]
+        self.screened_scores.extend(np.asarray(screened_scores)[complete].tolist())
+        self.fmu_scores.extend(np.asarray(fmu_scores)[complete].tolist())
+        self.last_correlation = rank_correlation(np.asarray(screened_scores)[complete],
+                                                 np.asarray(fmu_scores)[complete])
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            'top_k': self.top_k,
+            'screened_evaluations': self.screened_evaluations,
+            'fmu_evaluations': self.fmu_evaluations,
+            'pairs': len(self.fmu_scores),
+            'rank_correlation': rank_correlation(self.screened_scores, self.fmu_scores)
+        }
+
+def _evaluate_particle(params: np.ndarray, abort_threshold: float = np.inf):
+    """返回 ((score, details), profiler)；剖析时每次调用的计时随结果传回主进程合并"""
+    optimizer = _worker_context['optimizer']
+    if not optimizer.profile:
+        return optimizer.objective_function(params, *_worker_context['objective_args'],
+                                            abort_threshold=abort_threshold), None
+    with profiling() as profiler:
+        return optimizer.objective_function(params, *_worker_context['objective_args'],
+                                            abort_threshold=abort_threshold), profiler
+
 class PSOOptimizer(BaseOptimizer):
     def __init__(self, swarm_size: int = 10, max_iterations: int = 100, w: float = 0.5, c1: float = 1.5,
-                 c2: float = 1.5):
+                 c2: float = 1.5, num_workers: int = 1, synchronous: bool = False, seed: Optional[int] = None,
+                 early_abort: bool = False, abort_on_global_best: bool = False, screening_top_k: int = 0,
+                 screening_tool: Optional[BaseSimulater] = None, profile: bool = False,
+                 stability_screen: bool = False, stability_penalty: float = 1e3, stability_audit: bool = False):
         self.num_particles = int(swarm_size)
         self.num_iterations = int(max_iterations)
         self.w = w
         self.c1 = c1
         self.c2 = c2
+        # num_workers > 1 时整代粒子并行评估，必然使用同步代更新：同一 seed 下与默认的异步串行（synchronous=False）
+        # 结果不同，与 num_workers=1, synchronous=True 的结果相同
+        self.num_workers = int(num_workers)
+        # screening_top_k > 0 时每代先用平均模型（screening_tool，默认按 FMU 的 Vin/L/C/负载参数构造）粗筛，
+        # 只有前 screening_top_k 个粒子用 FMU 仿真；粗筛也按整代进行，同样使用同步代更新
+        self.screening_top_k = int(screening_top_k)
+        self.screening_tool = screening_tool
+        # stability_screen 时每代先对平均模型线性化求闭环特征值（StabilityScreen），线性化不稳定或最慢模态在仿真时长内
+        # 衰减不到 1/e 的粒子再批量仿真一小段平均模型，确实发散的粒子不仿真，得分记为 stability_penalty + 谱半径；
+        # stability_audit 时整代再用平均模型完整仿真一遍，统计预筛与仿真结论的一致率（每代多一次批量仿真，默认关闭）
+        self.stability_screen = bool(stability_screen)
+        self.stability_penalty = float(stability_penalty)
+        self.stability_audit = bool(stability_audit)
+        self.synchronous = (bool(synchronous) or self.num_workers > 1 or self.screening_top_k > 0
+                            or self.stability_screen)
+        # 统计仿真、评估和目标函数各阶段的耗时，结果写入 OptimizationResult.timing
+        self.profile = bool(profile)
+        self.seed = None if seed is None else int(seed)
+        # 提前终止：仿真中得分下界超过粒子个体最优（或全局最优）时停止仿真
+        # 以个体最优为阈值时被终止的候选本来也不会更新任何最优，优化结果不变
+        self.early_abort = bool(early_abort) or bool(abort_on_global_best)
+        self.abort_on_global_best = bool(abort_on_global_best)
+        # (control_params, 编译后的 ControlParamLayout)，同一次优化中只编译一次
+        self._layout = None
+
+    def _param_layout(self, control_params: ControlParams) -> ControlParamLayout:
+        if self._layout is None or self._layout[0] is not control_params:
+            # 粒子各维对应控制器注册表中 duallooppid 的可整定参数
+            tuned_params = get_controller_info('duallooppid').tuned_params
+            self._layout = (control_params, ControlParamLayout(control_params, tuned_params))
+        return self._layout[1]
+
+    @staticmethod
+    def default_bounds() -> List[Tuple[float, float]]:
+        """控制器注册表中 duallooppid 各可整定参数的默认搜索范围，顺序与粒子各维相同"""
+        return [bound for _, bound in get_controller_info('duallooppid').bounds]
+
+    def _abort_threshold(self, personal_best_score: float, global_best_score: float) -> float:
+        if not self.early_abort:
+            return np.inf
+        return global_best_score if self.abort_on_global_best else personal_best_score
+
+    def _create_executor(self, simulation_tool: BaseSimulater, objective_args: tuple):
+        # 批量仿真工具在进程内一次推进整个粒子群，不需要进程池
+        if self.num_workers <= 1 or simulation_tool.supports_batch:
+            return nullcontext()
+        return ProcessPoolExecutor(max_workers=self.num_workers, initializer=_init_evaluation_worker,
+                                   initargs=(self,) + objective_args)
 
     def optimize(self, fmu_path: str, control_tool: ControllerFactory, control_params: ControlParams,
                  simulation_tool: SimulationFactory, simulation_params: SimulationParams,
                  evaluater_tool: EvaluateFactory, evaluate_params: EvaluateParams,
-                 bounds: List[Tuple[float, float]], initial_params: List[float]) -> OptimizationResult:
+                 bounds: Optional[List[Tuple[float, float]]], initial_params: List[float]) -> OptimizationResult:
+        objective_args = (fmu_path, control_tool, control_params, simulation_tool, simulation_params,
+                          evaluater_tool, evaluate_params)
+        # 未给出 bounds 时使用注册表中的默认搜索范围
+        if bounds is None:
+            bounds = self.default_bounds()
+        screening = None
+        if self.screening_top_k > 0:
+            screening = _Screening(self._create_screening_tool(fmu_path, simulation_tool), self.screening_top_k)
+        stability = None
+        if self.stability_screen:
+            stability = self._create_stability_screen(fmu_path, simulation_tool, simulation_params)
+        if not self.profile:
+            with self._create_executor(simulation_tool, objective_args) as executor:
+                return self._optimize(objective_args, bounds, initial_params, executor, screening, stability)
+
+        with profiling() as profiler:
+            with self._create_executor(simulation_tool, objective_args) as executor, \
+                    profiler.time('optimize.total'):
+                result = self._optimize(objective_args, bounds, initial_params, executor, screening, stability)
+        result.timing = profiler.summary()
+        return result
+
+    @staticmethod
+    def _averaged_tool_class():
+        from AveragedSimulationTool import AveragedBoostSimulationTool
+        from JITSimulationTool import JITAveragedBoostSimulationTool, NUMBA_AVAILABLE
+        return JITAveragedBoostSimulationTool if NUMBA_AVAILABLE else AveragedBoostSimulationTool
+
+    def _create_screening_tool(self, fmu_path: str, simulation_tool: BaseSimulater) -> BaseSimulater:
+        if self.screening_tool is not None:
+            return self.screening_tool
+        from AveragedSimulationTool import BoostPlantParams
+        tool_class = self._averaged_tool_class()
+        if isinstance(simulation_tool, BoostSimulationTool):
+            return tool_class(BoostPlantParams.from_fmu(fmu_path, simulation_tool.fmu_pool))
+        return tool_class()
+
+    def _create_stability_screen(self, fmu_path: str, simulation_tool: BaseSimulater,
+                                 simulation_params: SimulationParams):
+        from StabilityScreen import StabilityScreen, VERIFY_TIME
+        from AveragedSimulationTool import BoostPlantParams
+        # 对象参数优先取仿真工具自身的平均模型参数（平均模型、ODE 后端），只有 FMU 仿真才读取 FMU；
+        # 发散验证和一致率都用同一组参数的平均模型批量仿真
+        plant_params = getattr(simulation_tool, 'plant_params', None)
+        if plant_params is None:
+            if isinstance(simulation_tool, BoostSimulationTool):
+                plant_params = BoostPlantParams.from_fmu(fmu_path, simulation_tool.fmu_pool)
+            else:
+                plant_params = BoostPlantParams()
+        tool = self._averaged_tool_class()(plant_params)
+        verify_params = SimulationParams(**{**simulation_params.dict(), 'record_every': 1,
+                                            'simulation_time': min(VERIFY_TIME, simulation_params.simulation_time)})
+        return StabilityScreen(plant_params, simulation_params.target_voltage,
+                               simulation_params.get_control_period(),
+                               min_decay_rate=1 / simulation_params.simulation_time,
+                               verify_tool=tool, verify_params=verify_params,
+                               audit_tool=tool if self.stability_audit else None)
+
+    def _evaluate_generation(self, particles: np.ndarray, objective_args: tuple,
+                             executor: Optional[ProcessPoolExecutor], abort_thresholds: Optional[List[float]],
+                             screening: Optional[_Screening],
+                             stability=None) -> Tuple[np.ndarray, List[Dict[str, float]]]:
+        if stability is None:
+            return self._evaluate_candidates(particles, objective_args, executor, abort_thresholds, screening)
+
+        control_params, simulation_params = objective_args[2], objective_args[4]
+        with timed_phase('objective.stability_screen'):
+            verdict = stability.screen(particles, control_params)
+        if stability.audit_tool is not None:
+            with timed_phase('objective.stability_audit'):
+                stability.audit(particles, control_params, simulation_params, verdict)
+
+        # 不稳定的粒子不仿真；惩罚得分随谱半径增大，整代都不稳定时仍能比较
+        scores = self.stability_penalty + verdict.spectral_radius
+        details = [{'unstable': 1.0, **verdict.margins(i)} for i in range(len(particles))]
+        stable = np.flatnonzero(verdict.stable)
+        if len(stable):
+            stable_scores, stable_details = self._evaluate_candidates(
+                particles[stable], objective_args, executor,
+                None if abort_thresholds is None else [abort_thresholds[i] for i in stable], screening)
+            for i, score, d in zip(stable, stable_scores, stable_details):
+                scores[i] = score
+                details[i] = {**d, **verdict.margins(i)}
+        return scores, details
+
+    def _evaluate_candidates(self, particles: np.ndarray, objective_args: tuple,
+                             executor: Optional[ProcessPoolExecutor], abort_thresholds: Optional[List[float]],
+                             screening: Optional[_Screening]) -> Tuple[np.ndarray, List[Dict[str, float]]]:
+        if screening is None:
+            return self.evaluate_swarm(particles, *objective_args, executor=executor,
+                                       abort_thresholds=abort_thresholds)
+
+        fmu_path, control_tool, control_params, simulation_tool, simulation_params, \
+            evaluater_tool, evaluate_params = objective_args
+        screened_scores, screened_details = self.evaluate_swarm(
+            particles, fmu_path, control_tool, control_params, screening.tool, simulation_params,
+            evaluater_tool, evaluate_params)
+        # NaN 排在最后
+        top = np.argsort(screened_scores, kind='stable')[:screening.top_k]
+        fmu_scores, fmu_details = self.evaluate_swarm(
+            particles[top], *objective_args, executor=executor,
+            abort_thresholds=None if abort_thresholds is None else [abort_thresholds[i] for i in top])
+        screening.screened_evaluations += len(particles)
+        screening.fmu_evaluations += len(top)
+        screening.record(screened_scores[top], fmu_scores, fmu_details)
+
+        # 未经 FMU 验证的粒子得分记为 inf，不会成为个体或全局最优
+        scores = np.full(len(particles), np.inf)
+        details = [{**d, 'screened_score': float(s), 'screened_out': 1.0}
+                   for s, d in zip(screened_scores, screened_details)]
+        for i, score, d in zip(top, fmu_scores, fmu_details):
+            scores[i] = score
+            details[i] = {**d, 'screened_score': float(screened_scores[i])}
+        return scores, details
+
+    def _optimize(self, objective_args: tuple, bounds: List[Tuple[float, float]], initial_params: List[float],
+                  executor: Optional[ProcessPoolExecutor],
+                  screening: Optional[_Screening] = None, stability=None) -> OptimizationResult:
+        if self.seed is not None:
+            np.random.seed(self.seed)
         particles = np.random.rand(self.num_particles - 1, len(bounds))
         for i in range(len(bounds)):
             particles[:, i] = particles[:, i] * (bounds[i][1] - bounds[i][0]) + bounds[i][0]
@@ -49,15 +287,9 @@ class PSOOptimizer(BaseOptimizer):
         velocities = np.random.randn(self.num_particles, len(bounds)) * 0.01
 
         personal_best_positions = particles.copy()
-        personal_best_scores = []
-        personal_best_details = []
-        for p in particles:
-            score, details = self.objective_function(p, fmu_path, control_tool, control_params,
-                                                     simulation_tool, simulation_params,
-                                                     evaluater_tool, evaluate_params)
-            personal_best_scores.append(score)
-            personal_best_details.append(details)
-        personal_best_scores = np.array(personal_best_scores)
+        personal_best_scores, personal_best_details = self._evaluate_generation(particles, objective_args,
+                                                                                executor, None, screening,
+                                                                                stability)
         global_best_index = np.argmin(personal_best_scores)
         global_best_position = personal_best_positions[global_best_index]
         global_best_score = personal_best_scores[global_best_index]
@@ -66,73 +298,215 @@ class PSOOptimizer(BaseOptimizer):
         iteration_results = []
         best_params_array = []
 
+        lower = np.array([b[0] for b in bounds])
+        upper = np.array([b[1] for b in bounds])
+
         for iteration in range(self.num_iterations):
             print(f"\nIteration {iteration + 1}/{self.num_iterations}")
-            for i in range(self.num_particles):
-                r1, r2 = np.random.rand(2)
-                velocities[i] = (self.w * velocities[i] +
-                                 self.c1 * r1 * (personal_best_positions[i] - particles[i]) +
-                                 self.c2 * r2 * (global_best_position - particles[i]))
-                particles[i] += velocities[i]
-
-                for j in range(len(bounds)):
-                    particles[i, j] = np.clip(particles[i, j], bounds[j][0], bounds[j][1])
-
-                score, details = self.objective_function(particles[i], fmu_path, control_tool, control_params,
-                                                         simulation_tool, simulation_params,
-                                                         evaluater_tool, evaluate_params)
-
-                print(f"Particle {i + 1}: params={particles[i]}, Score={score:.4f}")
-
-                if score < personal_best_scores[i]:
-                    personal_best_scores[i] = score
-                    personal_best_positions[i] = particles[i]
-                    personal_best_details[i] = details
-
-                if score < global_best_score:
-                    global_best_score = score
-                    global_best_position = particles[i]
-                    global_best_details = details
+            aborted_particles = []
+            if self.synchronous:
+                # 同步代更新：先用同一全局最优移动所有粒子，整代评估后再更新最优
+                # 随机数抽取顺序与逐个粒子调用 np.random.rand(2) 相同
+                r = np.random.rand(self.num_particles, 2)
+                velocities = (self.w * velocities +
+                              self.c1 * r[:, :1] * (personal_best_positions - particles) +
+                              self.c2 * r[:, 1:] * (global_best_position - particles))
+                particles = np.clip(particles + velocities, lower, upper)
+
+                thresholds = [self._abort_threshold(personal_best_scores[i], global_best_score)
+                              for i in range(self.num_particles)]
+                scores, details_list = self._evaluate_generation(particles, objective_args, executor,
+                                                                 thresholds, screening, stability)
+
+                for i in range(self.num_particles):
+                    score, details = scores[i], details_list[i]
+                    if details.get('aborted'):
+                        aborted_particles.append(i + 1)
+                    if details.get('unstable'):
+                        print(f"Particle {i + 1}: params={particles[i]}, "
+                              f"Unstable (spectral radius {details['spectral_radius']:.4f}, not simulated)")
+                    elif details.get('screened_out'):
+                        print(f"Particle {i + 1}: params={particles[i]}, "
+                              f"Screened={details['screened_score']:.4f} (not verified)")
+                    else:
+                        print(f"Particle {i + 1}: params={particles[i]}, Score={score:.4f}"
+                              f"{' (aborted)' if details.get('aborted') else ''}")
+
+                    if score < personal_best_scores[i]:
+                        personal_best_scores[i] = score
+                        personal_best_positions[i] = particles[i]
+                        personal_best_details[i] = details
+
+                    if score < global_best_score:
+                        global_best_score = score
+                        global_best_position = particles[i].copy()
+                        global_best_details = details
+            else:
+                for i in range(self.num_particles):
+                    r1, r2 = np.random.rand(2)
+                    velocities[i] = (self.w * velocities[i] +
+                                     self.c1 * r1 * (personal_best_positions[i] - particles[i]) +
+                                     self.c2 * r2 * (global_best_position - particles[i]))
+                    particles[i] += velocities[i]
+
+                    for j in range(len(bounds)):
+                        particles[i, j] = np.clip(particles[i, j], bounds[j][0], bounds[j][1])
+
+                    score, details = self.objective_function(
+                        particles[i], *objective_args,
+                        abort_threshold=self._abort_threshold(personal_best_scores[i], global_best_score))
+                    if details.get('aborted'):
+                        aborted_particles.append(i + 1)
+
+                    print(f"Particle {i + 1}: params={particles[i]}, Score={score:.4f}"
+                          f"{' (aborted)' if details.get('aborted') else ''}")
+
+                    if score < personal_best_scores[i]:
+                        personal_best_scores[i] = score
+                        personal_best_positions[i] = particles[i]
+                        personal_best_details[i] = details
+
+                    if score < global_best_score:
+                        global_best_score = score
+                        global_best_position = particles[i]
+                        global_best_details = details
 
             best_params_array.append(global_best_position.tolist())
             print(f"Best score this iteration: {global_best_score:.4f}")
-            iteration_results.append({
+            iteration_result = {
                 'iteration': iteration + 1,
                 'best_score': float(global_best_score),
                 'best_params': global_best_position.tolist(),
-                'best_details': global_best_details
-            })
+                'best_details': global_best_details,
+                'aborted_particles': aborted_particles
+            }
+            if screening is not None:
+                iteration_result['rank_correlation'] = screening.last_correlation
+            iteration_results.append(iteration_result)
+
+        screening_summary = None
+        if screening is not None:
+            screening_summary = screening.summary()
+            print(f"Screening: {screening_summary['fmu_evaluations']} FMU simulations for "
+                  f"{screening_summary['screened_evaluations']} candidates, "
+                  f"rank correlation {screening_summary['rank_correlation']:.3f}")
+
+        stability_summary = None
+        if stability is not None:
+            stability_summary = stability.summary()
+            print(f"Stability screen: {stability_summary['rejected']} of {stability_summary['evaluations']} "
+                  f"candidates rejected without simulation ({stability_summary['verified']} verified by a short "
+                  f"averaged-model run), agreement with averaged-model simulation "
+                  f"{stability_summary['agreement_rate']:.3f} ({stability_summary['audited']} audited)")
 
         return OptimizationResult(
             best_params=global_best_position.tolist(),
             best_score=float(global_best_score),
             best_details=global_best_details,
             iteration_results=iteration_results,
-            best_params_array=best_params_array
+            best_params_array=best_params_array,
+            screening=screening_summary,
+            stability=stability_summary
         )
 
     def objective_function(self, params: List[float], fmu_path: str,
                            control_tool: BaseController, control_params: ControlParams,
                            simulation_tool: BaseSimulater, simulation_params: SimulationParams,
-                           evaluater_tool: EvaluateFactory, evaluate_params: EvaluateParams) -> Tuple[float, Dict[str, float]]:
-        # Update control_params with the current particle's parameters
-        updated_control_params = ControlParams(
-            control_params={**control_params.control_params,
-                            'voltage_k': params[0], 'voltage_Ti': params[1],
-                            'current_k': params[2], 'current_Ti': params[3]}
-        )
-
-        # Create controller
-        controller = ControllerFactory.create_controller("duallooppid", updated_control_params)
-
-        # Run simulation
-        simulation_result = simulation_tool.simulate(fmu_path, simulation_params, controller)
+                           evaluater_tool: EvaluateFactory, evaluate_params: EvaluateParams,
+                           abort_threshold: float = np.inf) -> Tuple[float, Dict[str, float]]:
+        with timed_phase('objective.total'):
+            return self._objective_function(params, fmu_path, control_tool, control_params, simulation_tool,
+                                            simulation_params, evaluater_tool, evaluate_params, abort_threshold)
+
+    def _objective_function(self, params: List[float], fmu_path: str,
+                            control_tool: BaseController, control_params: ControlParams,
+                            simulation_tool: BaseSimulater, simulation_params: SimulationParams,
+                            evaluater_tool: EvaluateFactory, evaluate_params: EvaluateParams,
+                            abort_threshold: float = np.inf) -> Tuple[float, Dict[str, float]]:
+        with timed_phase('objective.controller_construction'):
+            # 粒子各维按编译好的参数布局写入，直接构造控制器，不再逐次构造和校验 ControlParams
+            controller = self._param_layout(control_params).controller(params)
+
+        # 相同参数（如 initial_params、裁剪到同一边界角的粒子）直接取缓存的得分
+        cache = simulation_tool.simulation_cache
+        if cache is not None:
+            with timed_phase('objective.cache_lookup'):
+                score_key = cache.score_key(
+                    cache.simulation_key(simulation_tool.cache_identity(fmu_path), simulation_params, controller),
+                    evaluater_tool)
+                cached = cache.get_score(score_key)
+            if cached is not None:
+                return cached
+
+        # 真正流式的仿真工具边仿真边评估，全程不保存轨迹
+        if simulation_tool.native_streaming and hasattr(evaluater_tool, 'score_bound'):
+            score_bound = evaluater_tool.score_bound(abort_threshold)
+            interval = simulation_tool.abort_check_interval
+            chunks = simulation_tool.simulate_iter(fmu_path, simulation_params, controller, chunk_size=interval)
+            with timed_phase('objective.simulate_streaming'):
+                for chunk in chunks:
+                    with timed_phase('evaluate.online_update'):
+                        exceeded = score_bound.update(chunk.times, chunk.voltages)
+                    # 与 simulate(score_bound=...) 一样只在完整的块之后判断是否提前终止
+                    if exceeded and len(chunk) == interval:
+                        chunks.close()
+                        return score_bound.lower_bound, {**score_bound.details(), 'aborted': 1.0}
+            score, details = score_bound.finalize()
+            if cache is not None:
+                cache.put_score(score_key, score, details)
+            return score, details
+
+        # Run simulation, stopping early once the score bound exceeds abort_threshold
+        if np.isfinite(abort_threshold) and hasattr(evaluater_tool, 'score_bound'):
+            score_bound = evaluater_tool.score_bound(abort_threshold)
+            simulation_result = simulation_tool.simulate(fmu_path, simulation_params, controller,
+                                                         score_bound=score_bound)
+            if simulation_result.aborted:
+                # 下界已超过阈值，用下界代替得分
+                return score_bound.lower_bound, {**score_bound.details(), 'aborted': 1.0}
+        else:
+            simulation_result = simulation_tool.simulate(fmu_path, simulation_params, controller)
 
         # Evaluate results
         score, details = evaluater_tool.evaluate(simulation_result)
+        if cache is not None:
+            cache.put_score(score_key, score, details)
 
         return score, details
 
+    def evaluate_swarm(self, particles: np.ndarray, fmu_path: str,
+                       control_tool: BaseController, control_params: ControlParams,
+                       simulation_tool: BaseSimulater, simulation_params: SimulationParams,
+                       evaluater_tool: EvaluateFactory, evaluate_params: EvaluateParams,
+                       executor: Optional[ProcessPoolExecutor] = None,
+                       abort_thresholds: Optional[List[float]] = None) -> Tuple[np.ndarray, List[Dict[str, float]]]:
+        # 支持批量仿真的工具（如 boost-averaged）一次推进整个粒子群
+        if simulation_tool.supports_batch:
+            with timed_phase('objective.evaluate_batch'):
+                return simulation_tool.evaluate_batch(particles, control_params, simulation_params, evaluater_tool)
+
+        if abort_thresholds is None:
+            abort_thresholds = [np.inf] * len(particles)
+
+        if executor is not None:
+            results = list(executor.map(_evaluate_particle, particles, abort_thresholds))
+            profiler = get_profiler()
+            if profiler is not None:
+                for _, worker_profiler in results:
+                    profiler.merge(worker_profiler)
+            return np.array([score for (score, _), _ in results]), [details for (_, details), _ in results]
+
+        scores = []
+        details_list = []
+        for p, abort_threshold in zip(particles, abort_thresholds):
+            score, details = self.objective_function(p, fmu_path, control_tool, control_params,
+                                                     simulation_tool, simulation_params,
+                                                     evaluater_tool, evaluate_params,
+                                                     abort_threshold=abort_threshold)
+            scores.append(score)
+            details_list.append(details)
+        return np.array(scores), details_list
+
 class GAOptimizer(BaseOptimizer):
     def __init__(self, population_size: int, max_generations: int):
         self.population_size = population_size
@@ -141,7 +515,7 @@ class GAOptimizer(BaseOptimizer):
     def optimize(self, fmu_path: str, control_tool: ControllerFactory, control_params: ControlParams,
                  simulation_tool: SimulationFactory, simulation_params: SimulationParams,
                  evaluater_tool: EvaluateFactory, evaluate_params: EvaluateParams,
-                 bounds: List[Tuple[float, float]], initial_params: List[float]) -> OptimizationResult:
+                 bounds: Optional[List[Tuple[float, float]]], initial_params: List[float]) -> OptimizationResult:
         # Implement GA algorithm here
         raise NotImplementedError("GA optimization not implemented yet")
 
@@ -214,8 +588,8 @@ if __name__ == "__main__":
         post_integrated_error_coefficient=1.0
     )
     evaluater_tool = EvaluateFactory.create_evaluater("duallooppid", evaluate_params)
-    # Define optimization bounds
-    bounds = [(0, 10), (0, 10), (0, 10), (0, 10)]  # Bounds for inner_k, inner_Ti, outer_k, outer_Ti
+    # bounds=None: search ranges of voltage_k, voltage_Ti, current_k, current_Ti from the controller registry
+    bounds = None
 
     # Use PSOOptimizer to optimize
     optimization_result = pso_optimizer.optimize(
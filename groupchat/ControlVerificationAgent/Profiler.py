@@ -0,0 +1,144 @@
+"""按阶段统计耗时的可选剖析器。
+
+默认不启用，热点代码只做一次 get_profiler() 判断，没有额外开销；启用后仿真循环中的 FMU 和控制器调用
+通过 TimedProxy 计时，循环本身不变：
+
+    profiler = Profiler()
+    with profiling(profiler):
+        tool.simulate(fmu_path, simulation_params, controller)
+    print(profiler.summary())
+"""
+import math
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Dict, Iterator, List, Optional
+
+# 耗时直方图：从 1ns 到 1000s，每十倍 20 个桶，百分位数的相对误差约 12%，内存固定且可以跨进程合并
+_BINS_PER_DECADE = 20
+_MIN_EXPONENT = -9
+_NUM_BINS = 12 * _BINS_PER_DECADE
+
+class PhaseStats:
+    __slots__ = ('count', 'total', 'max', 'histogram')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.histogram: List[int] = [0] * _NUM_BINS
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        if seconds > 0:
+            index = int((math.log10(seconds) - _MIN_EXPONENT) * _BINS_PER_DECADE)
+            self.histogram[min(max(index, 0), _NUM_BINS - 1)] += 1
+        else:
+            self.histogram[0] += 1
+
+    def merge(self, other: 'PhaseStats'):
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        self.histogram = [a + b for a, b in zip(self.histogram, other.histogram)]
+
+    def percentile(self, q: float) -> float:
+        """q 分位数（0~1），取所在直方图桶的上沿，不超过最大值"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for index, n in enumerate(self.histogram):
+            cumulative += n
+            if n and cumulative >= rank:
+                return min(10 ** (_MIN_EXPONENT + (index + 1) / _BINS_PER_DECADE), self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            'count': self.count,
+            'total_s': self.total,
+            'mean_s': self.total / self.count if self.count else 0.0,
+            'p50_s': self.percentile(0.5),
+            'p90_s': self.percentile(0.9),
+            'p99_s': self.percentile(0.99),
+            'max_s': self.max
+        }
+
+class Profiler:
+    """各阶段的调用次数、累计耗时和百分位耗时；可以 pickle，worker 进程的结果用 merge 合并"""
+
+    def __init__(self):
+        self.phases: Dict[str, PhaseStats] = {}
+
+    def add(self, phase: str, seconds: float):
+        stats = self.phases.get(phase)
+        if stats is None:
+            stats = self.phases[phase] = PhaseStats()
+        stats.add(seconds)
+
+    @contextmanager
+    def time(self, phase: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(phase, time.perf_counter() - start)
+
+    def timed(self, func: Callable, phase: str) -> Callable:
+        perf_counter = time.perf_counter
+        add = self.add
+
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                add(phase, perf_counter() - start)
+        return wrapper
+
+    def merge(self, other: 'Profiler'):
+        for phase, stats in other.phases.items():
+            if phase in self.phases:
+                self.phases[phase].merge(stats)
+            else:
+                self.phases[phase] = stats
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        return {phase: self.phases[phase].summary() for phase in sorted(self.phases)}
+
+class TimedProxy:
+    """把对象的指定方法替换为计时版本，其余属性原样转发"""
+
+    def __init__(self, target, profiler: Profiler, phases: Dict[str, str]):
+        self._target = target
+        for method, phase in phases.items():
+            setattr(self, method, profiler.timed(getattr(target, method), phase))
+
+    def __getattr__(self, name):
+        return getattr(self._target, name)
+
+_active: Optional[Profiler] = None
+_NULL_CONTEXT = nullcontext()
+
+def get_profiler() -> Optional[Profiler]:
+    return _active
+
+@contextmanager
+def profiling(profiler: Optional[Profiler] = None) -> Iterator[Profiler]:
+    """在 with 块内启用剖析器（可嵌套，退出时恢复之前的状态）"""
+    global _active
+    previous = _active
+    _active = profiler if profiler is not None else Profiler()
+    try:
+        yield _active
+    finally:
+        _active = previous
+
+def timed_phase(phase: str):
+    """启用剖析时计时 phase，否则返回共享的空上下文"""
+    if _active is None:
+        return _NULL_CONTEXT
+    return _active.time(phase)
@@ -0,0 +1,244 @@
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+from typing import Dict, Optional, Tuple
+import numpy as np
+
+# 默认缓存上限：1s / 1e-4 的一条轨迹约 320KB，约 800 条
+DEFAULT_MAX_BYTES = 256 << 20
+
+def default_cache_dir() -> str:
+    """用户缓存目录，不写入源码树：Windows 为 %LOCALAPPDATA%，macOS 为 ~/Library/Caches，其余遵循 XDG_CACHE_HOME"""
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), 'AppData', 'Local')
+    elif sys.platform == 'darwin':
+        base = os.path.join(os.path.expanduser('~'), 'Library', 'Caches')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'PEControlAgent', 'SimulationCache')
+
+def _plain(value):
+    """把参数对象转换为可以稳定序列化为 JSON 的结构"""
+    # pydantic 2 中 dict() 已弃用（每次调用都发出 DeprecationWarning），有 model_dump 时优先使用
+    if callable(getattr(value, 'model_dump', None)):
+        value = value.model_dump()
+    elif hasattr(value, 'dict') and callable(value.dict):
+        value = value.dict()
+    if isinstance(value, dict):
+        return {str(k): _plain(v) for k, v in sorted(value.items())}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_plain(v) for v in value]
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        # repr 保留全部有效位，避免两个不同的浮点数得到相同的键
+        return repr(float(value))
+    return value
+
+# _json_detail 无法转换的值
+_UNSERIALIZABLE = object()
+
+def _json_detail(value):
+    """评估细节转换为可写入 JSON 的值：数值转为 float，字符串和 None 原样保留，字典和序列逐项转换，
+    其中无法转换的项跳过；其它类型返回 _UNSERIALIZABLE"""
+    if isinstance(value, (int, float, np.integer, np.floating, np.bool_)):
+        return float(value)
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, dict):
+        items = ((str(k), _json_detail(v)) for k, v in value.items())
+        return {k: v for k, v in items if v is not _UNSERIALIZABLE}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [v for v in map(_json_detail, value) if v is not _UNSERIALIZABLE]
+    return _UNSERIALIZABLE
+
+def _attributes(obj) -> Dict:
+    """实例属性，包括 __slots__ 中声明的"""
+    attributes = dict(getattr(obj, '__dict__', {}))
+    for cls in type(obj).__mro__:
+        for name in getattr(cls, '__slots__', ()):
+            if hasattr(obj, name):
+                attributes.setdefault(name, getattr(obj, name))
+    return attributes
+
+def _is_object(value) -> bool:
+    return (hasattr(value, '__dict__') or bool(getattr(type(value), '__slots__', None))) and not isinstance(value, type)
+
+def controller_fingerprint(controller) -> Dict:
+    """控制器类型名及其全部数值属性（增益、限幅和当前积分状态），嵌套的子控制器递归展开"""
+    state = {}
+    for name, value in sorted(_attributes(controller).items()):
+        if isinstance(value, (int, float, np.integer, np.floating, str, list, tuple, np.ndarray)):
+            # 字符串和序列：如状态空间控制器的抗饱和方式和矩阵
+            state[name] = _plain(value)
+        elif _is_object(value):
+            state[name] = controller_fingerprint(value)
+    return {'controller': type(controller).__name__, 'state': state}
+
+def evaluater_fingerprint(evaluater) -> Dict:
+    fingerprint = {'evaluater': type(evaluater).__name__,
+                   'params': _plain(getattr(evaluater, 'params', None)),
+                   'load_switch_time': _plain(getattr(evaluater, 'load_switch_time', None))}
+    # 只在开启时加入，已有缓存条目的键保持不变
+    if getattr(evaluater, 'post_switch_only', False):
+        fingerprint['post_switch_only'] = True
+    return fingerprint
+
+def hash_key(*parts) -> str:
+    payload = json.dumps([_plain(part) for part in parts], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class SimulationCache:
+    """按内容寻址的磁盘缓存：轨迹存为 <key>.npy，得分和评估细节存为 <key>.json；
+    每次命中刷新文件修改时间，超出条目数或总大小时按最久未使用的顺序删除"""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_entries: Optional[int] = None):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._total_bytes = None
+        self._total_entries = None
+        self.hits = 0
+        self.misses = 0
+
+    def __getstate__(self):
+        # 缓存对象随仿真工具一起 pickle 到 worker 进程，锁和计数在各进程内重新建立
+        state = self.__dict__.copy()
+        state.update(_lock=None, _total_bytes=None, _total_entries=None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def simulation_key(self, simulator_identity: Dict, simulation_params, controller) -> str:
+        return hash_key(simulator_identity, simulation_params, controller_fingerprint(controller))
+
+    def score_key(self, simulation_key: str, evaluater) -> str:
+        return hash_key(simulation_key, evaluater_fingerprint(evaluater))
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + suffix)
+
+    def _touch(self, path: str):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def get_trajectory(self, key: str) -> Optional[np.ndarray]:
+        path = self._path(key, '.npy')
+        try:
+            data = np.load(path)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self._touch(path)
+        self.hits += 1
+        return data
+
+    def put_trajectory(self, key: str, data: np.ndarray):
+        self._write(self._path(key, '.npy'), lambda f: np.save(f, np.ascontiguousarray(data)))
+
+    def get_score(self, key: str) -> Optional[Tuple[float, Dict[str, float]]]:
+        path = self._path(key, '.json')
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self._touch(path)
+        self.hits += 1
+        return entry['score'], entry['details']
+
+    def put_score(self, key: str, score: float, details: Dict[str, float]):
+        # 无法写入 JSON 的细节（如评估器返回的任意对象）跳过，不让缓存写入中断目标函数
+        entry = {'score': float(score), 'details': _json_detail(details)}
+        self._write(self._path(key, '.json'), lambda f: f.write(json.dumps(entry).encode('utf-8')))
+
+    def _write(self, path: str, writer):
+        # 写入临时文件后原子替换，并行 worker 同时写同一个键也不会读到半个文件
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix='.tmp', dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                writer(f)
+            replaced = os.path.exists(path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        if not replaced:
+            self._account(os.path.getsize(path), 1)
+
+    def _entries(self):
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith('.npy') or name.endswith('.json'):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    yield stat.st_mtime_ns, stat.st_size, path
+
+    def _account(self, size: int, count: int):
+        with self._lock:
+            if self._total_bytes is None:
+                entries = list(self._entries())
+                self._total_bytes = sum(size for _, size, _ in entries)
+                self._total_entries = len(entries)
+            else:
+                self._total_bytes += size
+                self._total_entries += count
+            over = (self._total_bytes > self.max_bytes or
+                    (self.max_entries is not None and self._total_entries > self.max_entries))
+        if over:
+            self.evict()
+
+    def evict(self):
+        """删除最久未使用的条目，直到回到上限的 90% 以下，避免每次写入都触发扫描"""
+        entries = sorted(self._entries())
+        total_bytes = sum(size for _, size, _ in entries)
+        total_entries = len(entries)
+        byte_limit = 0.9 * self.max_bytes
+        entry_limit = None if self.max_entries is None else 0.9 * self.max_entries
+        for _, size, path in entries:
+            if total_bytes <= byte_limit and (entry_limit is None or total_entries <= entry_limit):
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total_bytes -= size
+            total_entries -= 1
+        with self._lock:
+            self._total_bytes = total_bytes
+            self._total_entries = total_entries
+
+    def clear(self):
+        for _, _, path in list(self._entries()):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        with self._lock:
+            self._total_bytes = 0
+            self._total_entries = 0
+
+_default_cache: Optional[SimulationCache] = None
+
+def get_simulation_cache() -> SimulationCache:
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = SimulationCache()
+    return _default_cache
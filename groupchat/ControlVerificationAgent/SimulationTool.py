@@ -1,70 +1,452 @@
+import copy
+import hashlib
+import pickle
 import numpy as np
-import matplotlib.pyplot as plt
-from pyfmi import load_fmu
-from typing import Type, Dict, List
+from typing import Dict, Iterator, List, Optional, Tuple
 from pydantic import BaseModel
 from abc import ABC, abstractmethod
 from ControlTool import ControlParams, ControllerFactory, BaseController
+from FMUPool import FMUPool, get_fmu_pool, load_fmu
+from SimulationCache import SimulationCache, get_simulation_cache
+from Downsampling import DEFAULT_PLOT_POINTS, EnvelopeRecorder, envelope
+from Profiler import TimedProxy, get_profiler, timed_phase
 
 class SimulationFactory:
     @staticmethod
     def create_simulation_tool(simulation_type: str):
         if simulation_type.lower() == "boost":
             return BoostSimulationTool()
+        elif simulation_type.lower() == "boost-averaged":
+            from AveragedSimulationTool import AveragedBoostSimulationTool
+            return AveragedBoostSimulationTool()
+        elif simulation_type.lower() == "boost-averaged-jit":
+            from JITSimulationTool import JITAveragedBoostSimulationTool
+            return JITAveragedBoostSimulationTool()
+        elif simulation_type.lower() == "boost-ode":
+            from ODESimulationTool import ODEBoostSimulationTool
+            return ODEBoostSimulationTool()
         else:
             raise ValueError(f"Unknown simulation type: {simulation_type}")
 
-class SimulationResult(BaseModel):
-    times: List[float]
-    voltages: List[float]
-    currents: List[float]
-    duty_cycles: List[float]
+class SimulationResult:
+    """列式仿真结果：各列是同一块连续 float64 数组 data 的行视图，读取时不复制"""
+    columns = ('times', 'voltages', 'currents', 'duty_cycles')
+    __slots__ = ('data', 'aborted', '_lists')
+
+    def __init__(self, times=None, voltages=None, currents=None, duty_cycles=None, data: np.ndarray = None,
+                 aborted: bool = False):
+        if data is None:
+            data = np.array([times, voltages, currents, duty_cycles], dtype=np.float64)
+        data = np.ascontiguousarray(data, dtype=np.float64)
+        if data.ndim != 2 or data.shape[0] != len(self.columns):
+            raise ValueError(f"SimulationResult data must have shape ({len(self.columns)}, n), got {data.shape}")
+        self.data = data
+        # 提前终止的仿真只包含终止前的采样
+        self.aborted = aborted
+        self._lists = None
+
+    @classmethod
+    def empty(cls, n: int) -> 'SimulationResult':
+        return cls(data=np.zeros((len(cls.columns), n)))
+
+    @property
+    def times(self) -> np.ndarray:
+        return self.data[0]
+
+    @property
+    def voltages(self) -> np.ndarray:
+        return self.data[1]
+
+    @property
+    def currents(self) -> np.ndarray:
+        return self.data[2]
+
+    @property
+    def duty_cycles(self) -> np.ndarray:
+        return self.data[3]
+
+    def __len__(self) -> int:
+        return self.data.shape[1]
+
+    def truncated(self, n: int) -> 'SimulationResult':
+        return SimulationResult(data=self.data[:, :n], aborted=True)
+
+    def envelope(self, max_points: int = DEFAULT_PLOT_POINTS) -> 'SimulationResult':
+        """绘图用的抽稀结果：每个时间桶保留电压、电流、占空比的最小值和最大值点，纹波峰谷不丢失"""
+        return SimulationResult(data=envelope(self.data, max_points), aborted=self.aborted)
+
+    def to_lists(self) -> Dict[str, List[float]]:
+        """转换为 Python 列表，仅在 agent/JSON 边界需要时调用一次"""
+        if self._lists is None:
+            self._lists = {name: column.tolist() for name, column in zip(self.columns, self.data)}
+        return self._lists
+
+    def dict(self) -> Dict[str, List[float]]:
+        return self.to_lists()
 
 class SimulationParams(BaseModel):
     simulation_time: float
     target_voltage: float
     initial_voltage: float
     step_size: float
+    # 控制器采样周期，默认等于 step_size
+    control_period: Optional[float] = None
+    # FMU do_step 的通信步长，默认等于控制周期；控制周期必须是它的整数倍
+    communication_step: Optional[float] = None
+    # 每隔多少个控制周期记录一个采样
+    record_every: int = 1
+
+    def get_control_period(self) -> float:
+        return self.control_period or self.step_size
+
+    def communication_steps_per_control(self) -> int:
+        """每个控制周期内调用 do_step 的次数"""
+        control_period = self.get_control_period()
+        if self.communication_step is None:
+            return 1
+        ratio = control_period / self.communication_step
+        n = int(round(ratio))
+        if n < 1 or abs(ratio - n) > 1e-9 * ratio:
+            raise ValueError(f"control_period ({control_period}) must be an integer multiple of "
+                             f"communication_step ({self.communication_step})")
+        return n
+
+    def control_times(self) -> np.ndarray:
+        return np.arange(0, self.simulation_time, self.get_control_period())
+
+    def record_times(self) -> np.ndarray:
+        if self.record_every < 1:
+            raise ValueError(f"record_every must be >= 1, got {self.record_every}")
+        return self.control_times()[::self.record_every]
+
+class FMUSnapshot:
+    """BoostSimulationTool.snapshot 保存的分支起点：序列化的 FMU 状态（可以 pickle 到 worker 进程，
+    在同一 FMU 的任意实例上恢复）、控制器状态，以及快照之前的轨迹 prefix"""
+
+    def __init__(self, time: float, start_index: int, control_period: float, fmu_state, controller_state: Dict,
+                 prefix: SimulationResult):
+        self.time = time
+        # 分支仿真从第 start_index 个控制周期开始
+        self.start_index = start_index
+        self.control_period = control_period
+        self.fmu_state = fmu_state
+        self.controller_state = controller_state
+        self.prefix = prefix
+        self._digest = None
+
+    @property
+    def digest(self) -> str:
+        """快照内容的哈希，作为分支仿真缓存键的一部分"""
+        if self._digest is None:
+            payload = pickle.dumps((self.time, self.start_index, self.control_period, self.fmu_state,
+                                    self.controller_state), protocol=4)
+            self._digest = hashlib.sha256(payload).hexdigest()
+        return self._digest
+
+    def start_index_for(self, simulation_params: SimulationParams) -> int:
+        if simulation_params.get_control_period() != self.control_period:
+            raise ValueError(f"Snapshot was taken with control period {self.control_period}, "
+                             f"got {simulation_params.get_control_period()}")
+        if self.start_index >= len(simulation_params.control_times()):
+            raise ValueError(f"Simulation ends before the snapshot time {self.time}s")
+        return self.start_index
 
 class BaseSimulater(ABC):
+    # 每隔多少个采样把新数据交给 score_bound 检查一次是否可以提前终止
+    abort_check_interval = 100
+    # 仿真数值行为改变时加一，使旧的缓存结果失效
+    cache_version = 1
+    # 结果缓存，None 表示不缓存
+    simulation_cache: Optional[SimulationCache] = None
+    # simulate_iter 是否随仿真推进产出数据（默认实现要先跑完整个仿真）
+    native_streaming = False
+    # 是否提供 evaluate_batch 一次推进整个粒子群；PSOOptimizer 据此整代批量评估，且不再开进程池
+    supports_batch = False
+
+    def cache_identity(self, fmu_path: str) -> Dict:
+        """缓存键中标识仿真器本身的部分"""
+        return {'simulator': type(self).__name__, 'version': self.cache_version}
+
     @abstractmethod
     def simulate(self, fmu_path: str, simulation_params: SimulationParams,
-                 controller: BaseController) -> SimulationResult:
+                 controller: BaseController, score_bound: Optional['ScoreLowerBound'] = None) -> SimulationResult:
         pass
 
+    def record_times(self, simulation_params: SimulationParams) -> np.ndarray:
+        """simulate 结果中的时间点"""
+        return simulation_params.record_times()
+
+    def simulate_iter(self, fmu_path: str, simulation_params: SimulationParams, controller: BaseController,
+                      chunk_size: Optional[int] = None) -> Iterator[SimulationResult]:
+        """默认实现：完整仿真后按块切分，使所有仿真工具都能接流式消费者；BoostSimulationTool 覆盖为真正的流式仿真"""
+        result = self.simulate(fmu_path, simulation_params, controller)
+        chunk_size = chunk_size or self.abort_check_interval
+        for start in range(0, len(result), chunk_size):
+            yield SimulationResult(data=result.data[:, start:start + chunk_size])
+
+    def simulate_envelope(self, fmu_path: str, simulation_params: SimulationParams, controller: BaseController,
+                          max_points: int = DEFAULT_PLOT_POINTS,
+                          keep_full: bool = False) -> Tuple[SimulationResult, Optional[SimulationResult]]:
+        """边仿真边抽稀，返回 (绘图用的包络轨迹, 完整轨迹)；keep_full=False 时完整轨迹为 None，不保存全部采样"""
+        recorder = EnvelopeRecorder(len(self.record_times(simulation_params)), max_points, keep_full=keep_full)
+        for chunk in self.simulate_iter(fmu_path, simulation_params, controller):
+            recorder.update(chunk.data)
+        full = recorder.full()
+        return SimulationResult(data=recorder.result()), None if full is None else SimulationResult(data=full)
+
 class BoostSimulationTool(BaseSimulater):
+    # 每步读取的测量量和写入的占空比
+    output_names = ('voltageSensor.v', 'currentSensor.i')
+    input_name = 'const3.k'
+    native_streaming = True
+
+    def __init__(self, fmu_pool: Optional[FMUPool] = None, use_fmu_pool: bool = True,
+                 abort_check_interval: int = 100, simulation_cache: Optional[SimulationCache] = None,
+                 use_cache: bool = True, branch_from: Optional[FMUSnapshot] = None):
+        # 不直接持有默认池，工具对象可以被 pickle 到 worker 进程，每个进程各用自己的池
+        self._fmu_pool = fmu_pool
+        self.use_fmu_pool = use_fmu_pool
+        self.abort_check_interval = abort_check_interval
+        self._simulation_cache = simulation_cache
+        self.use_cache = use_cache
+        # 不为 None 时从该快照分支仿真，结果只包含快照时刻之后的采样
+        self.branch_from = branch_from
+
+    @property
+    def fmu_pool(self) -> FMUPool:
+        return self._fmu_pool or get_fmu_pool()
+
+    @property
+    def simulation_cache(self) -> Optional[SimulationCache]:
+        if not self.use_cache:
+            return None
+        return self._simulation_cache or get_simulation_cache()
+
+    def cache_identity(self, fmu_path: str) -> Dict:
+        # 按 FMU 文件内容而不是路径区分模型
+        identity = {**super().cache_identity(fmu_path), 'fmu': self.fmu_pool.extraction_cache.fmu_hash(fmu_path)}
+        # 自定义 loader（如 FakeBoostFMU）与 pyfmi 加载同一个 .fmu 得到的是不同的模型，按 loader 的限定名区分；
+        # 只在设置了 loader 时加入，pyfmi 仿真已有缓存条目的键保持不变
+        loader = self.fmu_pool.loader
+        if loader is not None:
+            identity['loader'] = (f"{getattr(loader, '__module__', type(loader).__module__)}."
+                                  f"{getattr(loader, '__qualname__', type(loader).__qualname__)}")
+        if self.branch_from is not None:
+            identity['branch'] = self.branch_from.digest
+        return identity
+
     def simulate(self, fmu_path: str, simulation_params: SimulationParams,
-                 controller: BaseController):
-        model = load_fmu(fmu_path)
+                 controller: BaseController, score_bound: Optional['ScoreLowerBound'] = None):
+        with timed_phase('simulate.total'):
+            return self._simulate(fmu_path, simulation_params, controller, score_bound)
+
+    def _simulate(self, fmu_path: str, simulation_params: SimulationParams,
+                  controller: BaseController, score_bound: Optional['ScoreLowerBound'] = None):
+        # 命中缓存时直接返回完整轨迹（控制器状态不会被推进），提前终止的结果不写入缓存
+        cache = self.simulation_cache
+        if cache is not None:
+            key = cache.simulation_key(self.cache_identity(fmu_path), simulation_params, controller)
+            data = cache.get_trajectory(key)
+            if data is not None:
+                return SimulationResult(data=data)
+
+        time = self.record_times(simulation_params)
+        result = SimulationResult.empty(len(time))
+        filled = 0
+        chunks = self.simulate_iter(fmu_path, simulation_params, controller, chunk_size=self.abort_check_interval)
+        for chunk in chunks:
+            n = len(chunk)
+            result.data[:, filled:filled + n] = chunk.data
+            filled += n
+            # 只在完整的块之后检查得分下界
+            if score_bound is not None and n == self.abort_check_interval:
+                if score_bound.update(chunk.times, chunk.voltages):
+                    chunks.close()
+                    return result.truncated(filled)
+
+        if cache is not None:
+            cache.put_trajectory(key, result.data)
+        return result
+
+    def simulate_iter(self, fmu_path: str, simulation_params: SimulationParams, controller: BaseController,
+                      chunk_size: Optional[int] = None) -> Iterator[SimulationResult]:
+        """随协同仿真推进逐块产出 chunk_size 个采样（最后一块可能更短）。
+
+        每块都是同一块缓冲区的视图，下一次迭代时会被覆盖，需要保留时请复制 chunk.data；
+        内存占用与仿真时长无关。提前停止迭代（close 或 break）时 FMU 实例正常终止并放回池中。
+        """
+        chunk_size = chunk_size or self.abort_check_interval
+        if not self.use_fmu_pool:
+            yield from self._simulate_iter(load_fmu(fmu_path), simulation_params, controller, chunk_size)
+            return
+
+        with timed_phase('simulate.acquire'):
+            key, model = self.fmu_pool.acquire(fmu_path)
+        try:
+            yield from self._simulate_iter(model, simulation_params, controller, chunk_size)
+        except GeneratorExit:
+            self.fmu_pool.release(key, model)
+            raise
+        except BaseException:
+            # 仿真出错时实例直接丢弃，不放回池中
+            try:
+                model.free_instance()
+            except Exception:
+                pass
+            raise
+        self.fmu_pool.release(key, model)
+
+    def _simulate_iter(self, model, simulation_params: SimulationParams, controller: BaseController,
+                       chunk_size: int) -> Iterator[SimulationResult]:
+        start_index = 0
+        if self.branch_from is not None:
+            start_index = self.branch_from.start_index_for(simulation_params)
+        profiler = get_profiler()
+        if profiler is not None:
+            # 启用剖析时才包一层计时代理，仿真循环本身不变
+            model = TimedProxy(model, profiler, {'do_step': 'simulate.do_step', 'get_real': 'simulate.get_real',
+                                                 'set_real': 'simulate.set_real'})
+            controller = TimedProxy(controller, profiler, {'update': 'simulate.controller_update'})
+        with timed_phase('simulate.initialize'):
+            self._initialize(model, controller, self.branch_from)
+        try:
+            yield from self._steps(model, simulation_params, controller, chunk_size, start_index)
+        except GeneratorExit:
+            model.terminate()
+            raise
+        model.terminate()
+
+    def _initialize(self, model, controller: BaseController, snapshot: Optional[FMUSnapshot] = None):
         model.setup_experiment(start_time=0)
         model.enter_initialization_mode()
         model.exit_initialization_mode()
+        if snapshot is not None:
+            state = model.deserialize_fmu_state(snapshot.fmu_state)
+            model.set_fmu_state(state)
+            model.free_fmu_state(state)
+            controller.set_state(snapshot.controller_state)
 
-        time = np.arange(0, simulation_params.simulation_time, simulation_params.step_size)
-        voltage = np.zeros_like(time)
-        current = np.zeros_like(time)
-        duty_cycle = np.zeros_like(time)
-
-        for i, t in enumerate(time):
-            model.do_step(t, simulation_params.step_size)
-            
-            actual_voltage = model.get('voltageSensor.v')[0]
-            actual_current = model.get('currentSensor.i')[0]
-            
-            new_duty_cycle = controller.update(simulation_params.target_voltage, actual_voltage, actual_current, simulation_params.step_size)
-            
-            model.set('const3.k', [new_duty_cycle])
-
-            voltage[i] = actual_voltage
-            current[i] = actual_current
-            duty_cycle[i] = new_duty_cycle
+    def _steps(self, model, simulation_params: SimulationParams, controller: BaseController, chunk_size: int,
+               start_index: int = 0, stop_index: Optional[int] = None) -> Iterator[SimulationResult]:
+        """执行第 start_index 到 stop_index（不含）个控制周期，不负责 FMU 的初始化和终止"""
+        # 仿真开始前按名称解析一次 valueReference，循环内只用 get_real/set_real 各调用一次
+        output_refs = np.array([model.get_variable_valueref(name) for name in self.output_names], dtype=np.uint32)
+        input_refs = np.array([model.get_variable_valueref(self.input_name)], dtype=np.uint32)
+        input_values = np.empty(1)
 
-        model.terminate()
-        return SimulationResult(times=time.tolist(), voltages=voltage.tolist(), 
-                                currents=current.tolist(), duty_cycles=duty_cycle.tolist())
+        # 控制器每 control_period 采样一次，期间占空比保持、FMU 按 communication_step 推进若干步；
+        # 每 record_every 个控制周期记录一次。默认三者都由 step_size 决定，与单一步长时完全相同
+        control_period = simulation_params.get_control_period()
+        substeps = simulation_params.communication_steps_per_control()
+        communication_step = control_period / substeps
+        record_every = simulation_params.record_every
+        control_times = simulation_params.control_times()[start_index:stop_index]
+        time = self._record_slice(simulation_params, start_index, stop_index)
+        chunk = SimulationResult.empty(min(chunk_size, len(time)))
+        voltage = chunk.voltages
+        current = chunk.currents
+        duty_cycle = chunk.duty_cycles
+        recorded = 0
+        filled = 0
+
+        for i, t in enumerate(control_times, start_index):
+            if substeps == 1:
+                model.do_step(t, control_period)
+            else:
+                for k in range(substeps):
+                    model.do_step(t + k * communication_step, communication_step)
+
+            actual_voltage, actual_current = model.get_real(output_refs)
+
+            new_duty_cycle = controller.update(simulation_params.target_voltage, actual_voltage, actual_current, control_period)
+
+            input_values[0] = new_duty_cycle
+            model.set_real(input_refs, input_values)
+
+            if i % record_every:
+                continue
+            voltage[filled] = actual_voltage
+            current[filled] = actual_current
+            duty_cycle[filled] = new_duty_cycle
+            filled += 1
+
+            if filled == chunk_size:
+                chunk.times[:] = time[recorded:recorded + filled]
+                recorded += filled
+                filled = 0
+                yield chunk
+
+        if filled:
+            chunk.times[:filled] = time[recorded:recorded + filled]
+            yield SimulationResult(data=chunk.data[:, :filled])
+
+    @staticmethod
+    def _record_slice(simulation_params: SimulationParams, start_index: int = 0,
+                      stop_index: Optional[int] = None) -> np.ndarray:
+        """第 start_index 到 stop_index 个控制周期中被记录的时间点"""
+        record_every = simulation_params.record_every
+        time = simulation_params.record_times()
+        stop = None if stop_index is None else -(-stop_index // record_every)
+        return time[-(-start_index // record_every):stop]
+
+    def record_times(self, simulation_params: SimulationParams) -> np.ndarray:
+        if self.branch_from is None:
+            return simulation_params.record_times()
+        return self._record_slice(simulation_params, self.branch_from.start_index_for(simulation_params))
+
+    def snapshot(self, fmu_path: str, simulation_params: SimulationParams, controller: BaseController,
+                 at_time: float) -> FMUSnapshot:
+        """从头仿真到 at_time（取不早于它的第一个控制时刻），保存此时的 FMU 状态（fmi2GetFMUstate + 序列化）和控制器状态。
+
+        之后用 branch(snapshot) 得到的仿真工具只仿真 at_time 之后的部分；快照之前的轨迹保存在 snapshot.prefix 中。
+        """
+        control_times = simulation_params.control_times()
+        stop_index = int(np.searchsorted(control_times, at_time))
+        if not 0 < stop_index < len(control_times):
+            raise ValueError(f"Snapshot time {at_time} must lie inside the simulation (0, {simulation_params.simulation_time})")
+
+        if self.use_fmu_pool:
+            key, model = self.fmu_pool.acquire(fmu_path)
+        else:
+            model = load_fmu(fmu_path)
+        try:
+            self._initialize(model, controller)
+            prefix_size = len(self._record_slice(simulation_params, 0, stop_index))
+            prefix = [chunk.data.copy() for chunk in
+                      self._steps(model, simulation_params, controller, prefix_size, 0, stop_index)]
+            state = model.get_fmu_state()
+            fmu_state = model.serialize_fmu_state(state)
+            model.free_fmu_state(state)
+            model.terminate()
+        except BaseException:
+            try:
+                model.free_instance()
+            except Exception:
+                pass
+            raise
+        if self.use_fmu_pool:
+            self.fmu_pool.release(key, model)
+
+        return FMUSnapshot(time=float(control_times[stop_index]), start_index=stop_index,
+                           control_period=simulation_params.get_control_period(), fmu_state=fmu_state,
+                           controller_state=controller.get_state(), prefix=SimulationResult(data=prefix[0]))
+
+    def branch(self, snapshot: FMUSnapshot) -> 'BoostSimulationTool':
+        """返回从快照继续仿真的工具：每次仿真先恢复 FMU 状态，并把快照中的控制器状态交给候选控制器"""
+        tool = copy.copy(self)
+        tool.branch_from = snapshot
+        return tool
+
+def visualize_simulation_results(simulation_result: SimulationResult, target_voltage: float,
+                                 max_points: Optional[int] = DEFAULT_PLOT_POINTS):
+    # matplotlib 导入较慢，只在真正画图时加载
+    import matplotlib.pyplot as plt
 
-def visualize_simulation_results(simulation_result: SimulationResult, target_voltage: float):
     start_index = np.searchsorted(simulation_result.times, 0.001)
+    # 只画包络点，max_points=None 时画出全部采样
+    if max_points is not None:
+        simulation_result = SimulationResult(data=simulation_result.data[:, start_index:]).envelope(max_points)
+        start_index = 0
     
     fig, (ax1, ax2, ax3) = plt.subplots(3, 1, figsize=(12, 15))
 
@@ -92,10 +474,10 @@ def visualize_simulation_results(simulation_result: SimulationResult, target_vol
     plt.show()
 
 def calculate_performance_metrics(simulation_result: SimulationResult, target_voltage: float):
-    voltage = np.array(simulation_result.voltages)
-    time = np.array(simulation_result.times)
+    voltage = simulation_result.voltages
+    time = simulation_result.times
 
-    overshoot = max(0, (max(voltage) - target_voltage) / target_voltage * 100)
+    overshoot = max(0, (voltage.max() - target_voltage) / target_voltage * 100)
     
     settling_time = None
     settled = False
@@ -0,0 +1,198 @@
+"""平均模型 Boost + 双环 PI 的稳定性预筛：仿真之前剔除闭环发散的增益。
+
+先在工作点（Vo = 目标电压，D = 1 - Vin / Vo，I = Vo / (R (1 - D))）处对离散闭环线性化。离散方式与
+AveragedBoostSimulationTool.simulate 相同（对象显式欧拉，控制器按 PIDController.update 的后向欧拉积分），
+负载切换前后两个电阻各是一个工作点。一批候选的闭环矩阵一起求特征值，谱半径小于 1 且最慢模态衰减率不低于
+min_decay_rate 的候选直接通过。
+
+线性化不含占空比和电流给定的限幅，而限幅正是大增益候选保持有界的原因：线性化判为不稳定的候选里有得分最好的
+一批（限幅下的极限环落在误差带附近）。因此线性化不通过的候选再用 verify_tool 批量仿真一小段平均模型
+（verify_params），只有轨迹确实发散的才剔除；没有 verify_tool 时按线性化结论剔除。
+"""
+from typing import Dict, List, NamedTuple, Optional, Sequence
+import numpy as np
+from ControlTool import ControlParams, DualLoopPIDBank, get_controller_info
+from SimulationTool import SimulationParams
+from AveragedSimulationTool import BoostPlantParams
+
+# 线性化状态（均为相对工作点的偏差）：电感电流、电容电压、占空比、电压/电流环积分、电压/电流环上次误差
+STATE_NAMES = ('i_L', 'v_C', 'd', 'voltage_xi', 'current_xi', 'voltage_last_error', 'current_last_error')
+# 谱半径超过 1 - STABILITY_TOLERANCE 视为不稳定，临界稳定的候选同样不值得仿真
+STABILITY_TOLERANCE = 1e-9
+# 验证仿真的时长（s）；后 DIVERGENCE_WINDOW 段中出现非有限值或偏离目标电压超过 DIVERGENCE_BAND 倍时判为发散。
+# 得分好的候选在这一段已经进入目标附近（可能带限幅极限环），发散的候选停在 0、Vin 附近或越来越大
+VERIFY_TIME = 0.2
+DIVERGENCE_WINDOW = 0.5
+DIVERGENCE_BAND = 0.75
+# 一致率统计：完整仿真最后 TAIL_FRACTION 的采样全部有限且都在评价器的 ±TAIL_BAND 误差带内，视为仿真结果稳定
+TAIL_FRACTION = 0.05
+TAIL_BAND = 0.02
+
+class StabilityVerdict(NamedTuple):
+    stable: np.ndarray  # (N,) bool
+    spectral_radius: np.ndarray  # (N,) 各工作点中最大的闭环特征值模
+    decay_rate: np.ndarray  # (N,) 最慢模态的衰减率 -ln(ρ)/dt（1/s），不稳定时为负
+    damping: np.ndarray  # (N,) 各模态中最小的等效阻尼比
+
+    def margins(self, index: int) -> Dict[str, float]:
+        return {'spectral_radius': float(self.spectral_radius[index]),
+                'stability_margin': float(1 - self.spectral_radius[index]),
+                'decay_rate': float(self.decay_rate[index]),
+                'damping': float(self.damping[index])}
+
+def _within(voltages: np.ndarray, target_voltage: float, band: float) -> np.ndarray:
+    with np.errstate(invalid='ignore'):
+        inside = np.abs(voltages - target_voltage) <= band * abs(target_voltage)
+    return np.isfinite(voltages).all(axis=1) & inside.all(axis=1)
+
+def trajectory_diverged(voltages: np.ndarray, target_voltage: float) -> np.ndarray:
+    """voltages 为 (N, T)，每条轨迹后 DIVERGENCE_WINDOW 段是否出现非有限值或偏离目标电压超过 DIVERGENCE_BAND"""
+    voltages = np.atleast_2d(voltages)
+    window = voltages[:, int(voltages.shape[1] * (1 - DIVERGENCE_WINDOW)):]
+    return ~_within(window, target_voltage, DIVERGENCE_BAND)
+
+def trajectory_stable(voltages: np.ndarray, target_voltage: float) -> np.ndarray:
+    """voltages 为 (N, T)，每条轨迹最后 TAIL_FRACTION 是否停在评价器的误差带内（与 settling_time 的判据相同）"""
+    voltages = np.atleast_2d(voltages)
+    return _within(voltages[:, -max(1, int(voltages.shape[1] * TAIL_FRACTION)):], target_voltage, TAIL_BAND)
+
+class StabilityScreen:
+    def __init__(self, plant_params: BoostPlantParams, target_voltage: float, dt: float,
+                 min_decay_rate: float = 0.0, verify_tool=None, verify_params: Optional[SimulationParams] = None,
+                 audit_tool=None):
+        if not target_voltage > plant_params.input_voltage:
+            raise ValueError(f"Boost operating point needs target_voltage > input_voltage "
+                             f"({target_voltage} <= {plant_params.input_voltage})")
+        self.plant_params = plant_params
+        self.target_voltage = float(target_voltage)
+        self.dt = float(dt)
+        # 最慢模态的衰减率下限（1/s），例如取 1 / 仿真时长，要求仿真时间内至少衰减到 1/e
+        self.min_decay_rate = float(min_decay_rate)
+        # 支持 simulate_batch 的仿真工具（平均模型）：verify_tool 按 verify_params 仿真线性化不通过的候选，
+        # audit_tool 完整仿真全部候选检验预筛结论；为 None 时分别按线性化结论剔除、不统计一致率
+        if verify_tool is not None and verify_params is None:
+            raise ValueError("verify_tool needs verify_params")
+        self.verify_tool = verify_tool
+        self.verify_params = verify_params
+        self.audit_tool = audit_tool
+        self.resistances = [plant_params.resistance]
+        if plant_params.load_step_time is not None:
+            self.resistances.append(plant_params.load_step_resistance)
+        # (预测稳定, 仿真稳定) 对，用于统计预筛与仿真结论的一致率
+        self.evaluations = 0
+        self.verified = 0
+        self.rejected = 0
+        self.predicted: List[bool] = []
+        self.observed: List[bool] = []
+
+    @classmethod
+    def from_model_parameters(cls, parameters: Dict[str, float], dt: float,
+                              target_voltage: Optional[float] = None, **kwargs) -> 'StabilityScreen':
+        """parameters 为 ModelConfigTool 的模型参数；未给出 target_voltage 时取其中的 output_voltage"""
+        target_voltage = parameters['output_voltage'] if target_voltage is None else target_voltage
+        return cls(BoostPlantParams.from_model_parameters(parameters, **kwargs), target_voltage, dt)
+
+    def closed_loop_matrices(self, gains: Dict[str, np.ndarray], resistance: float) -> np.ndarray:
+        """(N, 7, 7) 的离散闭环矩阵，z[k+1] = M z[k]，状态顺序见 STATE_NAMES"""
+        p = self.plant_params
+        dt = self.dt
+        off = p.input_voltage / self.target_voltage  # 1 - D
+        v0 = self.target_voltage
+        i0 = v0 / (resistance * off)
+        e = np.eye(len(STATE_NAMES))
+        g = {name: np.asarray(value, dtype=float)[:, None] for name, value in gains.items()}
+
+        # 对象：与 AveragedBoostSimulationTool.simulate 一样用上一步的电流、电压和占空比
+        i_next = e[0] + dt / p.inductance * (-off * e[1] + v0 * e[2])
+        v_next = e[1] + dt / p.capacitance * (off * e[0] - i0 * e[2] - e[1] / resistance)
+        # 外环：电压控制
+        voltage_error = -v_next
+        voltage_xi = e[3] + dt * voltage_error
+        current_reference = g['voltage_k'] * (voltage_error + voltage_xi / g['voltage_Ti']
+                                              + g['voltage_Td'] * (voltage_error - e[5]) / dt)
+        # 内环：电流控制
+        current_error = current_reference - i_next
+        current_xi = e[4] + dt * current_error
+        duty_cycle = g['current_k'] * (current_error + current_xi / g['current_Ti']
+                                       + g['current_Td'] * (current_error - e[6]) / dt)
+
+        rows = [i_next, v_next, duty_cycle, voltage_xi, current_xi, voltage_error, current_error]
+        n = len(duty_cycle)
+        return np.stack([np.broadcast_to(row, (n, len(STATE_NAMES))) for row in rows], axis=1)
+
+    def screen_gains(self, gains: Dict[str, np.ndarray]) -> StabilityVerdict:
+        """gains 与 DualLoopPIDBank.gains 相同，各值为长度 N 的数组"""
+        n = len(gains['voltage_k'])
+        radius = np.zeros(n)
+        damping = np.ones(n)
+        for resistance in self.resistances:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                matrices = self.closed_loop_matrices(gains, resistance)
+            # Ti = 0 等非有限的闭环矩阵直接判为不稳定
+            finite = np.isfinite(matrices).all(axis=(1, 2))
+            eigenvalues = np.full((n, len(STATE_NAMES)), np.inf, dtype=complex)
+            if finite.any():
+                eigenvalues[finite] = np.linalg.eigvals(matrices[finite])
+            modulus = np.abs(eigenvalues)
+            radius = np.maximum(radius, modulus.max(axis=1))
+            # z = exp(s dt)，等效阻尼比 -Re(s) / |s|；z = 0 的模态（如上次误差状态）不计
+            with np.errstate(divide='ignore', invalid='ignore'):
+                s = np.log(eigenvalues) / self.dt
+                zeta = np.where(modulus > 1e-12, -s.real / np.abs(s), 1.0)
+            zeta = np.where(np.isfinite(zeta), zeta, np.where(modulus > 1, -1.0, 1.0))
+            damping = np.minimum(damping, zeta.min(axis=1))
+        with np.errstate(divide='ignore'):
+            decay_rate = -np.log(radius) / self.dt
+        stable = (radius < 1 - STABILITY_TOLERANCE) & (decay_rate >= self.min_decay_rate)
+        return StabilityVerdict(stable, radius, decay_rate, damping)
+
+    def screen(self, param_matrix: np.ndarray, control_params: ControlParams,
+               param_names: Optional[Sequence[str]] = None) -> StabilityVerdict:
+        """param_matrix 每行是一个候选（与 PSOOptimizer 的粒子相同），其余参数取自 control_params；
+        返回的 stable 为最终结论，其余字段为线性化裕度"""
+        param_names = get_controller_info('duallooppid').tuned_params if param_names is None else param_names
+        verdict = self.screen_gains(DualLoopPIDBank.from_matrix(param_matrix, control_params, param_names).gains)
+        suspect = np.flatnonzero(~verdict.stable)
+        if self.verify_tool is not None and len(suspect):
+            batch_result = self.verify_tool.simulate_batch(np.asarray(param_matrix)[suspect], control_params,
+                                                           self.verify_params, param_names)
+            stable = verdict.stable.copy()
+            stable[suspect] = ~trajectory_diverged(batch_result.voltages, self.verify_params.target_voltage)
+            verdict = verdict._replace(stable=stable)
+            self.verified += len(suspect)
+        self.evaluations += len(verdict.stable)
+        self.rejected += int(np.count_nonzero(~verdict.stable))
+        return verdict
+
+    def record(self, predicted: np.ndarray, observed: np.ndarray):
+        self.predicted.extend(np.asarray(predicted, dtype=bool).tolist())
+        self.observed.extend(np.asarray(observed, dtype=bool).tolist())
+
+    def audit(self, param_matrix: np.ndarray, control_params: ControlParams,
+              simulation_params: SimulationParams, verdict: StabilityVerdict) -> np.ndarray:
+        """用 audit_tool 仿真全部候选（包括被剔除的），记录预筛结论与仿真结论是否一致"""
+        batch_result = self.audit_tool.simulate_batch(param_matrix, control_params, simulation_params)
+        observed = trajectory_stable(batch_result.voltages, simulation_params.target_voltage)
+        self.record(verdict.stable, observed)
+        return observed
+
+    @property
+    def agreement_rate(self) -> float:
+        if not self.predicted:
+            return float('nan')
+        return float(np.mean(np.asarray(self.predicted) == np.asarray(self.observed)))
+
+    def summary(self) -> Dict[str, float]:
+        predicted = np.asarray(self.predicted, dtype=bool)
+        observed = np.asarray(self.observed, dtype=bool)
+        return {
+            'evaluations': self.evaluations,
+            'verified': self.verified,
+            'rejected': self.rejected,
+            'rejection_rate': self.rejected / self.evaluations if self.evaluations else float('nan'),
+            'audited': len(predicted),
+            'agreement_rate': self.agreement_rate,
+            # 被剔除的候选完整仿真却停在误差带内（误杀）；通过的候选完整仿真最后仍不在误差带内（振荡或未调节到位）
+            'false_rejections': int(np.count_nonzero(~predicted & observed)),
+            'missed_instabilities': int(np.count_nonzero(predicted & ~observed))
+        }
@@ -0,0 +1,389 @@
+"""通用离散状态空间控制器：任意线性控制结构由 (A, B, C, D) 矩阵加输出限幅和抗积分饱和描述，
+不需要为每种新结构手写控制器类。
+
+每个环节是单输入单输出的离散系统
+
+    y[k] = C x[k] + D e[k]，输出限幅到 [y_min, y_max]
+    x[k+1] = A x[k] + B e[k]
+
+PI/PID/超前滞后/PR 以及任意传递函数可以用下面的转换函数得到，例如
+
+    params = DualLoopStateSpaceParams.from_spec({
+        'dt': 1e-4,
+        'voltage': {'structure': 'pi', 'k': 1.0, 'Ti': 0.1, 'y_min': 0, 'y_max': 800},
+        'current': {'structure': 'lead_lag', 'k': 0.5, 'T_lead': 1e-3, 'T_lag': 1e-4, 'y_min': 0, 'y_max': 1},
+    })
+    controller = ControllerFactory.create_controller('statespace', params)
+
+模块导入时 DualLoopStateSpaceController 以 'statespace' 注册到 ControlTool 的控制器注册表。
+"""
+import math
+from operator import mul
+from typing import Dict, List, Optional, Sequence, Union
+import numpy as np
+from pydantic import BaseModel, Field, validator
+from ControlTool import BaseController, register_batch, register_controller
+
+# none：不处理；clamp：输出限幅时保持积分状态不变（条件积分），其余状态照常更新；
+# back_calculation：状态按 tracking_gain * (限幅后输出 - 限幅前输出) 回算
+ANTI_WINDUP_MODES = ('none', 'clamp', 'back_calculation')
+
+class StateSpaceParams(BaseModel):
+    A: List[List[float]] = Field(..., description="State matrix (n x n)")
+    B: List[float] = Field(..., description="Input vector (n)")
+    C: List[float] = Field(..., description="Output vector (n)")
+    D: float = Field(0.0, description="Feedthrough gain")
+    dt: float = Field(..., description="Sample time the matrices were discretized for")
+    y_max: float = math.inf
+    y_min: float = -math.inf
+    anti_windup: str = 'none'
+    tracking_gain: Optional[List[float]] = None
+    # clamp 时冻结的状态下标；默认取纯累加的状态（A 的该行为单位向量），没有这样的状态时冻结全部状态
+    integrator_states: Optional[List[int]] = None
+
+    class Config:
+        extra = "forbid"
+
+    @validator('A')
+    def check_square(cls, v):
+        if any(len(row) != len(v) for row in v):
+            raise ValueError("A must be square")
+        return v
+
+    @validator('B', 'C')
+    def check_size(cls, v, values):
+        if 'A' in values and len(v) != len(values['A']):
+            raise ValueError(f"Expected {len(values['A'])} elements to match A, got {len(v)}")
+        return v
+
+    @validator('dt')
+    def check_dt(cls, v):
+        if not v > 0:
+            raise ValueError("dt must be positive")
+        return v
+
+    @validator('y_min')
+    def check_limits(cls, v, values):
+        if 'y_max' in values and v > values['y_max']:
+            raise ValueError("y_min must not exceed y_max")
+        return v
+
+    @validator('anti_windup')
+    def check_anti_windup(cls, v):
+        if v not in ANTI_WINDUP_MODES:
+            raise ValueError(f"anti_windup must be one of {', '.join(ANTI_WINDUP_MODES)}, got {v}")
+        return v
+
+    @validator('tracking_gain', always=True)
+    def check_tracking_gain(cls, v, values):
+        if values.get('anti_windup') == 'back_calculation':
+            if v is None or ('A' in values and len(v) != len(values['A'])):
+                raise ValueError("back_calculation needs a tracking_gain with one element per state")
+        return v
+
+    @validator('integrator_states')
+    def check_integrator_states(cls, v, values):
+        if v is not None and 'A' in values and any(not 0 <= i < len(values['A']) for i in v):
+            raise ValueError(f"integrator_states must index the {len(values['A'])} states, got {v}")
+        return v
+
+    @property
+    def order(self) -> int:
+        return len(self.A)
+
+    @property
+    def integrating(self) -> List[bool]:
+        """每个状态在 clamp 抗饱和时是否冻结；PID 的上次误差等非积分状态照常更新"""
+        if self.integrator_states is not None:
+            return [i in self.integrator_states for i in range(self.order)]
+        mask = [row[i] == 1 and not any(a for j, a in enumerate(row) if j != i) for i, row in enumerate(self.A)]
+        return mask if any(mask) else [True] * self.order
+
+# ---- 连续/离散转换 ----
+
+def _limits(y_max: float, y_min: float, anti_windup: str, tracking_gain: Optional[Sequence[float]]) -> Dict:
+    return {'y_max': y_max, 'y_min': y_min, 'anti_windup': anti_windup,
+            'tracking_gain': None if tracking_gain is None else list(tracking_gain)}
+
+def tf_to_ss(num: Sequence[float], den: Sequence[float]):
+    """连续传递函数（系数按 s 的降幂排列）的可控标准型实现，返回 (A, B, C, D) 数组"""
+    num = np.atleast_1d(np.asarray(num, dtype=float))
+    den = np.atleast_1d(np.asarray(den, dtype=float))
+    if not den.any():
+        raise ValueError("Denominator must not be zero")
+    den = np.trim_zeros(den, 'f')
+    if len(num) > len(den):
+        raise ValueError("Transfer function must be proper (deg num <= deg den)")
+    num = np.concatenate([np.zeros(len(den) - len(num)), num]) / den[0]
+    den = den / den[0]
+    n = len(den) - 1
+    A = np.zeros((n, n))
+    if n:
+        A[0] = -den[1:]
+        A[1:, :-1] = np.eye(n - 1)
+    B = np.zeros(n)
+    if n:
+        B[0] = 1.0
+    C = num[1:] - num[0] * den[1:]
+    return A, B, C, float(num[0])
+
+def bilinear(A, B, C, D: float, dt: float, prewarp: Optional[float] = None):
+    """Tustin 离散化；给定 prewarp（rad/s）时该频率处的频率响应保持不变（PR 控制器的谐振频率）"""
+    A = np.asarray(A, dtype=float).reshape(len(B), len(B))
+    B = np.asarray(B, dtype=float)
+    C = np.asarray(C, dtype=float)
+    if not len(B):
+        # 纯比例环节没有状态
+        return A, B, C, D
+    if prewarp:
+        dt = 2 * math.tan(prewarp * dt / 2) / prewarp
+    n = len(B)
+    ima = np.eye(n) - A * dt / 2
+    Ad = np.linalg.solve(ima, np.eye(n) + A * dt / 2)
+    Bd = np.linalg.solve(ima, B * dt)
+    Cd = np.linalg.solve(ima.T, C)
+    Dd = D + float(C @ Bd) / 2
+    return Ad, Bd, Cd, Dd
+
+def transfer_function(num: Sequence[float], den: Sequence[float], dt: float, prewarp: Optional[float] = None,
+                      y_max: float = math.inf, y_min: float = -math.inf, anti_windup: str = 'none',
+                      tracking_gain: Optional[Sequence[float]] = None) -> StateSpaceParams:
+    Ad, Bd, Cd, Dd = bilinear(*tf_to_ss(num, den), dt, prewarp)
+    return StateSpaceParams(A=Ad.tolist(), B=Bd.tolist(), C=Cd.tolist(), D=Dd, dt=dt,
+                            **_limits(y_max, y_min, anti_windup, tracking_gain))
+
+def pid(k: float, Ti: float, Td: float, dt: float, y_max: float = math.inf, y_min: float = -math.inf,
+        anti_windup: str = 'none', tracking_gain: Optional[Sequence[float]] = None) -> StateSpaceParams:
+    """与 ControlTool.PIDController 相同的离散化：积分含当前采样（后向欧拉），微分为后向差分。
+    状态 x = [积分, 上次误差]；Td == 0 时省去第二个状态"""
+    if Td:
+        A = [[1.0, 0.0], [0.0, 0.0]]
+        B = [dt, 1.0]
+        C = [k / Ti, -k * Td / dt]
+        D = k * (1 + dt / Ti + Td / dt)
+    else:
+        A, B, C, D = [[1.0]], [dt], [k / Ti], k * (1 + dt / Ti)
+    return StateSpaceParams(A=A, B=B, C=C, D=D, dt=dt, **_limits(y_max, y_min, anti_windup, tracking_gain))
+
+def pi(k: float, Ti: float, dt: float, **kwargs) -> StateSpaceParams:
+    return pid(k, Ti, 0.0, dt, **kwargs)
+
+def lead_lag(k: float, T_lead: float, T_lag: float, dt: float, **kwargs) -> StateSpaceParams:
+    """k (T_lead s + 1) / (T_lag s + 1)"""
+    return transfer_function([k * T_lead, k], [T_lag, 1.0], dt, **kwargs)
+
+def proportional_resonant(kp: float, kr: float, omega0: float, dt: float, omega_c: float = 0.0,
+                          **kwargs) -> StateSpaceParams:
+    """kp + 2 kr ωc s / (s² + 2 ωc s + ω0²)；omega_c == 0 时为理想 PR：kp + 2 kr s / (s² + ω0²)。
+    在 ω0 处预畸变，离散后谐振频率不偏移"""
+    gain = 2 * kr * (omega_c if omega_c else 1.0)
+    num = [kp, kp * 2 * omega_c + gain, kp * omega0 ** 2]
+    return transfer_function(num, [1.0, 2 * omega_c, omega0 ** 2], dt, prewarp=omega0, **kwargs)
+
+# 结构名 -> 转换函数，from_spec 中 structure 字段的取值
+STRUCTURES = {
+    'pi': pi,
+    'pid': pid,
+    'lead_lag': lead_lag,
+    'pr': proportional_resonant,
+    'transfer_function': transfer_function,
+}
+
+def state_space_from_spec(spec: Dict, dt: Optional[float] = None) -> StateSpaceParams:
+    """由 JSON 形式的结构描述得到 StateSpaceParams：structure 为 STRUCTURES 中的名称时其余字段作为转换函数的参数，
+    为 state_space 时直接给出 A/B/C/D"""
+    spec = dict(spec)
+    structure = spec.pop('structure', 'state_space')
+    if dt is not None:
+        spec.setdefault('dt', dt)
+    if structure == 'state_space':
+        return StateSpaceParams(**spec)
+    if structure not in STRUCTURES:
+        raise ValueError(f"Unknown controller structure: {structure}")
+    return STRUCTURES[structure](**spec)
+
+class DualLoopStateSpaceParams(BaseModel):
+    voltage: StateSpaceParams
+    current: StateSpaceParams
+
+    class Config:
+        extra = "forbid"
+
+    @validator('current')
+    def check_dt(cls, v, values):
+        if 'voltage' in values and not math.isclose(v.dt, values['voltage'].dt):
+            raise ValueError("Voltage and current loops must share the same dt")
+        return v
+
+    @classmethod
+    def from_spec(cls, spec: Dict) -> 'DualLoopStateSpaceParams':
+        dt = spec.get('dt')
+        return cls(voltage=state_space_from_spec(spec['voltage'], dt),
+                   current=state_space_from_spec(spec['current'], dt))
+
+# ---- 控制器 ----
+
+class StateSpaceController(BaseController):
+    """单个离散状态空间环节；矩阵编译为元组，update 只做 n 阶的乘加，不经过 numpy"""
+    __slots__ = ('A', 'B', 'C', 'D', 'dt', 'y_max', 'y_min', 'anti_windup', 'tracking_gain', 'integrating', 'x', 'y')
+
+    def __init__(self, params: StateSpaceParams):
+        self.A = tuple(tuple(row) for row in params.A)
+        self.B = tuple(params.B)
+        self.C = tuple(params.C)
+        self.D = params.D
+        self.dt = params.dt
+        self.y_max = params.y_max
+        self.y_min = params.y_min
+        self.anti_windup = params.anti_windup
+        self.tracking_gain = tuple(params.tracking_gain) if params.tracking_gain is not None else ()
+        self.integrating = tuple(params.integrating)
+        self.x = [0.0] * len(self.B)
+        self.y = 0
+
+    def _check_dt(self, dt: float):
+        if not math.isclose(dt, self.dt):
+            raise ValueError(f"Controller was discretized for dt={self.dt}, called with dt={dt}")
+
+    def update(self, error: float, dt: float) -> float:
+        if dt != self.dt:
+            self._check_dt(dt)
+        x = self.x
+        # 运算顺序与 JITSimulationTool 的状态空间内核相同
+        y = self.D * error
+        for c, xj in zip(self.C, x):
+            y += c * xj
+        y_sat = max(min(y, self.y_max), self.y_min)
+        x_new = [b * error + sum(map(mul, row, x)) for row, b in zip(self.A, self.B)]
+        if self.anti_windup == 'back_calculation':
+            x_new = [xj + l * (y_sat - y) for xj, l in zip(x_new, self.tracking_gain)]
+        elif self.anti_windup == 'clamp' and y_sat != y:
+            x_new = [xj if frozen else xn for xj, xn, frozen in zip(x, x_new, self.integrating)]
+        self.x = x_new
+        self.y = y_sat
+        return y_sat
+
+    def reset(self):
+        self.x = [0.0] * len(self.B)
+        self.y = 0
+
+    def get_state(self) -> Dict:
+        return {'x': list(self.x), 'y': self.y}
+
+    def set_state(self, state: Dict):
+        self.x = [float(v) for v in state['x']]
+        self.y = state['y']
+
+@register_controller('statespace', params_model=DualLoopStateSpaceParams, param_names=('voltage', 'current'),
+                     kernel='JITSimulationTool._state_space_closed_loop_kernel',
+                     description="Dual-loop discrete state-space controller (PI/PID/lead-lag/PR or raw A, B, C, D)")
+class DualLoopStateSpaceController(BaseController):
+    """外环电压、内环电流各为一个状态空间环节，接口与 DualLoopPIDController 相同"""
+    __slots__ = ('voltage_controller', 'current_controller')
+
+    def __init__(self, params: DualLoopStateSpaceParams):
+        self.voltage_controller = StateSpaceController(params.voltage)  # 外环：电压控制
+        self.current_controller = StateSpaceController(params.current)  # 内环：电流控制
+
+    def update(self, target_voltage: float, actual_voltage: float, actual_current: float, dt: float) -> float:
+        # 外环：电压控制
+        current_reference = self.voltage_controller.update(target_voltage - actual_voltage, dt)
+        # 内环：电流控制
+        return self.current_controller.update(current_reference - actual_current, dt)
+
+    def reset(self):
+        self.voltage_controller.reset()
+        self.current_controller.reset()
+
+    def get_state(self) -> Dict:
+        return {'voltage': self.voltage_controller.get_state(), 'current': self.current_controller.get_state()}
+
+    def set_state(self, state: Dict):
+        self.voltage_controller.set_state(state['voltage'])
+        self.current_controller.set_state(state['current'])
+
+class StateSpaceBank:
+    """N 个同阶的状态空间环节，矩阵形状为 (N, n, n)/(N, n)/(N, n)/(N,)，一次 update 推进所有通道；
+    供批量仿真使用，逐通道结果与 StateSpaceController 在舍入误差内一致"""
+
+    def __init__(self, params: Sequence[StateSpaceParams]):
+        orders = {p.order for p in params}
+        modes = {p.anti_windup for p in params}
+        if len(orders) != 1 or len(modes) != 1:
+            raise ValueError("All lanes must have the same order and anti_windup mode")
+        n = orders.pop()
+        self.anti_windup = modes.pop()
+        self.A = np.array([p.A for p in params], dtype=float).reshape(len(params), n, n)
+        self.B = np.array([p.B for p in params], dtype=float).reshape(len(params), n)
+        self.C = np.array([p.C for p in params], dtype=float).reshape(len(params), n)
+        self.D = np.array([p.D for p in params], dtype=float)
+        self.y_max = np.array([p.y_max for p in params], dtype=float)
+        self.y_min = np.array([p.y_min for p in params], dtype=float)
+        self.tracking_gain = (np.array([p.tracking_gain for p in params], dtype=float).reshape(len(params), n)
+                              if self.anti_windup == 'back_calculation' else None)
+        self.integrating = np.array([p.integrating for p in params], dtype=bool).reshape(len(params), n)
+        self.dt = np.array([p.dt for p in params], dtype=float)
+        self._checked_dt = None
+        self.x = np.zeros((len(params), n))
+        self.y = np.zeros(len(params))
+
+    def __len__(self) -> int:
+        return len(self.D)
+
+    def update(self, error: np.ndarray, dt: float) -> np.ndarray:
+        if dt != self._checked_dt:
+            if not np.allclose(self.dt, dt):
+                raise ValueError(f"Bank was discretized for dt={self.dt.tolist()}, called with dt={dt}")
+            self._checked_dt = dt
+        error = np.broadcast_to(error, self.D.shape)
+        y = np.einsum('ij,ij->i', self.C, self.x) + self.D * error
+        y_sat = np.maximum(np.minimum(y, self.y_max), self.y_min)
+        x_new = np.einsum('ijk,ik->ij', self.A, self.x) + self.B * error[:, None]
+        if self.anti_windup == 'clamp':
+            x_new = np.where((y_sat != y)[:, None] & self.integrating, self.x, x_new)
+        elif self.anti_windup == 'back_calculation':
+            x_new += self.tracking_gain * (y_sat - y)[:, None]
+        self.x = x_new
+        self.y = y_sat
+        return y_sat
+
+    def reset(self):
+        self.x = np.zeros_like(self.x)
+        self.y = np.zeros_like(self.y)
+
+    def get_state(self) -> Dict[str, np.ndarray]:
+        return {'x': self.x.copy(), 'y': self.y.copy()}
+
+    def set_state(self, state: Dict[str, Union[list, np.ndarray]]):
+        """state 可以是 get_state() 的结果，也可以是 StateSpaceController.get_state()（广播到所有通道）"""
+        self.x = np.broadcast_to(np.asarray(state['x'], dtype=float), self.x.shape).copy()
+        self.y = np.broadcast_to(np.asarray(state['y'], dtype=float), self.y.shape).copy()
+
+@register_batch('statespace')
+class DualLoopStateSpaceBank:
+    """N 个 DualLoopStateSpaceController"""
+
+    def __init__(self, params: Sequence[DualLoopStateSpaceParams]):
+        self.voltage_controller = StateSpaceBank([p.voltage for p in params])  # 外环：电压控制
+        self.current_controller = StateSpaceBank([p.current for p in params])  # 内环：电流控制
+
+    def __len__(self) -> int:
+        return len(self.voltage_controller)
+
+    def update(self, target_voltage: Union[float, np.ndarray], actual_voltage: np.ndarray,
+               actual_current: np.ndarray, dt: float) -> np.ndarray:
+        # 外环：电压控制
+        current_reference = self.voltage_controller.update(target_voltage - actual_voltage, dt)
+        # 内环：电流控制
+        return self.current_controller.update(current_reference - actual_current, dt)
+
+    def reset(self):
+        self.voltage_controller.reset()
+        self.current_controller.reset()
+
+    def get_state(self) -> Dict[str, Dict[str, np.ndarray]]:
+        return {'voltage': self.voltage_controller.get_state(), 'current': self.current_controller.get_state()}
+
+    def set_state(self, state: Dict):
+        self.voltage_controller.set_state(state['voltage'])
+        self.current_controller.set_state(state['current'])
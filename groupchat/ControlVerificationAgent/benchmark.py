@@ -0,0 +1,213 @@
+"""仿真 / 评估 / 优化热点路径的基准测试，不需要 Windows FMU DLL，可在 Linux 上运行。
+
+FMU 仿真使用 FakeBoostFMU 替身，结果写入 JSON，便于比较不同提交之间的吞吐量：
+
+    python benchmark.py --output benchmark_results.json
+    python benchmark.py --quick
+    python benchmark.py --native    # 另外编译 native_fmu 生成的 FMU，经 pyfmi 测量真实 FMU 代码路径
+    python benchmark.py --check-imports   # 只检查导入耗时预算，超出或加载了重量级依赖时返回非零
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+from ControlTool import ControlParams, ControllerFactory
+from SimulationTool import SimulationParams, SimulationFactory, BoostSimulationTool
+from EvaluateTool import EvaluateParams, EvaluateFactory
+from OptimizationTool import PSOOptimizer
+from FMUPool import FMUPool
+from FakeFMU import fake_fmu_loader
+
+# FakeBoostFMU 不读取文件内容，但 FMUPool 仍按文件哈希区分模型
+FMU_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'boost_converternopid.fmu')
+
+# worker 进程和命令行工具启动时导入的模块：应在预算内完成，且不加载下列重量级依赖（它们在首次使用时才导入）
+WORKER_MODULES = ('SimulationTool', 'OptimizationTool')
+HEAVY_MODULES = ('matplotlib', 'pyfmi', 'scipy', 'numba', 'autogen')
+IMPORT_BUDGET_S = 0.5
+
+CONTROL_PARAMS = {
+    'voltage_k': 1.0, 'voltage_Ti': 0.1, 'voltage_Td': 0, 'voltage_y_max': 800, 'voltage_y_min': 0.0,
+    'current_k': 1.0, 'current_Ti': 0.1, 'current_Td': 0, 'current_y_max': 1, 'current_y_min': 0.0
+}
+
+EVALUATE_PARAMS = {
+    'target_voltage': 160,
+    'settling_time_coefficient': 1.0,
+    'overshoot_coefficient': 1.0,
+    'integrated_error_coefficient': 1.0,
+    'post_settling_time_coefficient': 1.0,
+    'post_overshoot_coefficient': 1.0,
+    'post_integrated_error_coefficient': 1.0
+}
+
+def _timings(func: Callable[[], object], repeat: int) -> List[float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def _summary(timings: List[float], work: float, unit: str) -> Dict[str, float]:
+    """work 为单次运行的工作量（步数、采样数或评估次数），吞吐量按最快一次计算"""
+    best = min(timings)
+    return {
+        'repeat': len(timings),
+        'best_s': best,
+        'median_s': statistics.median(timings),
+        f'{unit}_per_s': work / best,
+    }
+
+def _fake_fmu_tool() -> BoostSimulationTool:
+    # 关闭结果缓存，否则重复运行测到的只是缓存命中
+    return BoostSimulationTool(fmu_pool=FMUPool(loader=fake_fmu_loader), use_cache=False)
+
+def _simulation_tools(native_fmu_path: Optional[str] = None) -> Dict[str, Tuple[object, str]]:
+    """名称 -> (仿真工具, FMU 路径)"""
+    tools = {'boost (FakeBoostFMU)': (_fake_fmu_tool(), FMU_PATH),
+             'boost-averaged': (SimulationFactory.create_simulation_tool('boost-averaged'), FMU_PATH)}
+    import JITSimulationTool
+    if JITSimulationTool.NUMBA_AVAILABLE:
+        tools['boost-averaged-jit'] = (SimulationFactory.create_simulation_tool('boost-averaged-jit'), FMU_PATH)
+    if native_fmu_path is not None:
+        tools['boost (native FMU)'] = (BoostSimulationTool(use_cache=False), native_fmu_path)
+    return tools
+
+def bench_import(module: str, repeat: int) -> Dict:
+    """在全新的解释器中计时 import，同时记录被连带导入的重量级依赖"""
+    code = (f"import sys, time; start = time.perf_counter(); import {module}; "
+            f"print(time.perf_counter() - start); "
+            f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    timings = []
+    heavy = []
+    for _ in range(repeat):
+        lines = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                               cwd=os.path.dirname(os.path.abspath(__file__))).stdout.splitlines()
+        timings.append(float(lines[0]))
+        heavy = lines[1].split(',') if len(lines) > 1 and lines[1] else []
+    best = min(timings)
+    return {'repeat': repeat, 'best_s': best, 'median_s': statistics.median(timings), 'heavy_modules': heavy,
+            'budget_s': IMPORT_BUDGET_S, 'within_budget': best <= IMPORT_BUDGET_S and not heavy}
+
+def bench_simulate(simulation_params: SimulationParams, repeat: int,
+                   native_fmu_path: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+    control_params = ControlParams(control_params=CONTROL_PARAMS)
+    steps = len(np.arange(0, simulation_params.simulation_time, simulation_params.step_size))
+    results = {}
+    for name, (tool, fmu_path) in _simulation_tools(native_fmu_path).items():
+        def run():
+            controller = ControllerFactory.create_controller('duallooppid', control_params)
+            tool.simulate(fmu_path, simulation_params, controller)
+        run()  # 预热：FMU 实例进池、numba 编译
+        results[name] = {'steps': steps, **_summary(_timings(run, repeat), steps, 'steps')}
+    return results
+
+def bench_evaluate(simulation_params: SimulationParams, repeat: int) -> Dict[str, float]:
+    controller = ControllerFactory.create_controller('duallooppid', ControlParams(control_params=CONTROL_PARAMS))
+    simulation_result = SimulationFactory.create_simulation_tool('boost-averaged').simulate(
+        FMU_PATH, simulation_params, controller)
+    evaluater_tool = EvaluateFactory.create_evaluater('duallooppid', EvaluateParams(**EVALUATE_PARAMS))
+    samples = len(simulation_result)
+    return {'samples': samples,
+            **_summary(_timings(lambda: evaluater_tool.evaluate(simulation_result), repeat), samples, 'samples')}
+
+def bench_optimize(simulation_params: SimulationParams, swarm_size: int, max_iterations: int,
+                   num_workers: int) -> Dict[str, Dict[str, float]]:
+    control_params = ControlParams(control_params=CONTROL_PARAMS)
+    evaluate_params = EvaluateParams(**EVALUATE_PARAMS)
+    evaluater_tool = EvaluateFactory.create_evaluater('duallooppid', evaluate_params)
+    bounds = PSOOptimizer.default_bounds()
+    evaluations = swarm_size * (max_iterations + 1)
+    cases = {'pso (FakeBoostFMU)': (_fake_fmu_tool(), {'num_workers': num_workers}),
+             'pso (boost-averaged, batched)': (SimulationFactory.create_simulation_tool('boost-averaged'),
+                                               {'synchronous': True})}
+    results = {}
+    for name, (tool, options) in cases.items():
+        optimizer = PSOOptimizer(swarm_size=swarm_size, max_iterations=max_iterations, seed=0, **options)
+        # optimize 每个粒子都会打印一行，计时时不输出
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            optimization_result = optimizer.optimize(FMU_PATH, None, control_params, tool, simulation_params,
+                                                     evaluater_tool, evaluate_params, bounds, [1, 0.1, 1, 0.1])
+            wall_time = time.perf_counter() - start
+        results[name] = {'evaluations': evaluations, 'wall_time_s': wall_time,
+                         'evaluations_per_s': evaluations / wall_time,
+                         'best_score': optimization_result.best_score, **options}
+    return results
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        return ''
+
+def run_benchmarks(quick: bool = False, num_workers: int = 1, native_fmu_path: Optional[str] = None) -> Dict:
+    simulation_params = SimulationParams(
+        simulation_time=0.6 if quick else 1.0,  # 需覆盖 0.5s 的负载切换
+        target_voltage=160,
+        initial_voltage=80,
+        step_size=0.0001
+    )
+    repeat = 3 if quick else 5
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'git_commit': _git_commit(),
+        'python': sys.version.split()[0],
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'quick': quick,
+        'simulation_params': simulation_params.dict(),
+        'imports': {module: bench_import(module, repeat) for module in WORKER_MODULES},
+        'simulate': bench_simulate(simulation_params, repeat, native_fmu_path),
+        'evaluate': bench_evaluate(simulation_params, repeat * 4),
+        'optimize': bench_optimize(simulation_params, swarm_size=10, max_iterations=2 if quick else 5,
+                                   num_workers=num_workers),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', default='benchmark_results.json', help='JSON 结果文件路径')
+    parser.add_argument('--quick', action='store_true', help='缩短仿真时间和迭代次数')
+    parser.add_argument('--workers', type=int, default=1, help='FMU 优化基准使用的进程数')
+    parser.add_argument('--native', action='store_true', help='编译本机 FMU 替身并经 pyfmi 测量（需要 C 编译器和 pyfmi）')
+    parser.add_argument('--check-imports', action='store_true', help='只检查导入耗时预算')
+    args = parser.parse_args(argv)
+
+    if args.check_imports:
+        imports = {module: bench_import(module, 5) for module in WORKER_MODULES}
+        for name, r in imports.items():
+            print(f"import    {name:32s} {r['best_s'] * 1000:10.1f} ms  (budget {r['budget_s'] * 1000:.0f} ms)"
+                  f"{'  loads ' + ', '.join(r['heavy_modules']) if r['heavy_modules'] else ''}")
+        sys.exit(0 if all(r['within_budget'] for r in imports.values()) else 1)
+
+    native_fmu_path = None
+    if args.native:
+        from native_fmu import build_native_fmu
+        native_fmu_path = build_native_fmu(tempfile.mkdtemp(prefix='native_fmu.'))
+
+    results = run_benchmarks(quick=args.quick, num_workers=args.workers, native_fmu_path=native_fmu_path)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+
+    for name, r in results['imports'].items():
+        print(f"import    {name:32s} {r['best_s'] * 1000:10.1f} ms")
+    for name, r in results['simulate'].items():
+        print(f"simulate  {name:32s} {r['steps_per_s']:14,.0f} steps/s")
+    print(f"evaluate  {'DualLoopPIDEvaluater':32s} {results['evaluate']['samples_per_s']:14,.0f} samples/s")
+    for name, r in results['optimize'].items():
+        print(f"optimize  {name:32s} {r['evaluations_per_s']:14,.1f} evals/s  ({r['wall_time_s']:.2f}s)")
+    print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
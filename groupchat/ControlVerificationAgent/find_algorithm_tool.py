@@ -1,21 +1,10 @@
 # find_algorithm_tool.py
 
-import sys
-import inspect
-from abc import ABC, abstractmethod
-
-class BaseController(ABC):
-    @abstractmethod
-    def update(self, error: float, dt: float) -> float:
-        pass
-
-    @abstractmethod
-    def reset(self):
-        pass
+from ControlTool import available_controllers
 
 class ControllerAlgorithmTool:
     def find_algorithm(self, requirements):
-        # 动态搜索当前模块中的所有类
+        # 从控制器注册表查询可用的控制器
         available_controllers = self._get_available_controllers()
         
         if "DualLoopPIDController" in available_controllers:
@@ -23,15 +12,8 @@ class ControllerAlgorithmTool:
         return "未找到合适的控制算法"
 
     def _get_available_controllers(self):
-        # 获取当前模块中定义的所有类
-        current_module = sys.modules[__name__]
-        classes = inspect.getmembers(current_module, inspect.isclass)
-        
-        # 筛选出控制器类（假设所有控制器类都继承自BaseController）
-        controller_classes = {name: cls for name, cls in classes 
-                              if inspect.isclass(cls) and issubclass(cls, BaseController) and cls != BaseController}
-        
-        return controller_classes
+        # 控制器类名 -> 类，来自 ControlTool 的控制器注册表（含插件）
+        return {info.cls.__name__: info.cls for info in available_controllers().values()}
 
 # 创建工具实例
 controller_algorithm_tool = ControllerAlgorithmTool()
@@ -1,6 +1,5 @@
 import json
 import os
-from autogen import ConversableAgent, GroupChat, GroupChatManager, UserProxyAgent
 from typing import Dict, Any
 from pydantic import BaseModel
 from model_config_tool import ModelConfigTool
@@ -167,16 +166,6 @@ def manager_response(self, messages, sender, config):
     else:
         return False, "Unexpected state."
 
-manager_agent = ConversableAgent(
-    name="ManagerAgent",
-    system_message="You are a manager overseeing the Boost converter controller design process. Broadcast design requirements and instruct other agents concisely. When acknowledging the model configuration, include the exact model address provided by ModelDesignAgent. Do not provide any information or commentary beyond your specific tasks.",
-    llm_config=llm_config
-)
-manager_agent.register_reply(
-    lambda messages: state_manager.state in ["initial", "model_configured", "objectives_defined", "controller_designed", "optimization_designed", "verification_completed"],
-    manager_response
-)
-
 def find_model(requirements):
     model_info = model_config_tool.find_model(requirements)
     if model_info:
@@ -199,25 +188,6 @@ def model_design_response(self, messages, sender, config):
     state_manager.state = "model_configured"
     return False, result
 
-model_design_agent = ConversableAgent(
-    name="ModelDesignAgent",
-    system_message=f"""You are an agent responsible for configuring appropriate models for controller design. 
-    When asked to find a suitable model, always return the following exact information without any modification:
-    {find_model({
-        "resistance": 15,
-        "inductance": 0.001,
-        "capacitance": 0.0006,
-        "input_voltage": 80,
-        "output_voltage": 160
-    })}
-    Do not add any additional information or commentary to this output.""",
-    llm_config=llm_config
-)
-model_design_agent.register_reply(
-    lambda messages: state_manager.state == "model_design",
-    model_design_response
-)
-
 def get_control_objectives():
     objectives = objective_tool.get_control_objectives()
     state_manager.objectives = objectives['control_objective']
@@ -229,19 +199,6 @@ def objective_response(self, messages, sender, config):
     state_manager.state = "objectives_defined"
     return False, result
 
-objective_agent = ConversableAgent(
-    name="ObjectiveAgent",
-    system_message=f"""You are responsible for defining control objectives and constraints based on design requirements. 
-    When asked to define control objectives and constraints, always return the following exact information without any modification:
-    {get_control_objectives()}
-    Do not add any additional information or commentary to this output.""",
-    llm_config=llm_config
-)
-objective_agent.register_reply(
-    lambda messages: state_manager.state == "objective",
-    objective_response
-)
-
 def controller_algorithm_design_response(self, messages, sender, config):
     requirements = {
         'model': state_manager.model_info['model_id'],
@@ -257,23 +214,6 @@ def controller_algorithm_design_response(self, messages, sender, config):
     }
     return False, result
 
-controller_algorithm_design_agent = ConversableAgent(
-    name="ControllerAlgorithmDesignAgent",
-    system_message=f"""You are responsible for selecting and configuring appropriate control algorithms based on the model and objectives.
-    When asked to select a suitable control algorithm, always return the following exact information without any modification:
-    {find_algorithm_tool({
-        'model': 'boost_converter-2023',
-        'objectives': 'Output voltage of 160V',
-        'constraints': 'Overshoot < 8%, Steady-state error < 2%, Settling time < 0.5s'
-    })}
-    Do not add any additional information or commentary to this output.""",
-    llm_config=llm_config
-)
-controller_algorithm_design_agent.register_reply(
-    lambda messages: state_manager.state == "controller_design",
-    controller_algorithm_design_response
-)
-
 def optimization_algorithm_design_response(self, messages, sender, config):
     control_algorithm = state_manager.selected_controller.split("the ")[-1].split(" controller")[0]
     result = find_optimization_algorithm_for_boost(control_algorithm)
@@ -282,20 +222,6 @@ def optimization_algorithm_design_response(self, messages, sender, config):
     state_manager.optimization_algorithm_params = {"swarm_size": 5, "max_iterations": 5, "w": 0.5, "c1": 1.5, "c2": 1.5}
     return True, f"After analyzing the {control_algorithm} controller, {result}"
 
-optimization_algorithm_design_agent = ConversableAgent(
-    name="OptimizationAlgorithmDesignAgent",
-    system_message=f"""You are responsible for selecting and configuring appropriate optimization algorithms based on the chosen control algorithm.
-    When asked to select a suitable optimization algorithm, always return the following exact information without any modification:
-    After analyzing the [CONTROL_ALGORITHM] controller, {find_optimization_algorithm_for_boost("duallooppid")}
-    Replace [CONTROL_ALGORITHM] with the actual control algorithm name.
-    Do not add any additional information or commentary to this output.""",
-    llm_config=llm_config
-)
-optimization_algorithm_design_agent.register_reply(
-    lambda messages: state_manager.state == "optimization_design",
-    optimization_algorithm_design_response
-)
-
 def verification_response(self, messages, sender, config):
     verification_input = VerificationInput(
         fmu_path=state_manager.fmu_path,
@@ -325,45 +251,127 @@ def verification_response(self, messages, sender, config):
     
     return True, f"Verification completed. Result: {verification_result.dict()}"
 
-control_verification_agent = ConversableAgent(
-    name="ControlVerificationAgent",
-    system_message="You are responsible for verifying the Boost converter controller design. When instructed to begin verification, use the predefined verification input to start the process.",
-    llm_config=llm_config
-)
-control_verification_agent.register_reply(
-    lambda messages: state_manager.state == "verification",
-    verification_response
-)
-
-# Create human proxy
-# Create human proxy
-human = UserProxyAgent(
-    name="Human",
-    system_message="You oversee the Boost converter controller design process. Initiate the design request and observe. Do not provide any additional input or commentary.",
-    human_input_mode="NEVER",
-    max_consecutive_auto_reply=1,
-    code_execution_config={"use_docker": False}
-)
-
-# Create GroupChat
-groupchat = GroupChat(
-    agents=[human, manager_agent, model_design_agent, objective_agent, controller_algorithm_design_agent, optimization_algorithm_design_agent, control_verification_agent],
-    messages=[],
-    max_round=13
-)
-
-# 创建自定义的 GroupChatManager
-class CustomGroupChatManager(GroupChatManager):
-    def _process_received_message(self, message: str, sender: ConversableAgent, silent: bool) -> str:
-        if message.strip().endswith("TERMINATE"):
-            print(message.strip()[:-9])  # 打印分析结果，但不包括 TERMINATE
-            print("\nConversation ended successfully.")
-            self._terminate_chat = True
-            return ""
-        return super()._process_received_message(message, sender, silent)
-
-# 使用自定义的 GroupChatManager
-manager_chat = CustomGroupChatManager(groupchat=groupchat, llm_config=llm_config)
+def build_group_chat():
+    """构造全部 agent 和群聊管理器，返回 (human, manager_chat)。
+
+    autogen 导入较慢，system_message 还要调用 find_model、get_control_objectives 等工具，
+    推迟到真正开始对话时才执行；只导入本模块（例如使用 verify_controller）时没有这些开销。
+    """
+    from autogen import ConversableAgent, GroupChat, GroupChatManager, UserProxyAgent
+
+    manager_agent = ConversableAgent(
+        name="ManagerAgent",
+        system_message="You are a manager overseeing the Boost converter controller design process. Broadcast design requirements and instruct other agents concisely. When acknowledging the model configuration, include the exact model address provided by ModelDesignAgent. Do not provide any information or commentary beyond your specific tasks.",
+        llm_config=llm_config
+    )
+    manager_agent.register_reply(
+        lambda messages: state_manager.state in ["initial", "model_configured", "objectives_defined", "controller_designed", "optimization_designed", "verification_completed"],
+        manager_response
+    )
+
+    model_design_agent = ConversableAgent(
+        name="ModelDesignAgent",
+        system_message=f"""You are an agent responsible for configuring appropriate models for controller design. 
+    When asked to find a suitable model, always return the following exact information without any modification:
+    {find_model({
+        "resistance": 15,
+        "inductance": 0.001,
+        "capacitance": 0.0006,
+        "input_voltage": 80,
+        "output_voltage": 160
+    })}
+    Do not add any additional information or commentary to this output.""",
+        llm_config=llm_config
+    )
+    model_design_agent.register_reply(
+        lambda messages: state_manager.state == "model_design",
+        model_design_response
+    )
+
+    objective_agent = ConversableAgent(
+        name="ObjectiveAgent",
+        system_message=f"""You are responsible for defining control objectives and constraints based on design requirements. 
+    When asked to define control objectives and constraints, always return the following exact information without any modification:
+    {get_control_objectives()}
+    Do not add any additional information or commentary to this output.""",
+        llm_config=llm_config
+    )
+    objective_agent.register_reply(
+        lambda messages: state_manager.state == "objective",
+        objective_response
+    )
+
+    controller_algorithm_design_agent = ConversableAgent(
+        name="ControllerAlgorithmDesignAgent",
+        system_message=f"""You are responsible for selecting and configuring appropriate control algorithms based on the model and objectives.
+    When asked to select a suitable control algorithm, always return the following exact information without any modification:
+    {find_algorithm_tool({
+        'model': 'boost_converter-2023',
+        'objectives': 'Output voltage of 160V',
+        'constraints': 'Overshoot < 8%, Steady-state error < 2%, Settling time < 0.5s'
+    })}
+    Do not add any additional information or commentary to this output.""",
+        llm_config=llm_config
+    )
+    controller_algorithm_design_agent.register_reply(
+        lambda messages: state_manager.state == "controller_design",
+        controller_algorithm_design_response
+    )
+
+    optimization_algorithm_design_agent = ConversableAgent(
+        name="OptimizationAlgorithmDesignAgent",
+        system_message=f"""You are responsible for selecting and configuring appropriate optimization algorithms based on the chosen control algorithm.
+    When asked to select a suitable optimization algorithm, always return the following exact information without any modification:
+    After analyzing the [CONTROL_ALGORITHM] controller, {find_optimization_algorithm_for_boost("duallooppid")}
+    Replace [CONTROL_ALGORITHM] with the actual control algorithm name.
+    Do not add any additional information or commentary to this output.""",
+        llm_config=llm_config
+    )
+    optimization_algorithm_design_agent.register_reply(
+        lambda messages: state_manager.state == "optimization_design",
+        optimization_algorithm_design_response
+    )
+
+    control_verification_agent = ConversableAgent(
+        name="ControlVerificationAgent",
+        system_message="You are responsible for verifying the Boost converter controller design. When instructed to begin verification, use the predefined verification input to start the process.",
+        llm_config=llm_config
+    )
+    control_verification_agent.register_reply(
+        lambda messages: state_manager.state == "verification",
+        verification_response
+    )
+
+    # Create human proxy
+    human = UserProxyAgent(
+        name="Human",
+        system_message="You oversee the Boost converter controller design process. Initiate the design request and observe. Do not provide any additional input or commentary.",
+        human_input_mode="NEVER",
+        max_consecutive_auto_reply=1,
+        code_execution_config={"use_docker": False}
+    )
+
+    # Create GroupChat
+    groupchat = GroupChat(
+        agents=[human, manager_agent, model_design_agent, objective_agent, controller_algorithm_design_agent, optimization_algorithm_design_agent, control_verification_agent],
+        messages=[],
+        max_round=13
+    )
+
+    # 创建自定义的 GroupChatManager
+    class CustomGroupChatManager(GroupChatManager):
+        def _process_received_message(self, message: str, sender: ConversableAgent, silent: bool) -> str:
+            if message.strip().endswith("TERMINATE"):
+                print(message.strip()[:-9])  # 打印分析结果，但不包括 TERMINATE
+                print("\nConversation ended successfully.")
+                self._terminate_chat = True
+                return ""
+            return super()._process_received_message(message, sender, silent)
+
+    # 使用自定义的 GroupChatManager
+    manager_chat = CustomGroupChatManager(groupchat=groupchat, llm_config=llm_config)
+
+    return human, manager_chat
 
 # Run the group chat
 if __name__ == "__main__":
@@ -392,4 +400,5 @@ if __name__ == "__main__":
 
     Please adhere to this order and only provide information relevant to your specific task."""
 
+    human, manager_chat = build_group_chat()
     chat_result = human.initiate_chat(manager_chat, message=initial_message)
\ No newline at end of file
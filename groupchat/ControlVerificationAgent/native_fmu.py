@@ -0,0 +1,148 @@
+"""生成平均模型 Boost 变换器的 FMI 2.0 协同仿真 FMU，二进制由 nativefmu/boost_converter.c 在本机编译。
+
+仓库中的 boost_converternopid.fmu 只有 win32/win64 DLL，在 Linux 上无法加载。这里生成的 FMU
+变量名和 valueReference 与 Dymola 导出的一致，BoostSimulationTool 无需任何改动即可使用：
+
+    python native_fmu.py --outdir .
+"""
+import argparse
+import hashlib
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+import zipfile
+from typing import List, NamedTuple, Optional
+from xml.sax.saxutils import quoteattr
+
+NATIVE_SOURCE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nativefmu')
+DEFAULT_MODEL_NAME = 'boost_converter_native'
+
+class FMUVariable(NamedTuple):
+    name: str
+    value_reference: int
+    causality: str
+    variability: str
+    start: Optional[float] = None
+    initial: Optional[str] = None
+    unit: Optional[str] = None
+    description: str = ''
+
+# valueReference 与 boost_converternopid.fmu 相同；inductor.i / capacitor.v 为可设置初值的状态
+VARIABLES: List[FMUVariable] = [
+    FMUVariable('constantVoltage.V', 16777216, 'parameter', 'fixed', 80.0, 'exact', 'V', 'Input voltage'),
+    FMUVariable('inductor.L', 16777226, 'parameter', 'fixed', 0.001, 'exact', 'H', 'Inductance'),
+    FMUVariable('pwm.f', 16777228, 'parameter', 'fixed', 20000.0, 'exact', 'Hz',
+                'PWM frequency (unused by the averaged model)'),
+    FMUVariable('capacitor.C', 16777232, 'parameter', 'fixed', 0.0006, 'exact', 'F', 'Capacitance'),
+    FMUVariable('const3.k', 16777235, 'parameter', 'tunable', 0.5, 'exact', None, 'Duty cycle'),
+    FMUVariable('step1.height', 16777236, 'parameter', 'fixed', 5.0, 'exact', 'Ohm', 'Load step height'),
+    FMUVariable('step1.offset', 16777237, 'parameter', 'fixed', 20.0, 'exact', 'Ohm', 'Load resistance before the step'),
+    FMUVariable('step1.startTime', 16777238, 'parameter', 'fixed', 0.5, 'exact', 's', 'Load step time'),
+    FMUVariable('currentSensor.i', 33554432, 'output', 'continuous', None, 'calculated', 'A', 'Inductor current'),
+    FMUVariable('voltageSensor.v', 33554433, 'output', 'continuous', None, 'calculated', 'V', 'Output voltage'),
+    FMUVariable('inductor.i', 33554434, 'local', 'continuous', 0.0, 'exact', 'A', 'Inductor current state'),
+    FMUVariable('capacitor.v', 33554435, 'local', 'continuous', 0.0, 'exact', 'V', 'Capacitor voltage state'),
+    FMUVariable('resistor1.R', 637534265, 'local', 'discrete', None, 'calculated', 'Ohm', 'Load resistance'),
+]
+
+def _c_macro(name: str) -> str:
+    return 'VR_' + name.replace('.', '_').upper()
+
+def model_description(model_identifier: str, guid: str) -> str:
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<fmiModelDescription fmiVersion="2.0" modelName="boost_converter" '
+        f'guid="{guid}" description="Averaged boost converter (native stand-in for boost_converternopid)" '
+        'generationTool="native_fmu.py" variableNamingConvention="structured" numberOfEventIndicators="0">',
+        f'  <CoSimulation modelIdentifier="{model_identifier}" canHandleVariableCommunicationStepSize="true" '
+        'canGetAndSetFMUstate="true" canSerializeFMUstate="true" canNotUseMemoryManagementFunctions="true"/>',
+        '  <DefaultExperiment startTime="0" stopTime="1" stepSize="0.0001"/>',
+        '  <ModelVariables>',
+    ]
+    for v in VARIABLES:
+        attrs = (f'name={quoteattr(v.name)} valueReference="{v.value_reference}" '
+                 f'description={quoteattr(v.description)} causality="{v.causality}" variability="{v.variability}"')
+        if v.initial is not None and v.causality != 'parameter':
+            attrs += f' initial="{v.initial}"'
+        real = '<Real'
+        if v.unit is not None:
+            real += f' unit="{v.unit}"'
+        if v.start is not None:
+            real += f' start="{v.start!r}"'
+        lines.append(f'    <ScalarVariable {attrs}>')
+        lines.append(f'      {real}/>')
+        lines.append('    </ScalarVariable>')
+    lines.append('  </ModelVariables>')
+    # ModelStructure 中的 index 从 1 开始，按 ModelVariables 中的顺序
+    outputs = [i + 1 for i, v in enumerate(VARIABLES) if v.causality == 'output']
+    lines.append('  <ModelStructure>')
+    lines.append('    <Outputs>')
+    lines.extend(f'      <Unknown index="{i}" dependencies=""/>' for i in outputs)
+    lines.append('    </Outputs>')
+    lines.append('    <InitialUnknowns>')
+    lines.extend(f'      <Unknown index="{i}" dependencies=""/>' for i in outputs)
+    lines.append('    </InitialUnknowns>')
+    lines.append('  </ModelStructure>')
+    lines.append('</fmiModelDescription>')
+    return '\n'.join(lines) + '\n'
+
+def variables_header(guid: str) -> str:
+    lines = ['/* Generated by native_fmu.py, do not edit */',
+             f'#define MODEL_GUID "{guid}"']
+    lines.extend(f'#define {_c_macro(v.name)} {v.value_reference}u' for v in VARIABLES)
+    return '\n'.join(lines) + '\n'
+
+def _platform_dir() -> str:
+    system = platform.system()
+    bits = '64' if platform.architecture()[0] == '64bit' else '32'
+    if system == 'Linux':
+        return 'linux' + bits
+    if system == 'Darwin':
+        return 'darwin' + bits
+    raise RuntimeError(f"Native stand-in FMU is not supported on {system}; use the Dymola FMU instead")
+
+def build_native_fmu(outdir: str = '.', fmumodelname: str = DEFAULT_MODEL_NAME, cc: Optional[str] = None,
+                     force: bool = False) -> str:
+    """编译并打包 FMU，返回 .fmu 路径；已存在且 force=False 时直接返回"""
+    fmu_path = os.path.join(os.path.abspath(outdir), fmumodelname + '.fmu')
+    if os.path.isfile(fmu_path) and not force:
+        return fmu_path
+
+    with open(os.path.join(NATIVE_SOURCE_DIR, 'boost_converter.c'), 'rb') as f:
+        source = f.read()
+    # GUID 取决于 C 源码和变量表，任何一方变化都会得到不同的 FMU
+    guid = '{' + hashlib.sha256(source + repr(VARIABLES).encode('utf-8')).hexdigest()[:32] + '}'
+    cc = cc or os.environ.get('CC', 'cc')
+    binary_name = fmumodelname + ('.dylib' if platform.system() == 'Darwin' else '.so')
+
+    with tempfile.TemporaryDirectory() as build_dir:
+        with open(os.path.join(build_dir, 'boost_converter_vars.h'), 'w') as f:
+            f.write(variables_header(guid))
+        binary_path = os.path.join(build_dir, binary_name)
+        subprocess.run([cc, '-O2', '-shared', '-fPIC', '-I', build_dir,
+                        os.path.join(NATIVE_SOURCE_DIR, 'boost_converter.c'), '-o', binary_path], check=True)
+
+        os.makedirs(os.path.dirname(fmu_path), exist_ok=True)
+        tmp_fmu = fmu_path + '.tmp'
+        with zipfile.ZipFile(tmp_fmu, 'w', zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr('modelDescription.xml', model_description(fmumodelname, guid))
+            archive.write(binary_path, f'binaries/{_platform_dir()}/{binary_name}')
+            archive.write(os.path.join(NATIVE_SOURCE_DIR, 'boost_converter.c'), 'sources/boost_converter.c')
+            archive.writestr('sources/boost_converter_vars.h', variables_header(guid))
+        os.replace(tmp_fmu, fmu_path)
+    return fmu_path
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--outdir', default='.', help='FMU 输出目录')
+    parser.add_argument('--name', default=DEFAULT_MODEL_NAME, help='FMU 文件名（不含扩展名），同时作为 modelIdentifier')
+    parser.add_argument('--cc', default=None, help='C 编译器，默认取 $CC 或 cc')
+    args = parser.parse_args(argv)
+    if shutil.which(args.cc or os.environ.get('CC', 'cc')) is None:
+        parser.error("No C compiler found; install gcc or pass --cc")
+    print(build_native_fmu(args.outdir, args.name, args.cc, force=True))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,359 @@
+/*
+ * Averaged boost converter as an FMI 2.0 co-simulation slave.
+ *
+ * Stand-in for boost_converternopid.fmu on hosts without the Windows DLLs.
+ * Variable names and value references match the Dymola export, the plant is
+ * the averaged model of ModelDesignAgent/boostconverter.py (explicit Euler per
+ * communication step), and the load follows step1 like resistor1.R does.
+ *
+ * boost_converter_vars.h is generated by native_fmu.py from the same table as
+ * modelDescription.xml and defines the VR_* value references and MODEL_GUID.
+ */
+#include <stdlib.h>
+#include <string.h>
+#include "boost_converter_vars.h"
+
+/* FMI 2.0 platform types (fmi2TypesPlatform.h / fmi2FunctionTypes.h) */
+typedef void *fmi2Component;
+typedef void *fmi2ComponentEnvironment;
+typedef void *fmi2FMUstate;
+typedef unsigned int fmi2ValueReference;
+typedef double fmi2Real;
+typedef int fmi2Integer;
+typedef int fmi2Boolean;
+typedef char fmi2Char;
+typedef const fmi2Char *fmi2String;
+typedef char fmi2Byte;
+
+#define fmi2True 1
+#define fmi2False 0
+
+typedef enum { fmi2OK, fmi2Warning, fmi2Discard, fmi2Error, fmi2Fatal, fmi2Pending } fmi2Status;
+typedef enum { fmi2ModelExchange, fmi2CoSimulation } fmi2Type;
+typedef enum { fmi2DoStepStatus, fmi2PendingStatus, fmi2LastSuccessfulTime, fmi2Terminated } fmi2StatusKind;
+
+typedef void (*fmi2CallbackLogger)(fmi2ComponentEnvironment, fmi2String, fmi2Status, fmi2String, fmi2String, ...);
+typedef void *(*fmi2CallbackAllocateMemory)(size_t, size_t);
+typedef void (*fmi2CallbackFreeMemory)(void *);
+typedef void (*fmi2StepFinished)(fmi2ComponentEnvironment, fmi2Status);
+
+typedef struct {
+    const fmi2CallbackLogger logger;
+    const fmi2CallbackAllocateMemory allocateMemory;
+    const fmi2CallbackFreeMemory freeMemory;
+    const fmi2StepFinished stepFinished;
+    const fmi2ComponentEnvironment componentEnvironment;
+} fmi2CallbackFunctions;
+
+#define FMI2_EXPORT __attribute__((visibility("default")))
+
+/* Everything that defines the simulation state; FMU state snapshots copy it whole. */
+typedef struct {
+    fmi2Real time;
+    fmi2Real V_in;
+    fmi2Real L;
+    fmi2Real pwm_f;
+    fmi2Real C;
+    fmi2Real duty_cycle;
+    fmi2Real step_height;
+    fmi2Real step_offset;
+    fmi2Real step_start_time;
+    fmi2Real i_L;
+    fmi2Real v_C;
+} ModelState;
+
+typedef struct {
+    ModelState s;
+    char instance_name[128];
+    const fmi2CallbackFunctions *functions;
+    fmi2Boolean logging_on;
+    fmi2Boolean terminated;
+} ModelInstance;
+
+static void set_defaults(ModelState *s)
+{
+    s->time = 0.0;
+    s->V_in = 80.0;
+    s->L = 0.001;
+    s->pwm_f = 20000.0;
+    s->C = 0.0006;
+    s->duty_cycle = 0.5;
+    s->step_height = 5.0;
+    s->step_offset = 20.0;
+    s->step_start_time = 0.5;
+    s->i_L = 0.0;
+    s->v_C = 0.0;
+}
+
+static fmi2Real resistance_at(const ModelState *s, fmi2Real t)
+{
+    return s->step_offset + (t >= s->step_start_time ? s->step_height : 0.0);
+}
+
+static fmi2Real *variable(ModelInstance *m, fmi2ValueReference vr)
+{
+    switch (vr) {
+    case VR_CONSTANTVOLTAGE_V: return &m->s.V_in;
+    case VR_INDUCTOR_L: return &m->s.L;
+    case VR_PWM_F: return &m->s.pwm_f;
+    case VR_CAPACITOR_C: return &m->s.C;
+    case VR_CONST3_K: return &m->s.duty_cycle;
+    case VR_STEP1_HEIGHT: return &m->s.step_height;
+    case VR_STEP1_OFFSET: return &m->s.step_offset;
+    case VR_STEP1_STARTTIME: return &m->s.step_start_time;
+    case VR_CURRENTSENSOR_I: return &m->s.i_L;
+    case VR_VOLTAGESENSOR_V: return &m->s.v_C;
+    case VR_INDUCTOR_I: return &m->s.i_L;
+    case VR_CAPACITOR_V: return &m->s.v_C;
+    default: return NULL;
+    }
+}
+
+static void log_error(ModelInstance *m, fmi2String message)
+{
+    if (m && m->functions && m->functions->logger)
+        m->functions->logger(m->functions->componentEnvironment, m->instance_name, fmi2Error, "error", message);
+}
+
+FMI2_EXPORT const char *fmi2GetTypesPlatform(void) { return "default"; }
+FMI2_EXPORT const char *fmi2GetVersion(void) { return "2.0"; }
+
+FMI2_EXPORT fmi2Status fmi2SetDebugLogging(fmi2Component c, fmi2Boolean loggingOn, size_t nCategories,
+                                           const fmi2String categories[])
+{
+    ((ModelInstance *)c)->logging_on = loggingOn;
+    return fmi2OK;
+}
+
+FMI2_EXPORT fmi2Component fmi2Instantiate(fmi2String instanceName, fmi2Type fmuType, fmi2String fmuGUID,
+                                          fmi2String fmuResourceLocation, const fmi2CallbackFunctions *functions,
+                                          fmi2Boolean visible, fmi2Boolean loggingOn)
+{
+    ModelInstance *m;
+    if (fmuType != fmi2CoSimulation || (fmuGUID && strcmp(fmuGUID, MODEL_GUID) != 0))
+        return NULL;
+    m = (ModelInstance *)calloc(1, sizeof(ModelInstance));
+    if (!m)
+        return NULL;
+    set_defaults(&m->s);
+    strncpy(m->instance_name, instanceName ? instanceName : "", sizeof(m->instance_name) - 1);
+    m->functions = functions;
+    m->logging_on = loggingOn;
+    return m;
+}
+
+FMI2_EXPORT void fmi2FreeInstance(fmi2Component c) { free(c); }
+
+FMI2_EXPORT fmi2Status fmi2SetupExperiment(fmi2Component c, fmi2Boolean toleranceDefined, fmi2Real tolerance,
+                                           fmi2Real startTime, fmi2Boolean stopTimeDefined, fmi2Real stopTime)
+{
+    ((ModelInstance *)c)->s.time = startTime;
+    return fmi2OK;
+}
+
+FMI2_EXPORT fmi2Status fmi2EnterInitializationMode(fmi2Component c) { return fmi2OK; }
+FMI2_EXPORT fmi2Status fmi2ExitInitializationMode(fmi2Component c) { return fmi2OK; }
+
+FMI2_EXPORT fmi2Status fmi2Terminate(fmi2Component c)
+{
+    ((ModelInstance *)c)->terminated = fmi2True;
+    return fmi2OK;
+}
+
+FMI2_EXPORT fmi2Status fmi2Reset(fmi2Component c)
+{
+    ModelInstance *m = (ModelInstance *)c;
+    set_defaults(&m->s);
+    m->terminated = fmi2False;
+    return fmi2OK;
+}
+
+FMI2_EXPORT fmi2Status fmi2GetReal(fmi2Component c, const fmi2ValueReference vr[], size_t nvr, fmi2Real value[])
+{
+    ModelInstance *m = (ModelInstance *)c;
+    size_t i;
+    for (i = 0; i < nvr; i++) {
+        fmi2Real *v;
+        if (vr[i] == VR_RESISTOR1_R) {
+            value[i] = resistance_at(&m->s, m->s.time);
+            continue;
+        }
+        v = variable(m, vr[i]);
+        if (!v) {
+            log_error(m, "fmi2GetReal: unknown value reference");
+            return fmi2Error;
+        }
+        value[i] = *v;
+    }
+    return fmi2OK;
+}
+
+FMI2_EXPORT fmi2Status fmi2SetReal(fmi2Component c, const fmi2ValueReference vr[], size_t nvr,
+                                   const fmi2Real value[])
+{
+    ModelInstance *m = (ModelInstance *)c;
+    size_t i;
+    for (i = 0; i < nvr; i++) {
+        fmi2Real *v = vr[i] == VR_CURRENTSENSOR_I || vr[i] == VR_VOLTAGESENSOR_V ? NULL : variable(m, vr[i]);
+        if (!v) {
+            log_error(m, "fmi2SetReal: value reference is not settable");
+            return fmi2Error;
+        }
+        *v = value[i];
+    }
+    return fmi2OK;
+}
+
+FMI2_EXPORT fmi2Status fmi2GetInteger(fmi2Component c, const fmi2ValueReference vr[], size_t nvr,
+                                      fmi2Integer value[])
+{
+    return nvr ? fmi2Error : fmi2OK;
+}
+
+FMI2_EXPORT fmi2Status fmi2GetBoolean(fmi2Component c, const fmi2ValueReference vr[], size_t nvr,
+                                      fmi2Boolean value[])
+{
+    return nvr ? fmi2Error : fmi2OK;
+}
+
+FMI2_EXPORT fmi2Status fmi2GetString(fmi2Component c, const fmi2ValueReference vr[], size_t nvr,
+                                     fmi2String value[])
+{
+    return nvr ? fmi2Error : fmi2OK;
+}
+
+FMI2_EXPORT fmi2Status fmi2SetInteger(fmi2Component c, const fmi2ValueReference vr[], size_t nvr,
+                                      const fmi2Integer value[])
+{
+    return nvr ? fmi2Error : fmi2OK;
+}
+
+FMI2_EXPORT fmi2Status fmi2SetBoolean(fmi2Component c, const fmi2ValueReference vr[], size_t nvr,
+                                      const fmi2Boolean value[])
+{
+    return nvr ? fmi2Error : fmi2OK;
+}
+
+FMI2_EXPORT fmi2Status fmi2SetString(fmi2Component c, const fmi2ValueReference vr[], size_t nvr,
+                                     const fmi2String value[])
+{
+    return nvr ? fmi2Error : fmi2OK;
+}
+
+FMI2_EXPORT fmi2Status fmi2GetFMUstate(fmi2Component c, fmi2FMUstate *FMUstate)
+{
+    ModelState *state = *FMUstate ? (ModelState *)*FMUstate : (ModelState *)malloc(sizeof(ModelState));
+    if (!state)
+        return fmi2Error;
+    *state = ((ModelInstance *)c)->s;
+    *FMUstate = state;
+    return fmi2OK;
+}
+
+FMI2_EXPORT fmi2Status fmi2SetFMUstate(fmi2Component c, fmi2FMUstate FMUstate)
+{
+    if (!FMUstate)
+        return fmi2Error;
+    ((ModelInstance *)c)->s = *(ModelState *)FMUstate;
+    return fmi2OK;
+}
+
+FMI2_EXPORT fmi2Status fmi2FreeFMUstate(fmi2Component c, fmi2FMUstate *FMUstate)
+{
+    free(*FMUstate);
+    *FMUstate = NULL;
+    return fmi2OK;
+}
+
+FMI2_EXPORT fmi2Status fmi2SerializedFMUstateSize(fmi2Component c, fmi2FMUstate FMUstate, size_t *size)
+{
+    *size = sizeof(ModelState);
+    return fmi2OK;
+}
+
+FMI2_EXPORT fmi2Status fmi2SerializeFMUstate(fmi2Component c, fmi2FMUstate FMUstate, fmi2Byte serializedState[],
+                                             size_t size)
+{
+    if (size < sizeof(ModelState))
+        return fmi2Error;
+    memcpy(serializedState, FMUstate, sizeof(ModelState));
+    return fmi2OK;
+}
+
+FMI2_EXPORT fmi2Status fmi2DeSerializeFMUstate(fmi2Component c, const fmi2Byte serializedState[], size_t size,
+                                               fmi2FMUstate *FMUstate)
+{
+    if (size != sizeof(ModelState))
+        return fmi2Error;
+    if (!*FMUstate && !(*FMUstate = malloc(sizeof(ModelState))))
+        return fmi2Error;
+    memcpy(*FMUstate, serializedState, sizeof(ModelState));
+    return fmi2OK;
+}
+
+FMI2_EXPORT fmi2Status fmi2GetDirectionalDerivative(fmi2Component c, const fmi2ValueReference vUnknown_ref[],
+                                                    size_t nUnknown, const fmi2ValueReference vKnown_ref[],
+                                                    size_t nKnown, const fmi2Real dvKnown[], fmi2Real dvUnknown[])
+{
+    return fmi2Error;
+}
+
+FMI2_EXPORT fmi2Status fmi2SetRealInputDerivatives(fmi2Component c, const fmi2ValueReference vr[], size_t nvr,
+                                                   const fmi2Integer order[], const fmi2Real value[])
+{
+    return fmi2Error;
+}
+
+FMI2_EXPORT fmi2Status fmi2GetRealOutputDerivatives(fmi2Component c, const fmi2ValueReference vr[], size_t nvr,
+                                                    const fmi2Integer order[], fmi2Real value[])
+{
+    return fmi2Error;
+}
+
+FMI2_EXPORT fmi2Status fmi2DoStep(fmi2Component c, fmi2Real currentCommunicationPoint,
+                                  fmi2Real communicationStepSize, fmi2Boolean noSetFMUStatePriorToCurrentPoint)
+{
+    ModelState *s = &((ModelInstance *)c)->s;
+    fmi2Real h = communicationStepSize;
+    fmi2Real off = 1.0 - s->duty_cycle;
+    fmi2Real delta_I = (s->V_in - off * s->v_C) * h / s->L;
+    fmi2Real delta_V = (off * s->i_L - s->v_C / resistance_at(s, currentCommunicationPoint)) * h / s->C;
+    s->i_L += delta_I;
+    s->v_C += delta_V;
+    s->time = currentCommunicationPoint + h;
+    return fmi2OK;
+}
+
+FMI2_EXPORT fmi2Status fmi2CancelStep(fmi2Component c) { return fmi2Error; }
+
+FMI2_EXPORT fmi2Status fmi2GetStatus(fmi2Component c, const fmi2StatusKind s, fmi2Status *value)
+{
+    *value = fmi2OK;
+    return fmi2OK;
+}
+
+FMI2_EXPORT fmi2Status fmi2GetRealStatus(fmi2Component c, const fmi2StatusKind s, fmi2Real *value)
+{
+    if (s != fmi2LastSuccessfulTime)
+        return fmi2Discard;
+    *value = ((ModelInstance *)c)->s.time;
+    return fmi2OK;
+}
+
+FMI2_EXPORT fmi2Status fmi2GetIntegerStatus(fmi2Component c, const fmi2StatusKind s, fmi2Integer *value)
+{
+    return fmi2Discard;
+}
+
+FMI2_EXPORT fmi2Status fmi2GetBooleanStatus(fmi2Component c, const fmi2StatusKind s, fmi2Boolean *value)
+{
+    if (s != fmi2Terminated)
+        return fmi2Discard;
+    *value = ((ModelInstance *)c)->terminated;
+    return fmi2OK;
+}
+
+FMI2_EXPORT fmi2Status fmi2GetStringStatus(fmi2Component c, const fmi2StatusKind s, fmi2String *value)
+{
+    return fmi2Discard;
+}
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 各模块按 ControlVerificationAgent 目录平铺导入（from ControlTool import ...）
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+from ControlTool import ControlParams, ControllerFactory
+from SimulationTool import SimulationParams, BoostSimulationTool
+from AveragedSimulationTool import AveragedBoostSimulationTool, BoostPlantParams
+from JITSimulationTool import JITAveragedBoostSimulationTool
+from StateSpaceController import DualLoopStateSpaceController, DualLoopStateSpaceParams
+from FMUPool import FMUPool
+from FakeFMU import FakeBoostFMU, fake_fmu_loader
+from benchmark import CONTROL_PARAMS, FMU_PATH
+
+CONTROL = ControlParams(control_params=CONTROL_PARAMS)
+PARTICLES = np.array([[0.3, 0.006, 0.3, 0.006], [1, 0.1, 1, 0.1], [10, 0.001, 10, 0.001]])
+TIMINGS = [{}, {'record_every': 7}, {'control_period': 0.0003},
+           {'control_period': 0.0002, 'communication_step': 0.00005, 'record_every': 3}]
+
+def _params(simulation_time: float = 1.0, initial_voltage: float = 80, **timing) -> SimulationParams:
+    return SimulationParams(simulation_time=simulation_time, target_voltage=160, initial_voltage=initial_voltage,
+                            step_size=0.0001, **timing)
+
+def _pid():
+    return ControllerFactory.create_controller('duallooppid', CONTROL)
+
+@pytest.mark.parametrize('timing', TIMINGS)
+def test_jit_matches_python(timing):
+    simulation_params = _params(**timing)
+    python_tool = AveragedBoostSimulationTool()
+    jit_tool = JITAveragedBoostSimulationTool()
+    expected = python_tool.simulate(None, simulation_params, _pid())
+    assert len(expected) == len(python_tool.record_times(simulation_params))
+    np.testing.assert_array_equal(jit_tool.simulate(None, simulation_params, _pid()).data, expected.data)
+    np.testing.assert_array_equal(jit_tool.simulate_batch(PARTICLES, CONTROL, simulation_params).data,
+                                  python_tool.simulate_batch(PARTICLES, CONTROL, simulation_params).data)
+
+def test_jit_matches_python_state_space():
+    spec = {'dt': 0.0001,
+            'voltage': {'structure': 'pid', 'k': 0.3, 'Ti': 0.006, 'Td': 0.0001, 'y_max': 800, 'y_min': 0,
+                        'anti_windup': 'clamp'},
+            'current': {'structure': 'pi', 'k': 0.3, 'Ti': 0.006, 'y_max': 1, 'y_min': 0, 'anti_windup': 'clamp'}}
+    params = DualLoopStateSpaceParams.from_spec(spec)
+    expected = AveragedBoostSimulationTool().simulate(None, _params(), DualLoopStateSpaceController(params))
+    result = JITAveragedBoostSimulationTool().simulate(None, _params(), DualLoopStateSpaceController(params))
+    np.testing.assert_array_equal(result.data, expected.data)
+
+@pytest.mark.parametrize('timing', TIMINGS)
+def test_averaged_matches_fake_fmu(timing):
+    # FakeBoostFMU 与平均模型的离散方式相同，时间划分一致时轨迹逐位相同
+    simulation_params = _params(simulation_time=0.6, initial_voltage=0, **timing)
+    fmu_tool = BoostSimulationTool(fmu_pool=FMUPool(loader=fake_fmu_loader), use_cache=False)
+    expected = fmu_tool.simulate(FMU_PATH, simulation_params, _pid())
+    plant_params = BoostPlantParams.from_fmu_model(FakeBoostFMU())
+    for tool in (AveragedBoostSimulationTool(plant_params), JITAveragedBoostSimulationTool(plant_params)):
+        np.testing.assert_array_equal(tool.simulate(None, simulation_params, _pid()).data, expected.data)
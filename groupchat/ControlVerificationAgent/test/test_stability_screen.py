@@ -0,0 +1,46 @@
+import numpy as np
+from ControlTool import ControlParams
+from SimulationTool import SimulationParams
+from AveragedSimulationTool import AveragedBoostSimulationTool
+from OptimizationTool import PSOOptimizer
+from StabilityScreen import StabilityScreen, trajectory_stable
+from benchmark import CONTROL_PARAMS
+
+CONTROL = ControlParams(control_params=CONTROL_PARAMS)
+SIMULATION = SimulationParams(simulation_time=1.0, target_voltage=160, initial_voltage=80, step_size=0.0001)
+# voltage_k, voltage_Ti, current_k, current_Ti
+README_GAINS = [0.3, 0.006, 0.3, 0.006]
+NOMINAL_GAINS = [1, 0.1, 1, 0.1]
+# 线性化谱半径约 159，但限幅下收敛到误差带附近（得分约 0.64）
+SATURATED_GAINS = [0.001, 0.001, 10, 10]
+# 电压一直偏离目标（得分约 26）
+DIVERGENT_GAINS = [10, 0.001, 10, 0.001]
+
+def _screen(**kwargs) -> StabilityScreen:
+    # 与 PSOOptimizer(stability_screen=True) 使用的预筛相同
+    return PSOOptimizer(stability_screen=True, **kwargs)._create_stability_screen(
+        None, AveragedBoostSimulationTool(), SIMULATION)
+
+def test_nominal_gains_pass():
+    verdict = _screen().screen(np.array([README_GAINS, NOMINAL_GAINS, SATURATED_GAINS]), CONTROL)
+    assert verdict.stable.all()
+    # 线性化本身判为不稳定，是验证仿真放行的
+    assert (verdict.spectral_radius > 1).all()
+
+def test_divergent_gains_rejected():
+    screen = _screen()
+    verdict = screen.screen(np.array([README_GAINS, DIVERGENT_GAINS]), CONTROL)
+    assert verdict.stable.tolist() == [True, False]
+    assert screen.summary()['rejected'] == 1
+
+def test_audit_uses_evaluator_band():
+    screen = _screen(stability_audit=True)
+    particles = np.array([README_GAINS, DIVERGENT_GAINS])
+    observed = screen.audit(particles, CONTROL, SIMULATION, screen.screen(particles, CONTROL))
+    assert observed.tolist() == [True, False]
+    assert screen.summary()['agreement_rate'] == 1.0
+
+def test_trajectory_stable_tolerates_ripple():
+    time = np.arange(0, 1, 0.0001)
+    ripple = 160 + 0.6 * np.sin(2 * np.pi * 500 * time)
+    assert trajectory_stable(np.stack([ripple, ripple * 1.1]), 160).tolist() == [True, False]